@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from lib import git
+
+QUERIES: dict[str, Callable[[git.Git], object]] = {
+    "root": lambda g: g.root(),
+    "current_branch": lambda g: g.current_branch(),
+    "branch_sha": lambda g: g.branch_sha("HEAD"),
+    "remotes": lambda g: g.remotes(),
+}
+
+
+@dataclass
+class Config:
+    iterations: int
+
+
+def parse_args() -> Config:
+    parser = argparse.ArgumentParser(description="""
+    Compare how long the frequent lib.git queries take when they read the
+    files in .git and when they run git. Run it inside a git repository.
+    """)
+    parser.add_argument(
+        "--iterations",
+        help="Number of times to run each query",
+        type=int,
+        default=100,
+    )
+    return Config(**vars(parser.parse_args()))
+
+
+def measure(read_files: bool, iterations: int) -> dict[str, float]:
+    """Mean seconds per query, each on a new provider (so nothing is cached)."""
+    totals = dict.fromkeys(QUERIES, 0.0)
+    for _ in range(iterations):
+        for name, query in QUERIES.items():
+            prov = git.Git(read_files=read_files)
+            start = time.perf_counter()
+            query(prov)
+            totals[name] += time.perf_counter() - start
+    return {name: total / iterations for name, total in totals.items()}
+
+
+def main(config: Config) -> None:
+    subprocess_times = measure(False, config.iterations)
+    file_times = measure(True, config.iterations)
+    print(f"{'query':<16} {'subprocess':>12} {'files':>12} {'speedup':>8}")
+    for name in QUERIES:
+        slow, fast = subprocess_times[name], file_times[name]
+        print(
+            f"{name:<16} {slow * 1e6:>10.0f}us {fast * 1e6:>10.0f}us"
+            f" {slow / max(fast, 1e-9):>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(parse_args())
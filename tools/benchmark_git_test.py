@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import contextlib
+import io
+import os
+import subprocess  # nosec
+import tempfile
+import unittest
+import unittest.mock
+
+from benchmark_git import QUERIES, Config, main, measure
+
+
+class BenchmarkGitTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp.name)
+        patcher = unittest.mock.patch.dict(
+            os.environ,
+            {
+                "GIT_AUTHOR_NAME": "Alice",
+                "GIT_AUTHOR_EMAIL": "alice@example.com",
+                "GIT_COMMITTER_NAME": "Alice",
+                "GIT_COMMITTER_EMAIL": "alice@example.com",
+                "GIT_CONFIG_GLOBAL": os.devnull,
+                "GIT_CONFIG_NOSYSTEM": "1",
+            },
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        subprocess.check_call(["git", "init", "--quiet"])  # nosec
+        subprocess.check_call(  # nosec
+            ["git", "commit", "--quiet", "--allow-empty", "-m", "Initial"]
+        )
+
+    def test_measure(self) -> None:
+        for read_files in (False, True):
+            times = measure(read_files, 2)
+            self.assertEqual(list(times), list(QUERIES))
+            self.assertTrue(all(t > 0 for t in times.values()))
+
+    def test_main(self) -> None:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main(Config(iterations=1))
+        self.assertEqual(len(out.getvalue().splitlines()), len(QUERIES) + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2024-2026 The TokTok team
 import argparse
+import contextlib
 import os
 import re
 import subprocess  # nosec
@@ -12,7 +13,7 @@ import sign_release_assets
 import sign_tag
 import validate_pr
 import verify_release_assets
-from lib import changelog, git, github, stage
+from lib import changelog, git, github, ratelimit, stage, webhook
 
 BRANCH_PREFIX = git.RELEASE_BRANCH_PREFIX
 RELEASER_START = "<!-- Releaser:start -->"
@@ -33,6 +34,8 @@ class Config:
     verify: bool
     version: str
     upstream: str
+    webhook_port: int | None = None
+    webhook_host: str = "127.0.0.1"
 
 
 def parse_args() -> Config:
@@ -115,14 +118,75 @@ def parse_args() -> Config:
         help="The name of the upstream remote. Default: upstream",
         default="upstream",
     )
+    parser.add_argument(
+        "--webhook-port",
+        type=int,
+        help="Listen for GitHub webhook events (check_run, workflow_run, "
+        "pull_request) on this port to continue waiting stages as soon as "
+        "something happens. Set GITHUB_WEBHOOK_SECRET to verify them. "
+        "Default: only poll",
+        default=None,
+    )
+    parser.add_argument(
+        "--webhook-host",
+        help="The address to receive webhook events on. Binding to anything "
+        "other than a loopback address requires GITHUB_WEBHOOK_SECRET. "
+        "Default: 127.0.0.1",
+        default="127.0.0.1",
+    )
     return Config(**vars(parser.parse_args()))
 
 
+def poll_interval(seconds: float, deadline: float) -> float:
+    """The time to wait before the next poll, without overshooting deadline."""
+    return max(0.0, min(seconds, deadline - stage.monotonic()))
+
+
+def has_tarballs(version: str, asset_names: list[str]) -> bool:
+    """Check if there are tarball assets for the given version."""
+    return all(f"{version}.tar.{ext}" in asset_names for ext in ("gz", "xz"))
+
+
 class Releaser:
-    def __init__(self, config: Config, git_prov: git.Git, github_prov: github.GitHub):
+    # Webhook events end a wait no sooner than this many seconds after the
+    # previous one.
+    min_poll_interval = 5.0
+
+    def __init__(
+        self,
+        config: Config,
+        git_prov: git.Git,
+        github_prov: github.GitHub,
+        events: webhook.Receiver | None = None,
+    ):
         self.config = config
         self.git = git_prov
         self.github = github_prov
+        self.events = events
+
+    def wait(
+        self,
+        seconds: float,
+        *kinds: str,
+        head_sha: str | None = None,
+        pr: int | None = None,
+    ) -> None:
+        """Wait before polling GitHub again.
+
+        With a webhook receiver, an event of one of the given kinds about the
+        given commit or PR ends the wait early, but no earlier than
+        `min_poll_interval` after the previous poll.
+        """
+        if self.events is None:
+            stage.sleep(seconds)
+        else:
+            self.events.wait(
+                seconds,
+                kinds,
+                head_sha=head_sha,
+                pr=pr,
+                min_interval=self.min_poll_interval,
+            )
 
     def require(self, condition: bool, message: str | None = None) -> None:
         if not condition:
@@ -143,15 +207,28 @@ class Releaser:
         s.ok(f"Assigned to {self.github.actor()}")
         return stage.UserAbort(f"Returning to the user to {action}")
 
-    def compute_done_milestones(self, version: str) -> set[str]:
+    def release_snapshot(self, version: str) -> github.ReleaseSnapshot:
+        """Read the GitHub state of the release in a single request."""
+        # This is only for the dashboard, so it yields to the release stages
+        # when the rate limit runs low.
+        with ratelimit.priority(ratelimit.Priority.LOW):
+            return self.github.release_snapshot(
+                version,
+                f"{self.git.owner('origin')}:{BRANCH_PREFIX}/{version}",
+                self.config.main_branch,
+                self.config.issue,
+            )
+
+    def compute_done_milestones(
+        self, version: str, snapshot: github.ReleaseSnapshot | None = None
+    ) -> set[str]:
         """Heuristics to determine which milestones are completed."""
+        if snapshot is None:
+            snapshot = self.release_snapshot(version)
         done = set()
 
         # 1. Preparation
-        if self.github.find_pr_for_branch(
-            f"{self.git.owner('origin')}:{BRANCH_PREFIX}/{version}",
-            self.config.main_branch,
-        ):
+        if snapshot.has_pr:
             done.add("Preparation")
 
         # 2. Review
@@ -171,14 +248,17 @@ class Releaser:
             done.add("Tagging")
 
         # 4. Binaries
-        if self.has_tarballs(version) and not sign_release_assets.todo(version):
+        if has_tarballs(version, snapshot.asset_names) and not any(
+            sign_release_assets.needs_signing(name, snapshot.asset_names)
+            for name in snapshot.asset_names
+        ):
             done.add("Preparation")
             done.add("Review")
             done.add("Tagging")
             done.add("Binaries")
 
         # 5. Publication
-        if self.github.release_is_published(version):
+        if snapshot.release_published:
             done.add("Preparation")
             done.add("Review")
             done.add("Tagging")
@@ -220,14 +300,13 @@ class Releaser:
         if not self.config.issue or self.config.dryrun:
             return
 
-        done = self.compute_done_milestones(version)
+        snapshot = self.release_snapshot(version)
+        done = self.compute_done_milestones(version, snapshot)
         content = self.render_progress_list(done, current_task, instruction)
 
-        issue = self.github.get_issue(self.config.issue)
-        new_body = github.patch_markdown_section(
-            issue.body, "### Release progress", content
-        )
-        if new_body != issue.body:
+        body = snapshot.issue_body or ""
+        new_body = github.patch_markdown_section(body, "### Release progress", content)
+        if new_body != body:
             self.github.change_issue(self.config.issue, {"body": new_body})
 
     def stage_init(self) -> None:
@@ -487,10 +566,8 @@ class Releaser:
 
     def has_tarballs(self, version: str) -> bool:
         """Check if there are tarball assets for the given version."""
-        assets = self.github.release_assets(version)
-        return all(
-            any(a.name == f"{version}.tar.{ext}" for a in assets)
-            for ext in ("gz", "xz")
+        return has_tarballs(
+            version, [a.name for a in self.github.release_assets(version)]
         )
 
     def get_pr_body(self, body: str) -> str:
@@ -578,6 +655,7 @@ class Releaser:
             return
         with stage.Stage("Restyled", "Applying restyled fixes", parent=parent) as s:
             subprocess.run(["hub-restyled"], check=True)  # nosec
+            self.git.invalidate_refs()
             if self.git.is_clean():
                 raise s.fail("Failed to apply restyled changes")
             self.git.add(".")
@@ -591,23 +669,36 @@ class Releaser:
 
     def await_head_pr(self, s: stage.Stage, version: str) -> github.PullRequest:
         """Wait for the PR to be synced with the head sha."""
-        for _ in range(10):
+        deadline = stage.monotonic() + 50
+        while stage.monotonic() < deadline:
             pr = self.get_head_pr(version)
             if pr:
                 return pr
             s.progress(f"Waiting for release PR for {version}")
-            stage.sleep(5)
+            self.wait(poll_interval(5, deadline), "pull_request")
         raise ValueError("Timeout waiting for PR to be created/updated")
 
     def stage_await_checks(self, version: str) -> None:
         with stage.Stage("Await checks", "Waiting for checks to pass") as s:
-            for _ in range(120):  # 120 * 30s = 1 hour
+            previous: dict[str, github.CheckRun] = {}
+            previous_sha = ""
+            deadline = stage.monotonic() + 3600  # 1 hour
+            while stage.monotonic() < deadline:
                 pr = self.await_head_pr(s, version)
+                if pr.head_sha != previous_sha:
+                    previous, previous_sha = {}, pr.head_sha
 
-                checks = self.github.checks(pr.head_sha)
+                checks, changed = self.github.poll_checks(pr.head_sha, previous)
+                previous = checks
+                checks = dict(checks)
                 if not checks:
                     s.progress("Awaiting checks to start")
-                    stage.sleep(10)
+                    self.wait(
+                        poll_interval(10, deadline),
+                        "check_run",
+                        "check_suite",
+                        head_sha=pr.head_sha,
+                    )
                     continue
 
                 if self.config.verify:
@@ -634,11 +725,13 @@ class Releaser:
                     s.ok(f"All {len(completed)} checks passed")
                     return
 
+                finished = [c.name for c in changed if c.status == "completed"]
                 s.progress(
                     f"{len(success)} checks passed"
                     f", {len(neutral)} checks neutral"
                     f", {len(failures)} failed"
                     f", {len(progress)} in progress"
+                    + (f" (just finished: {', '.join(finished)})" if finished else "")
                 )
                 if (
                     "common / restyled" in checks
@@ -646,7 +739,13 @@ class Releaser:
                 ):
                     self.stage_restyled(version, parent=s)
 
-                stage.sleep(30)
+                self.wait(
+                    poll_interval(30, deadline),
+                    "check_run",
+                    "pull_request",
+                    head_sha=pr.head_sha,
+                    pr=pr.number,
+                )
 
             raise s.fail("Timeout waiting for checks to pass")
 
@@ -664,7 +763,8 @@ class Releaser:
     def stage_await_merged(self, version: str) -> None:
         """Wait for the PR to be merged by toktok-releaser."""
         with stage.Stage("Await merged", "Waiting for the PR to be merged") as s:
-            for _ in range(120):  # 120 * 30s = 1 hour
+            deadline = stage.monotonic() + 3600  # 1 hour
+            while stage.monotonic() < deadline:
                 pr = self.get_head_pr(version)
                 if not pr:
                     raise s.fail(f"PR not found for {version}")
@@ -679,7 +779,7 @@ class Releaser:
                     s.progress(f"PR {pr.number} is still open")
                 else:
                     s.progress(f"PR {pr.number} is {pr.state}")
-                stage.sleep(30)
+                self.wait(poll_interval(30, deadline), "pull_request", pr=pr.number)
             raise s.fail("Timeout waiting for PR to be merged")
 
     def stage_await_master_build(self, version: str) -> None:
@@ -688,7 +788,8 @@ class Releaser:
             "Await master build",
             f"Waiting for the {self.config.main_branch} branch to be built",
         ) as s:
-            for _ in range(120):  # 120 * 30s = 1 hour
+            deadline = stage.monotonic() + 3600  # 1 hour
+            while stage.monotonic() < deadline:
                 head_sha = self.git.branch_sha(self.config.main_branch)
                 builds = [
                     run
@@ -701,7 +802,9 @@ class Releaser:
                     s.progress(
                         f"Waiting for builds to start for {self.config.main_branch}"
                     )
-                    stage.sleep(10)
+                    self.wait(
+                        poll_interval(10, deadline), "workflow_run", head_sha=head_sha
+                    )
                     continue
                 for build in builds:
                     if build.conclusion == "failure":
@@ -711,7 +814,9 @@ class Releaser:
                     s.ok("Main branch built")
                     return
                 s.progress(f"Main branch still building: {builds[0].html_url}")
-                stage.sleep(30)
+                self.wait(
+                    poll_interval(30, deadline), "workflow_run", head_sha=head_sha
+                )
             raise s.fail(
                 f"Timeout waiting for {self.config.main_branch} branch to be built"
             )
@@ -795,14 +900,15 @@ class Releaser:
         """Wait for GitHub Actions to build the binaries."""
         with stage.Stage("Build binaries", "Waiting for binaries to be built") as s:
             head_sha = self.git.branch_sha(version)
-            for _ in range(6):  # 6 * 10s = 1 minute
+            deadline = stage.monotonic() + 60
+            while stage.monotonic() < deadline:
                 self.git.fetch(self.config.upstream)
                 head_sha = self.git.branch_sha(version)
                 builds = [run for run in self.github.action_runs(version, head_sha)]
                 if builds:
                     break
                 s.progress("Waiting for builds to start for " f"{version} @ {head_sha}")
-                stage.sleep(10)
+                self.wait(poll_interval(10, deadline), "workflow_run")
             else:
                 if self.config.github_actions:
                     s.ok("No builds found; waiting for a human to sign the tag")
@@ -814,13 +920,16 @@ class Releaser:
                         instruction=f"No builds found; maybe the tag wasn't pushed? Please sign and push the tag: `python3 tools/sign_tag.py --tag {version}`",
                     )
 
-            for _ in range(120):  # 120 * 30s = 1 hour
+            deadline = stage.monotonic() + 3600  # 1 hour
+            while stage.monotonic() < deadline:
                 builds = [run for run in self.github.action_runs(version, head_sha)]
                 if not builds:
                     s.progress(
                         "Waiting for builds to start for " f"{version} @ {head_sha}"
                     )
-                    stage.sleep(10)
+                    self.wait(
+                        poll_interval(10, deadline), "workflow_run", head_sha=head_sha
+                    )
                     continue
                 for build in builds:
                     if build.conclusion == "failure":
@@ -834,7 +943,9 @@ class Releaser:
                     self.github.clear_cache()
                     return
                 s.progress(f"Binaries still building: {builds[0].html_url}")
-                stage.sleep(30)
+                self.wait(
+                    poll_interval(30, deadline), "workflow_run", head_sha=head_sha
+                )
             raise s.fail("Timeout waiting for binaries to be built")
 
     def stage_create_tarballs(self, version: str) -> None:
@@ -995,19 +1106,29 @@ def main(config: Config) -> None:
     git_prov = git.DEFAULT_GIT
     github_prov = github.DEFAULT_GITHUB
 
-    try:
-        # Stash any local changes for the user to later resume working on.
-        with git.Stash(prov=git_prov):
-            # We need to be on the main branch to create a release, but we
-            # want to return to the original branch afterwards.
-            with git.Checkout(config.branch, prov=git_prov):
-                # Undo any partial changes if the script is aborted.
-                with git.ResetOnExit(prov=git_prov):
-                    releaser = Releaser(config, git_prov, github_prov)
-                    releaser.run_stages()
-    except stage.UserAbort as e:
-        print(e.message)
-        return
+    with contextlib.ExitStack() as stack:
+        events = None
+        if config.webhook_port is not None:
+            events = stack.enter_context(
+                webhook.Receiver(
+                    host=config.webhook_host,
+                    port=config.webhook_port,
+                    secret=os.getenv("GITHUB_WEBHOOK_SECRET") or None,
+                )
+            )
+        try:
+            # Stash any local changes for the user to later resume working on.
+            with git.Stash(prov=git_prov):
+                # We need to be on the main branch to create a release, but we
+                # want to return to the original branch afterwards.
+                with git.Checkout(config.branch, prov=git_prov):
+                    # Undo any partial changes if the script is aborted.
+                    with git.ResetOnExit(prov=git_prov):
+                        releaser = Releaser(config, git_prov, github_prov, events)
+                        releaser.run_stages()
+        except stage.UserAbort as e:
+            print(e.message)
+            return
 
 
 if __name__ == "__main__":
@@ -2,9 +2,10 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2026 The TokTok team
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from create_release import Config, Releaser
+from lib import github, webhook
 
 
 class TestDashboardRenderer(unittest.TestCase):
@@ -50,5 +51,69 @@ class TestDashboardRenderer(unittest.TestCase):
         self.assertIn("[x] Finalize release", rendered)
 
 
+class TestWait(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = Config(
+            branch="master",
+            main_branch="master",
+            dryrun=False,
+            force=True,
+            github_actions=True,
+            issue=1,
+            production=True,
+            rebase=True,
+            resume=False,
+            verify=False,
+            version="",
+            upstream="origin",
+        )
+
+    @patch("lib.stage.sleep")
+    def test_sleeps_without_receiver(self, sleep: MagicMock) -> None:
+        Releaser(self.config, MagicMock(), MagicMock()).wait(30, "check_run")
+        sleep.assert_called_once_with(30)
+
+    @patch("lib.stage.sleep")
+    def test_waits_for_events(self, sleep: MagicMock) -> None:
+        events = MagicMock()
+        releaser = Releaser(self.config, MagicMock(), MagicMock(), events)
+        releaser.wait(30, "check_run", head_sha="abc")
+        events.wait.assert_called_once_with(
+            30,
+            ("check_run",),
+            head_sha="abc",
+            pr=None,
+            min_interval=Releaser.min_poll_interval,
+        )
+        sleep.assert_not_called()
+
+    def test_event_burst_costs_one_poll(self) -> None:
+        polls = 0
+
+        def poll_checks(
+            sha: str, previous: dict[str, github.CheckRun]
+        ) -> tuple[dict[str, github.CheckRun], list[github.CheckRun]]:
+            nonlocal polls
+            polls += 1
+            if polls == 1:
+                # A burst of events arrives while we are polling, most of
+                # them for other commits.
+                for i in range(500):
+                    head_sha = sha if i % 10 == 0 else f"other{i}"
+                    payload = {"check_run": {"head_sha": head_sha}}
+                    events.deliver(webhook.Event("check_run", payload))
+            # The checks only pass once every event has been looked at.
+            status = "in_progress" if events._pending else "completed"
+            run = github.CheckRun(1, "test", status, "success", "url")
+            return {"test": run}, []
+
+        events = webhook.Receiver()
+        gh = MagicMock()
+        gh.poll_checks.side_effect = poll_checks
+        releaser = Releaser(self.config, MagicMock(), gh, events)
+        releaser.stage_await_checks("v1.0.0")
+        self.assertEqual(polls, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -29,14 +29,16 @@ def parse_args() -> Config:
     )
     parser.add_argument(
         "--tag",
-        help="Tag to create tarballs for",
-        default=git.current_tag(),
+        help="Tag to create tarballs for. Default: the current tag",
+        default="",
     )
     parser.add_argument(
         "--project-name",
         help="Project name for the tarball prefix",
     )
     args = parser.parse_args()
+    if not args.tag:
+        args.tag = git.current_tag()
     if not args.project_name:
         args.project_name = github.repository_name()
     return Config(**vars(args))
@@ -67,11 +69,18 @@ def upload_tarballs(tag: str, tmpdir: str) -> None:
         "gz": "application/gzip",
         "xz": "application/x-xz",
     }
-    for ext in ("gz", "xz"):
-        filename = f"{tag}.tar.{ext}"
-        print(f"Uploading {filename} to GitHub release {tag}")
-        with open(os.path.join(tmpdir, filename), "rb") as f:
-            github.upload_asset(tag, filename, content_type[ext], f)
+    print(f"Uploading tarballs to GitHub release {tag}")
+    github.upload_assets(
+        tag,
+        [
+            github.AssetUpload(
+                f"{tag}.tar.{ext}",
+                content_type[ext],
+                os.path.join(tmpdir, f"{tag}.tar.{ext}"),
+            )
+            for ext in ("gz", "xz")
+        ],
+    )
 
 
 def main(config: Config) -> None:
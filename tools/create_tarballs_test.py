@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2026 The TokTok team
+import contextlib
+import io
 import unittest
 from unittest.mock import MagicMock, patch
 
-from create_tarballs import Config, main
+from create_tarballs import Config, main, parse_args
+from lib import github
 
 
 class TestCreateTarballs(unittest.TestCase):
@@ -28,6 +31,33 @@ class TestCreateTarballs(unittest.TestCase):
         mock_create.assert_called_once_with("ci-tools", "v1.0.0", "/tmp/dir")  # nosec
         mock_upload.assert_called_once_with("v1.0.0", "/tmp/dir")  # nosec
 
+    @patch("sys.argv", ["create_tarballs.py", "--help"])
+    @patch("lib.github._default")
+    @patch("lib.git.DEFAULT_GIT")
+    def test_help_runs_no_git_or_api_calls(
+        self, mock_git: MagicMock, mock_default: MagicMock
+    ) -> None:
+        with patch.dict(vars(github)):
+            # Without a provider yet, any use of one goes through the factory.
+            vars(github).pop("DEFAULT_GITHUB", None)
+            with contextlib.redirect_stdout(io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    parse_args()
+        self.assertEqual(mock_git.method_calls, [])
+        mock_default.assert_not_called()
+
+    @patch("lib.github.DEFAULT_GITHUB")
+    @patch("lib.git.DEFAULT_GIT")
+    def test_defaults_are_computed_after_parsing(
+        self, mock_git: MagicMock, mock_github: MagicMock
+    ) -> None:
+        mock_git.current_tag.return_value = "v1.2.3"
+        mock_github.repository_name.return_value = "qTox"
+        with patch("sys.argv", ["create_tarballs.py"]):
+            config = parse_args()
+        self.assertEqual(config.tag, "v1.2.3")
+        self.assertEqual(config.project_name, "qTox")
+
     @patch("subprocess.run")
     @patch("create_tarballs.os.path.join")
     def test_create_tarballs_logic(
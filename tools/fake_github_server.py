@@ -0,0 +1,1162 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+"""A local stand-in for the GitHub API, for benchmarks and chaos tests.
+
+It implements the subset of the REST and GraphQL APIs that `lib.github` uses
+(releases, assets, issues, milestones, pulls, check runs and suites, action
+runs, git data and uploads) on a generated repository of configurable size,
+with simulated latency, rate limits and failures. Point the tools at it with
+`GITHUB_API_URL`:
+
+    tools/fake_github_server.py --port 8080 --releases 500 --pulls 2000 &
+    GITHUB_API_URL=http://localhost:8080 GITHUB_TOKEN=x tools/create_release.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+sleep = time.sleep
+
+# Login of the authenticated user, whatever the token.
+USER = "releaser"
+
+# Authors of the generated pull requests.
+CONTRIBUTORS = ("alice", "bob", "carol", USER)
+
+_REPO = r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)"
+
+
+def _sha(*parts: object) -> str:
+    """A deterministic fake object ID."""
+    return hashlib.sha1(
+        "\0".join(map(str, parts)).encode("utf-8"), usedforsecurity=False
+    ).hexdigest()
+
+
+def _blob_sha(data: bytes) -> str:
+    return hashlib.sha1(
+        b"blob %d\0" % len(data) + data, usedforsecurity=False
+    ).hexdigest()
+
+
+def _etag(body: Any) -> str:
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    return f'W/"{hashlib.sha1(data, usedforsecurity=False).hexdigest()}"'
+
+
+def _version(i: int) -> str:
+    """The i-th version of the generated release history."""
+    return f"v0.{i // 10}.{i % 10}"
+
+
+def _timestamp(t: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t))
+
+
+@dataclass
+class Scale:
+    """The size of the generated repository."""
+
+    releases: int = 500
+    assets_per_release: int = 4
+    pulls: int = 2000
+    issues: int = 200
+    milestones: int = 3
+    check_runs: int = 60
+    action_runs: int = 5
+    # Check runs and workflow runs complete this many seconds after they are
+    # first requested.
+    ci_seconds: float = 0.0
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes
+    # Scheme and authority of this server, for the URLs in responses.
+    base_url: str
+    params: dict[str, str] = field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else {}
+
+
+@dataclass
+class Reply:
+    status: int = 200
+    # JSON-encoded unless it is bytes.
+    body: Any = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def _error(status: int, message: str) -> Reply:
+    return Reply(status, {"message": message})
+
+
+def _paginate(req: Request, items: list[Any], key: str | None = None) -> Reply:
+    """Reply with one page of a list, with GitHub's Link header."""
+    per_page = min(int(req.query.get("per_page", 30)), 100)
+    page = max(int(req.query.get("page", 1)), 1)
+    last = max(math.ceil(len(items) / per_page), 1)
+    chunk = items[(page - 1) * per_page : page * per_page]
+
+    def link(n: int, rel: str) -> str:
+        query = urllib.parse.urlencode({**req.query, "page": n})
+        return f'<{req.base_url}{req.path}?{query}>; rel="{rel}"'
+
+    links = []
+    if page < last:
+        links += [link(page + 1, "next"), link(last, "last")]
+    if page > 1:
+        links += [link(1, "first"), link(page - 1, "prev")]
+    body = chunk if key is None else {"total_count": len(items), key: chunk}
+    return Reply(200, body, {"Link": ", ".join(links)} if links else {})
+
+
+class FakeGitHub:
+    """The in-memory state of the repository and the API endpoints on it.
+
+    Any owner/name in request paths refers to the same repository.
+    """
+
+    def __init__(self, scale: Scale | None = None) -> None:
+        self.scale = scale or Scale()
+        self.lock = threading.RLock()
+        self._next_id = 1000
+        self.releases: dict[int, dict[str, Any]] = {}
+        self.assets: dict[int, dict[str, Any]] = {}
+        self.asset_data: dict[int, bytes] = {}
+        # Issues and pull requests share the number space, as on GitHub.
+        self.issues: dict[int, dict[str, Any]] = {}
+        self.milestones: dict[int, dict[str, Any]] = {}
+        self.artifacts: dict[int, tuple[str, bytes]] = {}
+        self.run_ids: dict[tuple[str, str], list[int]] = {}
+        self.first_seen: dict[str, float] = {}
+        self.blobs: dict[str, bytes] = {}
+        self.trees: dict[str, list[dict[str, Any]]] = {}
+        self.commits: dict[str, dict[str, Any]] = {}
+        self.refs: dict[str, str] = {"refs/heads/master": _sha("commit", "master")}
+        self._generate()
+
+    def new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _generate(self) -> None:
+        s = self.scale
+        epoch = time.time() - 86400 * (s.releases + 1)
+        for i in range(s.releases):
+            rid = self.new_id()
+            self.releases[rid] = {
+                "id": rid,
+                "tag_name": _version(i),
+                "name": _version(i),
+                "body": f"Release notes for {_version(i)}",
+                "draft": False,
+                "prerelease": False,
+                "created_at": _timestamp(epoch + 86400 * i),
+                "published_at": _timestamp(epoch + 86400 * i),
+                "assets": [],
+            }
+            for k in range(s.assets_per_release):
+                name = f"{_version(i)}-{k}.tar.gz"
+                self._add_asset(rid, name, "application/gzip", name.encode("utf-8"))
+        for k in range(s.milestones):
+            number = k + 1
+            self.milestones[number] = {
+                "number": number,
+                "title": _version(s.releases + k),
+                "state": "open",
+            }
+        for n in range(1, s.pulls + 1):
+            author = CONTRIBUTORS[n % len(CONTRIBUTORS)]
+            recent = n > s.pulls * 0.95
+            self.issues[n] = {
+                "number": n,
+                "title": f"chore: Change number {n}",
+                "body": f"This is pull request {n}.",
+                "state": "open" if recent else "closed",
+                "milestone": None,
+                "assignees": [],
+                "user": author,
+                "pull": {
+                    "head_ref": f"change-{n}",
+                    "head_owner": author,
+                    "head_sha": _sha("pull", n),
+                    "base": "master",
+                    "draft": False,
+                    "merged": not recent,
+                },
+            }
+        for n in range(s.pulls + 1, s.pulls + s.issues + 1):
+            milestone = 1 + n % s.milestones if s.milestones and n % 3 == 0 else None
+            self.issues[n] = {
+                "number": n,
+                "title": f"Issue number {n}",
+                "body": f"This is issue {n}.",
+                "state": "open" if n % 2 else "closed",
+                "milestone": milestone,
+                "assignees": [],
+                "user": CONTRIBUTORS[n % len(CONTRIBUTORS)],
+                "pull": None,
+            }
+
+    def _add_asset(self, rid: int, name: str, content_type: str, data: bytes) -> int:
+        aid = self.new_id()
+        self.assets[aid] = {
+            "id": aid,
+            "release": rid,
+            "name": name,
+            "content_type": content_type,
+            "size": len(data),
+            "digest": f"sha256:{hashlib.sha256(data).hexdigest()}",
+        }
+        self.asset_data[aid] = data
+        self.releases[rid]["assets"].append(aid)
+        return aid
+
+    def _done(self, key: str) -> bool:
+        """Whether the simulated CI job with this key has finished."""
+        started = self.first_seen.setdefault(key, time.monotonic())
+        return time.monotonic() - started >= self.scale.ci_seconds
+
+    # JSON rendering.
+
+    def asset_json(self, req: Request, aid: int) -> dict[str, Any]:
+        a = self.assets[aid]
+        tag = self.releases[a["release"]]["tag_name"]
+        return {
+            "id": aid,
+            "node_id": f"RA_{aid}",
+            "name": a["name"],
+            "label": "",
+            "state": "uploaded",
+            "content_type": a["content_type"],
+            "size": a["size"],
+            "digest": a["digest"],
+            "url": f"{req.base_url}{_repo(req)}/releases/assets/{aid}",
+            "browser_download_url": f"{req.base_url}/download/{tag}/{a['name']}",
+        }
+
+    def release_json(self, req: Request, rid: int) -> dict[str, Any]:
+        r = self.releases[rid]
+        return {
+            **{k: v for k, v in r.items() if k != "assets"},
+            "node_id": f"RE_{rid}",
+            "url": f"{req.base_url}{_repo(req)}/releases/{rid}",
+            "html_url": f"{req.base_url}/releases/tag/{r['tag_name']}",
+            "upload_url": (
+                f"{req.base_url}/uploads{_repo(req)}/releases/{rid}/assets"
+                "{?name,label}"
+            ),
+            "assets": [self.asset_json(req, aid) for aid in r["assets"]],
+        }
+
+    def milestone_json(self, number: int | None) -> dict[str, Any] | None:
+        if number is None:
+            return None
+        m = self.milestones[number]
+        issues = [i for i in self.issues.values() if i["milestone"] == number]
+        return {
+            **m,
+            "open_issues": sum(i["state"] == "open" for i in issues),
+            "closed_issues": sum(i["state"] == "closed" for i in issues),
+        }
+
+    def issue_json(self, req: Request, number: int) -> dict[str, Any]:
+        i = self.issues[number]
+        out = {
+            "number": number,
+            "node_id": f"I_{number}",
+            "title": i["title"],
+            "body": i["body"],
+            "state": i["state"],
+            "html_url": f"{req.base_url}/issues/{number}",
+            "user": {"login": i["user"]},
+            "assignees": [{"login": a} for a in i["assignees"]],
+            "milestone": self.milestone_json(i["milestone"]),
+        }
+        if i["pull"]:
+            out["pull_request"] = {"url": f"{req.base_url}{_repo(req)}/pulls/{number}"}
+        return out
+
+    def pull_json(self, req: Request, number: int) -> dict[str, Any]:
+        i = self.issues[number]
+        p = i["pull"]
+        return {
+            **self.issue_json(req, number),
+            "node_id": f"PR_{number}",
+            "html_url": f"{req.base_url}/pull/{number}",
+            "draft": p["draft"],
+            "merged_at": _timestamp(0) if p["merged"] else None,
+            "head": {
+                "label": f"{p['head_owner']}:{p['head_ref']}",
+                "ref": p["head_ref"],
+                "sha": p["head_sha"],
+                "user": {"login": p["head_owner"]},
+            },
+            "base": {"ref": p["base"]},
+        }
+
+    def check_runs_for(self, req: Request, sha: str) -> list[dict[str, Any]]:
+        done = self._done(f"checks/{sha}")
+        return [
+            {
+                "id": int(_sha("check", sha, k)[:8], 16),
+                "name": f"ci / check-{k:02d}",
+                "head_sha": sha,
+                "status": "completed" if done else "in_progress",
+                "conclusion": "success" if done else None,
+                "html_url": f"{req.base_url}/runs/{_sha('check', sha, k)[:8]}",
+                "check_suite": {"id": int(_sha("suite", sha)[:8], 16)},
+            }
+            for k in range(self.scale.check_runs)
+        ]
+
+    # Endpoints.
+
+    def user(self, req: Request) -> Reply:
+        return Reply(200, {"login": USER, "id": 1, "type": "User"})
+
+    def list_releases(self, req: Request) -> Reply:
+        # Newest first, like GitHub.
+        rids = sorted(self.releases, reverse=True)
+        return _paginate(req, [self.release_json(req, rid) for rid in rids])
+
+    def latest_release(self, req: Request) -> Reply:
+        for rid in sorted(self.releases, reverse=True):
+            r = self.releases[rid]
+            if not r["draft"] and not r["prerelease"]:
+                return Reply(200, self.release_json(req, rid))
+        return _error(404, "Not Found")
+
+    def get_release(self, req: Request) -> Reply:
+        rid = int(req.params["id"])
+        if rid not in self.releases:
+            return _error(404, "Not Found")
+        return Reply(200, self.release_json(req, rid))
+
+    def create_release(self, req: Request) -> Reply:
+        data = req.json()
+        tag = data["tag_name"]
+        if any(r["tag_name"] == tag for r in self.releases.values()):
+            return _error(422, "Validation Failed: tag_name already_exists")
+        rid = self.new_id()
+        draft = bool(data.get("draft", False))
+        self.releases[rid] = {
+            "id": rid,
+            "tag_name": tag,
+            "name": data.get("name", tag),
+            "body": data.get("body", ""),
+            "draft": draft,
+            "prerelease": bool(data.get("prerelease", False)),
+            "created_at": _timestamp(time.time()),
+            "published_at": None if draft else _timestamp(time.time()),
+            "assets": [],
+        }
+        return Reply(201, self.release_json(req, rid))
+
+    def update_release(self, req: Request) -> Reply:
+        rid = int(req.params["id"])
+        if rid not in self.releases:
+            return _error(404, "Not Found")
+        r = self.releases[rid]
+        for k, v in req.json().items():
+            if k in ("tag_name", "name", "body", "draft", "prerelease"):
+                r[k] = v
+        if not r["draft"] and r["published_at"] is None:
+            r["published_at"] = _timestamp(time.time())
+        return Reply(200, self.release_json(req, rid))
+
+    def get_asset(self, req: Request) -> Reply:
+        aid = int(req.params["id"])
+        if aid not in self.assets:
+            return _error(404, "Not Found")
+        if req.headers.get("accept") != "application/octet-stream":
+            return Reply(200, self.asset_json(req, aid))
+        data = self.asset_data[aid]
+        m = re.match(r"bytes=(\d+)-$", req.headers.get("range", ""))
+        if m:
+            start = int(m.group(1))
+            return Reply(
+                206,
+                data[start:],
+                {"Content-Range": f"bytes {start}-{len(data) - 1}/{len(data)}"},
+            )
+        return Reply(200, data)
+
+    def update_asset(self, req: Request) -> Reply:
+        aid = int(req.params["id"])
+        if aid not in self.assets:
+            return _error(404, "Not Found")
+        asset = self.assets[aid]
+        name = req.json().get("name", asset["name"])
+        if any(
+            self.assets[a]["name"] == name
+            for a in self.releases[asset["release"]]["assets"]
+            if a != aid
+        ):
+            return _error(422, "Validation Failed: name already_exists")
+        asset["name"] = name
+        return Reply(200, self.asset_json(req, aid))
+
+    def delete_asset(self, req: Request) -> Reply:
+        aid = int(req.params["id"])
+        if aid not in self.assets:
+            return _error(404, "Not Found")
+        asset = self.assets.pop(aid)
+        del self.asset_data[aid]
+        self.releases[asset["release"]]["assets"].remove(aid)
+        return Reply(204)
+
+    def upload_asset(self, req: Request) -> Reply:
+        rid = int(req.params["id"])
+        if rid not in self.releases:
+            return _error(404, "Not Found")
+        name = req.query.get("name", "")
+        if not name:
+            return _error(422, "Validation Failed: name is missing")
+        if any(self.assets[a]["name"] == name for a in self.releases[rid]["assets"]):
+            return _error(422, "Validation Failed: name already_exists")
+        content_type = req.headers.get("content-type", "application/octet-stream")
+        aid = self._add_asset(rid, name, content_type, req.body)
+        return Reply(201, self.asset_json(req, aid))
+
+    def list_milestones(self, req: Request) -> Reply:
+        state = req.query.get("state", "open")
+        return _paginate(
+            req,
+            [
+                self.milestone_json(n)
+                for n, m in sorted(self.milestones.items())
+                if state == "all" or m["state"] == state
+            ],
+        )
+
+    def update_milestone(self, req: Request) -> Reply:
+        number = int(req.params["number"])
+        if number not in self.milestones:
+            return _error(404, "Not Found")
+        for k, v in req.json().items():
+            if k in ("title", "state"):
+                self.milestones[number][k] = v
+        return Reply(200, self.milestone_json(number))
+
+    def list_issues(self, req: Request) -> Reply:
+        state = req.query.get("state", "open")
+        milestone = req.query.get("milestone")
+        out = []
+        for n in sorted(self.issues, reverse=True):
+            i = self.issues[n]
+            if state != "all" and i["state"] != state:
+                continue
+            if milestone == "none" and i["milestone"] is not None:
+                continue
+            if milestone == "*" and i["milestone"] is None:
+                continue
+            if milestone not in (None, "none", "*") and i["milestone"] != int(
+                milestone
+            ):
+                continue
+            out.append(self.issue_json(req, n))
+        return _paginate(req, out)
+
+    def get_issue(self, req: Request) -> Reply:
+        number = int(req.params["number"])
+        if number not in self.issues:
+            return _error(404, "Not Found")
+        return Reply(200, self.issue_json(req, number))
+
+    def update_issue(self, req: Request) -> Reply:
+        number = int(req.params["number"])
+        if number not in self.issues:
+            return _error(404, "Not Found")
+        i = self.issues[number]
+        for k, v in req.json().items():
+            if k == "milestone":
+                if v is not None and int(v) not in self.milestones:
+                    return _error(422, "Validation Failed: milestone invalid")
+                i["milestone"] = None if v is None else int(v)
+            elif k in ("title", "body", "state"):
+                i[k] = v
+        return Reply(200, self.issue_json(req, number))
+
+    def add_assignees(self, req: Request) -> Reply:
+        number = int(req.params["number"])
+        if number not in self.issues:
+            return _error(404, "Not Found")
+        i = self.issues[number]
+        for a in req.json().get("assignees", []):
+            if a not in i["assignees"]:
+                i["assignees"].append(a)
+        return Reply(201, self.issue_json(req, number))
+
+    def remove_assignees(self, req: Request) -> Reply:
+        number = int(req.params["number"])
+        if number not in self.issues:
+            return _error(404, "Not Found")
+        i = self.issues[number]
+        removed = set(req.json().get("assignees", []))
+        i["assignees"] = [a for a in i["assignees"] if a not in removed]
+        return Reply(200, self.issue_json(req, number))
+
+    def list_pulls(self, req: Request) -> Reply:
+        state = req.query.get("state", "open")
+        base = req.query.get("base")
+        head = req.query.get("head")
+        out = []
+        for n in sorted(self.issues, reverse=True):
+            i = self.issues[n]
+            p = i["pull"]
+            if not p or (state != "all" and i["state"] != state):
+                continue
+            if base is not None and p["base"] != base:
+                continue
+            if head is not None and head != f"{p['head_owner']}:{p['head_ref']}":
+                continue
+            out.append(self.pull_json(req, n))
+        return _paginate(req, out)
+
+    def get_pull(self, req: Request) -> Reply:
+        number = int(req.params["number"])
+        if number not in self.issues or not self.issues[number]["pull"]:
+            return _error(404, "Not Found")
+        return Reply(200, self.pull_json(req, number))
+
+    def create_pull(self, req: Request) -> Reply:
+        data = req.json()
+        head = data["head"]
+        owner, ref = head.split(":", 1) if ":" in head else (USER, head)
+        number = max(self.issues, default=0) + 1
+        self.issues[number] = {
+            "number": number,
+            "title": data["title"],
+            "body": data.get("body", ""),
+            "state": "open",
+            "milestone": None,
+            "assignees": [],
+            "user": USER,
+            "pull": {
+                "head_ref": ref,
+                "head_owner": owner,
+                "head_sha": self.refs.get(f"refs/heads/{ref}", _sha("branch", ref)),
+                "base": data["base"],
+                "draft": bool(data.get("draft", False)),
+                "merged": False,
+            },
+        }
+        return Reply(201, self.pull_json(req, number))
+
+    def update_pull(self, req: Request) -> Reply:
+        number = int(req.params["number"])
+        if number not in self.issues or not self.issues[number]["pull"]:
+            return _error(404, "Not Found")
+        i = self.issues[number]
+        for k, v in req.json().items():
+            if k in ("title", "body", "state"):
+                i[k] = v
+            elif k == "base":
+                i["pull"]["base"] = v
+        return Reply(200, self.pull_json(req, number))
+
+    def list_check_runs(self, req: Request) -> Reply:
+        runs = self.check_runs_for(req, req.params["sha"])
+        return _paginate(req, runs, key="check_runs")
+
+    def list_check_suites(self, req: Request) -> Reply:
+        sha = req.params["sha"]
+        runs = self.check_runs_for(req, sha)
+        done = all(r["status"] == "completed" for r in runs)
+        suites = [
+            {
+                "id": int(_sha("suite", sha)[:8], 16),
+                "head_sha": sha,
+                "app": {"slug": "github-actions"},
+                "status": "completed" if done else "in_progress",
+                "conclusion": "success" if done else None,
+            }
+        ]
+        return _paginate(req, suites, key="check_suites")
+
+    def list_suite_check_runs(self, req: Request) -> Reply:
+        # Suite IDs are derived from the commit, so search the commits whose
+        # check runs have been requested before.
+        suite = int(req.params["id"])
+        for key in list(self.first_seen):
+            sha = key.removeprefix("checks/")
+            if key.startswith("checks/") and int(_sha("suite", sha)[:8], 16) == suite:
+                return _paginate(req, self.check_runs_for(req, sha), key="check_runs")
+        return _error(404, "Not Found")
+
+    def list_action_runs(self, req: Request) -> Reply:
+        branch = req.query.get("branch", "")
+        head_sha = req.query.get("head_sha", "")
+        done = self._done(f"runs/{branch}/{head_sha}")
+        if (branch, head_sha) not in self.run_ids:
+            ids = [self.new_id() for _ in range(self.scale.action_runs)]
+            self.run_ids[(branch, head_sha)] = ids
+            for rid in ids:
+                self.artifacts[self.new_id()] = (
+                    f"binaries-{rid}",
+                    f"artifact of run {rid}".encode("utf-8"),
+                )
+        runs = [
+            {
+                "id": rid,
+                "node_id": f"WFR_{rid}",
+                "name": f"build-{k}",
+                "head_branch": branch,
+                "head_sha": head_sha,
+                "event": "push",
+                "status": "completed" if done else "in_progress",
+                "conclusion": "success" if done else None,
+                "html_url": f"{req.base_url}/actions/runs/{rid}",
+                "path": f".github/workflows/build-{k}.yml",
+            }
+            for k, rid in enumerate(self.run_ids[(branch, head_sha)])
+        ]
+        return _paginate(req, runs, key="workflow_runs")
+
+    def list_artifacts(self, req: Request) -> Reply:
+        run = req.params["id"]
+        artifacts = [
+            {"id": aid, "name": name, "size_in_bytes": len(data)}
+            for aid, (name, data) in sorted(self.artifacts.items())
+            if name == f"binaries-{run}"
+        ]
+        return _paginate(req, artifacts, key="artifacts")
+
+    def download_artifact(self, req: Request) -> Reply:
+        aid = int(req.params["id"])
+        if aid not in self.artifacts:
+            return _error(404, "Not Found")
+        return Reply(200, self.artifacts[aid][1])
+
+    def get_branch(self, req: Request) -> Reply:
+        branch = urllib.parse.unquote(req.params["branch"])
+        sha = self.refs.get(f"refs/heads/{branch}")
+        if sha is None:
+            return _error(404, "Branch not found")
+        return Reply(200, {"name": branch, "commit": {"sha": sha}})
+
+    def create_blob(self, req: Request) -> Reply:
+        data = req.json()
+        content = data["content"]
+        raw = (
+            base64.b64decode(content)
+            if data.get("encoding") == "base64"
+            else content.encode("utf-8")
+        )
+        sha = _blob_sha(raw)
+        self.blobs[sha] = raw
+        return Reply(201, {"sha": sha, "url": f"{req.base_url}/blobs/{sha}"})
+
+    def get_tree(self, req: Request) -> Reply:
+        sha = req.params["sha"]
+        commit = self.commits.get(sha)
+        tree_sha = commit["tree"] if commit else sha
+        return Reply(
+            200,
+            {
+                "sha": tree_sha,
+                "tree": self.trees.get(tree_sha, []),
+                "truncated": False,
+            },
+        )
+
+    def create_tree(self, req: Request) -> Reply:
+        data = req.json()
+        base = data.get("base_tree")
+        if base in self.commits:
+            base = self.commits[base]["tree"]
+        entries = {e["path"]: e for e in self.trees.get(base or "", [])}
+        for e in data.get("tree", []):
+            if e.get("sha") is None:
+                entries.pop(e["path"], None)
+            elif e["type"] == "blob" and e["sha"] not in self.blobs:
+                return _error(422, f"Blob {e['sha']} not found")
+            else:
+                entries[e["path"]] = {k: e[k] for k in ("path", "mode", "type", "sha")}
+        tree = sorted(entries.values(), key=lambda e: str(e["path"]))
+        sha = _sha("tree", json.dumps(tree, sort_keys=True))
+        self.trees[sha] = tree
+        return Reply(201, {"sha": sha, "tree": tree, "truncated": False})
+
+    def create_commit(self, req: Request) -> Reply:
+        data = req.json()
+        sha = _sha("commit", data["tree"], *data.get("parents", []), data["message"])
+        self.commits[sha] = {
+            "tree": data["tree"],
+            "parents": data.get("parents", []),
+            "message": data["message"],
+        }
+        return Reply(201, {"sha": sha, "tree": {"sha": data["tree"]}})
+
+    def create_ref(self, req: Request) -> Reply:
+        data = req.json()
+        if data["ref"] in self.refs:
+            return _error(422, "Reference already exists")
+        self.refs[data["ref"]] = data["sha"]
+        return Reply(201, {"ref": data["ref"], "object": {"sha": data["sha"]}})
+
+    def update_ref(self, req: Request) -> Reply:
+        ref = f"refs/heads/{urllib.parse.unquote_plus(req.params['branch'])}"
+        if ref not in self.refs:
+            return _error(422, "Reference does not exist")
+        self.refs[ref] = req.json()["sha"]
+        return Reply(200, {"ref": ref, "object": {"sha": self.refs[ref]}})
+
+    def create_tag(self, req: Request) -> Reply:
+        data = req.json()
+        sha = _sha("tag", data["tag"], data["object"], data["message"])
+        return Reply(201, {"sha": sha, "tag": data["tag"]})
+
+    def graphql(self, req: Request) -> Reply:
+        data = req.json()
+        query = str(data.get("query", ""))
+        variables = data.get("variables") or {}
+        if "query ReleaseSnapshot" in query:
+            return Reply(200, {"data": {"repository": self._snapshot(variables)}})
+        m = re.search(
+            r'markPullRequestReadyForReview\(input: {pullRequestId: "PR_(\d+)"', query
+        )
+        if m:
+            number = int(m.group(1))
+            if number in self.issues and self.issues[number]["pull"]:
+                self.issues[number]["pull"]["draft"] = False
+                return Reply(
+                    200,
+                    {
+                        "data": {
+                            "markPullRequestReadyForReview": {
+                                "pullRequest": {"id": f"PR_{number}"}
+                            }
+                        }
+                    },
+                )
+        return Reply(200, {"data": None, "errors": [{"message": "Unsupported query"}]})
+
+    def _snapshot(self, v: dict[str, Any]) -> dict[str, Any]:
+        pulls = [
+            {
+                "number": i["number"],
+                "headRepositoryOwner": {"login": i["pull"]["head_owner"]},
+            }
+            for i in self.issues.values()
+            if i["pull"]
+            and i["pull"]["head_ref"] == v["head"]
+            and i["pull"]["base"] == v["base"]
+        ]
+        repo: dict[str, Any] = {"pullRequests": {"nodes": pulls[:100]}}
+        # Newest first, drafts included, like GitHub.
+        rids = sorted(self.releases, reverse=True)
+        repo["releases"] = {
+            "nodes": [
+                {
+                    "tagName": release["tag_name"],
+                    "publishedAt": release["published_at"],
+                    "releaseAssets": {
+                        "nodes": [
+                            {"name": self.assets[a]["name"]}
+                            for a in release["assets"][:100]
+                        ],
+                        "pageInfo": {"hasNextPage": len(release["assets"]) > 100},
+                    },
+                }
+                for release in (
+                    self.releases[rid] for rid in rids[: int(v["releases"])]
+                )
+            ],
+            "pageInfo": {"hasNextPage": len(rids) > int(v["releases"])},
+        }
+        if v.get("withIssue"):
+            issue = self.issues.get(int(v["issue"]))
+            repo["issue"] = issue and {"body": issue["body"]}
+        return repo
+
+
+def _repo(req: Request) -> str:
+    return f"/repos/{req.params['owner']}/{req.params['repo']}"
+
+
+ROUTES: list[tuple[str, re.Pattern[str], Callable[[FakeGitHub, Request], Reply]]] = [
+    (method, re.compile(f"^{pattern}$"), handler)
+    for method, pattern, handler in [
+        ("GET", "/user", FakeGitHub.user),
+        ("POST", "/graphql", FakeGitHub.graphql),
+        ("GET", f"{_REPO}/releases", FakeGitHub.list_releases),
+        ("POST", f"{_REPO}/releases", FakeGitHub.create_release),
+        ("GET", f"{_REPO}/releases/latest", FakeGitHub.latest_release),
+        ("GET", f"{_REPO}/releases/assets/(?P<id>\\d+)", FakeGitHub.get_asset),
+        ("PATCH", f"{_REPO}/releases/assets/(?P<id>\\d+)", FakeGitHub.update_asset),
+        ("DELETE", f"{_REPO}/releases/assets/(?P<id>\\d+)", FakeGitHub.delete_asset),
+        ("GET", f"{_REPO}/releases/(?P<id>\\d+)", FakeGitHub.get_release),
+        ("PATCH", f"{_REPO}/releases/(?P<id>\\d+)", FakeGitHub.update_release),
+        (
+            "POST",
+            f"/uploads{_REPO}/releases/(?P<id>\\d+)/assets",
+            FakeGitHub.upload_asset,
+        ),
+        ("GET", f"{_REPO}/milestones", FakeGitHub.list_milestones),
+        (
+            "PATCH",
+            f"{_REPO}/milestones/(?P<number>\\d+)",
+            FakeGitHub.update_milestone,
+        ),
+        ("GET", f"{_REPO}/issues", FakeGitHub.list_issues),
+        ("GET", f"{_REPO}/issues/(?P<number>\\d+)", FakeGitHub.get_issue),
+        ("PATCH", f"{_REPO}/issues/(?P<number>\\d+)", FakeGitHub.update_issue),
+        (
+            "POST",
+            f"{_REPO}/issues/(?P<number>\\d+)/assignees",
+            FakeGitHub.add_assignees,
+        ),
+        (
+            "DELETE",
+            f"{_REPO}/issues/(?P<number>\\d+)/assignees",
+            FakeGitHub.remove_assignees,
+        ),
+        ("GET", f"{_REPO}/pulls", FakeGitHub.list_pulls),
+        ("POST", f"{_REPO}/pulls", FakeGitHub.create_pull),
+        ("GET", f"{_REPO}/pulls/(?P<number>\\d+)", FakeGitHub.get_pull),
+        ("PATCH", f"{_REPO}/pulls/(?P<number>\\d+)", FakeGitHub.update_pull),
+        (
+            "GET",
+            f"{_REPO}/commits/(?P<sha>[^/]+)/check-runs",
+            FakeGitHub.list_check_runs,
+        ),
+        (
+            "GET",
+            f"{_REPO}/commits/(?P<sha>[^/]+)/check-suites",
+            FakeGitHub.list_check_suites,
+        ),
+        (
+            "GET",
+            f"{_REPO}/check-suites/(?P<id>\\d+)/check-runs",
+            FakeGitHub.list_suite_check_runs,
+        ),
+        ("GET", f"{_REPO}/actions/runs", FakeGitHub.list_action_runs),
+        (
+            "GET",
+            f"{_REPO}/actions/runs/(?P<id>\\d+)/artifacts",
+            FakeGitHub.list_artifacts,
+        ),
+        (
+            "GET",
+            f"{_REPO}/actions/artifacts/(?P<id>\\d+)/zip",
+            FakeGitHub.download_artifact,
+        ),
+        ("GET", f"{_REPO}/branches/(?P<branch>.+)", FakeGitHub.get_branch),
+        ("POST", f"{_REPO}/git/blobs", FakeGitHub.create_blob),
+        ("GET", f"{_REPO}/git/trees/(?P<sha>[^/]+)", FakeGitHub.get_tree),
+        ("POST", f"{_REPO}/git/trees", FakeGitHub.create_tree),
+        ("POST", f"{_REPO}/git/commits", FakeGitHub.create_commit),
+        ("POST", f"{_REPO}/git/refs", FakeGitHub.create_ref),
+        ("PATCH", f"{_REPO}/git/refs/heads/(?P<branch>.+)", FakeGitHub.update_ref),
+        ("POST", f"{_REPO}/git/tags", FakeGitHub.create_tag),
+    ]
+]
+
+
+@dataclass
+class Budget:
+    remaining: int
+    reset: float
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.fake.handle(self, body)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "Server"
+
+
+class Server:
+    """An HTTP server for a `FakeGitHub` repository.
+
+    Every request is delayed by `latency` seconds (plus up to `jitter`
+    seconds). Each token (and the anonymous user) gets `rate_limit` requests
+    per `rate_limit_window` seconds; conditional requests answered with 304
+    Not Modified are free, as on GitHub. For chaos tests, `error_rate` of the
+    requests fail with 502 Bad Gateway and `abuse_rate` of them hit the
+    secondary rate limit (429 with Retry-After).
+    """
+
+    def __init__(
+        self,
+        repo: FakeGitHub | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: int = 5000,
+        rate_limit_window: float = 3600.0,
+        error_rate: float = 0.0,
+        abuse_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.repo = repo or FakeGitHub()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.error_rate = error_rate
+        self.abuse_rate = abuse_rate
+        self.requests = 0
+        self._random = random.Random(seed)  # nosec
+        self._budgets: dict[str, Budget] = {}
+        self._server: _Server | None = None
+
+    def __enter__(self) -> "Server":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.1,), daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host or 'localhost'}:{self.port}"
+
+    def _budget(self, token: str) -> Budget:
+        now = time.time()
+        b = self._budgets.get(token)
+        if b is None or now >= b.reset:
+            b = Budget(self.rate_limit, now + self.rate_limit_window)
+            self._budgets[token] = b
+        return b
+
+    def dispatch(self, req: Request) -> Reply:
+        """Answer a request, with rate limiting and simulated failures."""
+        with self.repo.lock:
+            self.requests += 1
+            budget = self._budget(req.headers.get("authorization", ""))
+            chaos = self._random.random()
+            if budget.remaining <= 0:
+                reply = _error(403, "API rate limit exceeded")
+            elif chaos < self.error_rate:
+                reply = _error(502, "Server Error")
+            elif chaos < self.error_rate + self.abuse_rate:
+                reply = _error(429, "You have exceeded a secondary rate limit.")
+                reply.headers["Retry-After"] = "1"
+            else:
+                reply = self._route(req)
+                if reply.status != 304:
+                    budget.remaining -= 1
+            reply.headers.update(
+                {
+                    "X-RateLimit-Limit": str(self.rate_limit),
+                    "X-RateLimit-Remaining": str(budget.remaining),
+                    "X-RateLimit-Reset": str(int(math.ceil(budget.reset))),
+                    "X-RateLimit-Used": str(self.rate_limit - budget.remaining),
+                }
+            )
+            return reply
+
+    def _route(self, req: Request) -> Reply:
+        found = False
+        for method, pattern, handler in ROUTES:
+            m = pattern.match(req.path)
+            if m is None:
+                continue
+            found = True
+            if method == req.method:
+                req.params = m.groupdict()
+                reply = handler(self.repo, req)
+                break
+        else:
+            return _error(405 if found else 404, "Not Found")
+        if req.method == "GET" and reply.status == 200:
+            reply.headers["ETag"] = _etag(reply.body)
+            if req.headers.get("if-none-match") == reply.headers["ETag"]:
+                return Reply(304, None, reply.headers)
+        return reply
+
+    def handle(self, handler: _Handler, body: bytes) -> None:
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            sleep(delay)
+        url = urllib.parse.urlsplit(handler.path)
+        req = Request(
+            method=handler.command,
+            path=url.path,
+            query=dict(urllib.parse.parse_qsl(url.query)),
+            headers={k.lower(): v for k, v in handler.headers.items()},
+            body=body,
+            base_url=f"http://{handler.headers.get('Host', f'localhost:{self.port}')}",
+        )
+        try:
+            reply = self.dispatch(req)
+        except (KeyError, ValueError) as e:
+            reply = _error(422, f"Validation Failed: {e!r}")
+        if isinstance(reply.body, bytes):
+            data = reply.body
+            content_type = "application/octet-stream"
+        elif reply.body is None:
+            data = b""
+            content_type = "application/json"
+        else:
+            data = json.dumps(reply.body).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        handler.send_response(reply.status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        for k, v in reply.headers.items():
+            handler.send_header(k, v)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+@dataclass
+class Config:
+    host: str
+    port: int
+    scale: Scale
+    latency: float
+    jitter: float
+    rate_limit: int
+    rate_limit_window: float
+    error_rate: float
+    abuse_rate: float
+    seed: int | None
+
+
+def parse_args() -> Config:
+    parser = argparse.ArgumentParser(description="""
+    Serve a generated repository through a local stand-in for the GitHub API.
+    Set GITHUB_API_URL to the printed URL to run the tools against it.
+    """)
+    parser.add_argument("--host", default="127.0.0.1", help="Default: 127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Default: pick a free port")
+    scale = Scale()
+    for name, value in vars(scale).items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=type(value),
+            default=value,
+            help=f"Data scale. Default: {value}",
+        )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds to delay each response. Default: 0",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Up to this many more seconds of random delay. Default: 0",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=5000,
+        help="Requests per token per window. Default: 5000",
+    )
+    parser.add_argument(
+        "--rate-limit-window",
+        type=float,
+        default=3600.0,
+        help="Rate limit window in seconds. Default: 3600",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests that fail with 502. Default: 0",
+    )
+    parser.add_argument(
+        "--abuse-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests that hit the secondary rate limit. Default: 0",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed for the simulated failures. Default: none",
+    )
+    args = parser.parse_args()
+    return Config(
+        host=args.host,
+        port=args.port,
+        scale=Scale(**{name: getattr(args, name) for name in vars(scale)}),
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        error_rate=args.error_rate,
+        abuse_rate=args.abuse_rate,
+        seed=args.seed,
+    )
+
+
+def main(config: Config) -> None:
+    server = Server(
+        FakeGitHub(config.scale),
+        host=config.host,
+        port=config.port,
+        latency=config.latency,
+        jitter=config.jitter,
+        rate_limit=config.rate_limit,
+        rate_limit_window=config.rate_limit_window,
+        error_rate=config.error_rate,
+        abuse_rate=config.abuse_rate,
+        seed=config.seed,
+    )
+    with server:
+        print(f"GITHUB_API_URL={server.url}", flush=True)
+        try:
+            while True:
+                sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,153 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import io
+import tempfile
+import unittest
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import requests
+from fake_github_server import FakeGitHub, Scale, Server
+from lib import github, metrics, ratelimit, types
+
+
+class FakeGitHubServerTest(unittest.TestCase):
+    def serve(self, scale: Scale, **kwargs: Any) -> Server:
+        server = Server(FakeGitHub(scale), **kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def client(
+        self, server: Server, cache_dir: str | None = None
+    ) -> tuple[github.GitHub, metrics.Metrics]:
+        request_metrics = metrics.Metrics()
+        gh = github.GitHub(
+            api_url=server.url,
+            github_token="token",
+            releaser_token="releaser-token",
+            repo_name="TokTok/ci-tools",
+            http=github.HttpConfig(cache_dir=cache_dir),
+            rate_limiter=ratelimit.RateLimiter(max_wait=0),
+            request_metrics=request_metrics,
+        )
+        self.addCleanup(gh.close)
+        return gh, request_metrics
+
+    def test_release_lookup_pages_through_releases(self) -> None:
+        server = self.serve(Scale(releases=250, pulls=0, issues=0))
+        gh, request_metrics = self.client(server)
+        self.assertIsNotNone(gh.get_release_id("v0.24.9"))
+        self.assertEqual(request_metrics.total_requests(), 1)
+        self.assertIsNotNone(gh.get_release_id("v0.0.0"))
+        self.assertEqual(request_metrics.total_requests(), 3)
+        self.assertIsNone(gh.get_release_id("v1.0.0"))
+        self.assertEqual(request_metrics.total_requests(), 3)
+
+    def test_find_pr_scans_all_pulls(self) -> None:
+        server = self.serve(Scale(releases=0, pulls=250, issues=0))
+        gh, request_metrics = self.client(server)
+        pr = gh.find_pr_for_branch("bob:change-1", "master")
+        assert pr is not None
+        self.assertEqual(pr.number, 1)
+        self.assertIsNone(gh.find_pr("0" * 40, "master"))
+        self.assertEqual(request_metrics.total_requests(), 4)
+
+    def test_checks_complete_after_ci_seconds(self) -> None:
+        server = self.serve(Scale(releases=0, pulls=0, check_runs=60, ci_seconds=60))
+        gh, _ = self.client(server)
+        checks = gh.checks("a" * 40)
+        self.assertEqual(len(checks), 60)
+        self.assertEqual({c.status for c in checks.values()}, {"in_progress"})
+        server.repo.scale.ci_seconds = 0
+        _, changed = gh.poll_checks("a" * 40, checks)
+        self.assertEqual(len(changed), 60)
+        self.assertEqual({c.conclusion for c in changed}, {"success"})
+
+    def test_release_upload_and_download(self) -> None:
+        server = self.serve(Scale(releases=1, assets_per_release=0, pulls=0))
+        gh, _ = self.client(server)
+        gh.create_release("v1.0.0", "Notes", prerelease=False)
+        uploads = [
+            github.AssetUpload("a.txt", "text/plain", io.BytesIO(b"hello")),
+            github.AssetUpload("b.txt", "text/plain", io.BytesIO(b"world")),
+        ]
+        results = gh.upload_assets("v1.0.0", uploads)
+        self.assertEqual([r.skipped for r in results], [False, False])
+        for u in uploads:
+            assert not isinstance(u.source, str)
+            u.source.seek(0)
+        results = gh.upload_assets("v1.0.0", uploads)
+        self.assertEqual([r.skipped for r in results], [True, True])
+
+        results = gh.upload_assets(
+            "v1.0.0",
+            [github.AssetUpload("b.txt", "text/plain", io.BytesIO(b"there"))],
+        )
+        self.assertEqual([r.skipped for r in results], [False])
+
+        assets = {a.name: a for a in gh.release_assets("v1.0.0")}
+        self.assertEqual(sorted(assets), ["a.txt", "b.txt"])
+        self.assertEqual(gh.download_asset(assets["b.txt"].id), b"there")
+        snapshot = gh.release_snapshot("v1.0.0", "releaser:release/v1.0.0", "master")
+        self.assertTrue(snapshot.release_exists)
+        self.assertFalse(snapshot.release_published)
+        self.assertFalse(snapshot.has_pr)
+        self.assertEqual(sorted(snapshot.asset_names), ["a.txt", "b.txt"])
+
+    def test_git_data(self) -> None:
+        server = self.serve(Scale(releases=0, pulls=0))
+        gh, _ = self.client(server)
+        slug = types.RepoSlug("TokTok", "ci-tools")
+        sha = gh.tag(slug, "a" * 40, "v1.0.0", "Release v1.0.0")
+        self.assertEqual(server.repo.refs["refs/tags/v1.0.0"], sha)
+
+    def test_rate_limit(self) -> None:
+        server = self.serve(Scale(releases=0, pulls=0), rate_limit=2)
+        gh, request_metrics = self.client(server)
+        gh.api_uncached("/user", auth=github.AuthLevel.GITHUB)
+        gh.api_uncached("/user", auth=github.AuthLevel.GITHUB)
+        with self.assertRaises(requests.exceptions.HTTPError) as e:
+            gh.api_uncached("/user", auth=github.AuthLevel.GITHUB)
+        assert e.exception.response is not None
+        self.assertEqual(e.exception.response.status_code, 403)
+        self.assertEqual(
+            request_metrics.endpoints()["GET /user"].rate_limit_remaining, 0
+        )
+        # Other tokens have their own budget.
+        gh.api_uncached("/user", auth=github.AuthLevel.RELEASER)
+
+    def test_not_modified_is_free(self) -> None:
+        server = self.serve(Scale(releases=0, pulls=0), rate_limit=2)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            gh, request_metrics = self.client(server, cache_dir)
+            for _ in range(5):
+                gh.api_uncached("/user", auth=github.AuthLevel.GITHUB)
+        stats = request_metrics.endpoints()["GET /user"]
+        self.assertEqual(stats.not_modified, 4)
+        self.assertEqual(stats.rate_limit_remaining, 1)
+
+    @patch("lib.retry.sleep")
+    def test_injected_errors(self, sleep: MagicMock) -> None:
+        server = self.serve(Scale(releases=0, pulls=0), error_rate=1.0)
+        gh, request_metrics = self.client(server)
+        with self.assertRaises(requests.exceptions.HTTPError) as e:
+            gh.api_uncached("/user")
+        assert e.exception.response is not None
+        self.assertEqual(e.exception.response.status_code, 502)
+        self.assertEqual(request_metrics.endpoints()["GET /user"].retries, 4)
+
+    @patch("lib.retry.sleep")
+    def test_retries_survive_flaky_server(self, sleep: MagicMock) -> None:
+        server = self.serve(
+            Scale(releases=250, pulls=0, issues=0), error_rate=0.3, seed=1
+        )
+        gh, request_metrics = self.client(server)
+        self.assertIsNone(gh.get_release_id("v1.0.0"))
+        self.assertGreater(
+            request_metrics.endpoints()["GET /repos/{owner}/{repo}/releases"].retries, 0
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import asyncio
+import weakref
+from typing import IO, Any, Callable, Iterable, ParamSpec, TypeVar
+
+from lib import github
+from lib.github import (
+    ActionRun,
+    AuthLevel,
+    CheckRun,
+    GitHub,
+    Issue,
+    PullRequest,
+    ReleaseAsset,
+)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+A = TypeVar("A")
+
+# How many requests may be in flight at once. This stays below the
+# connection pool size (`HttpConfig.pool_maxsize`) so requests never wait
+# for a connection.
+MAX_CONCURRENCY = 8
+
+
+class AsyncGitHub:
+    """An asyncio front end for a `GitHub` provider.
+
+    The methods the tools need are available as coroutines with the same
+    arguments and return types (the same `Issue`, `CheckRun` etc.
+    dataclasses), e.g. `await gh.checks(sha)`; anything else can go through
+    `call`. The calls run on worker threads sharing the provider's connection
+    pool, rate limiter and caches, and at most `max_concurrency` of them run
+    at the same time.
+
+    The provider defaults to `github.DEFAULT_GITHUB`, created on first use.
+    """
+
+    def __init__(
+        self,
+        provider: GitHub | None = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+    ) -> None:
+        self._provider = provider
+        self.max_concurrency = max_concurrency
+        # Semaphores are bound to the event loop they are first used in, so
+        # each loop gets its own.
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    @property
+    def github(self) -> GitHub:
+        if self._provider is None:
+            self._provider = github.DEFAULT_GITHUB
+        return self._provider
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    async def call(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """Run a blocking call on a worker thread, bounded by the semaphore."""
+        async with self._semaphore():
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def api(
+        self,
+        url: str,
+        auth: AuthLevel = AuthLevel.OPTIONAL,
+        params: tuple[tuple[str, str | int], ...] = tuple(),
+    ) -> Any:
+        return await self.call(self.github.api, url, auth, params)
+
+    async def api_paginated(
+        self,
+        url: str,
+        auth: AuthLevel = AuthLevel.OPTIONAL,
+        params: tuple[tuple[str, str | int], ...] = tuple(),
+        key: str | None = None,
+    ) -> list[Any]:
+        """Get all items of a paginated list endpoint (uncached).
+
+        The pages are fetched on the worker thread; iterating the generator
+        on the event loop would block it.
+        """
+
+        def fetch() -> list[Any]:
+            return list(self.github.api_paginated(url, auth, params, key))
+
+        return await self.call(fetch)
+
+    async def api_list(
+        self,
+        url: str,
+        auth: AuthLevel = AuthLevel.OPTIONAL,
+        params: tuple[tuple[str, str | int], ...] = tuple(),
+        key: str | None = None,
+    ) -> list[Any]:
+        return await self.call(self.github.api_list, url, auth, params, key)
+
+    async def get_release_id(self, tag: str) -> int | None:
+        return await self.call(self.github.get_release_id, tag)
+
+    async def get_issue(self, issue_number: int) -> Issue:
+        return await self.call(self.github.get_issue, issue_number)
+
+    async def find_pr(self, head_sha: str, base: str) -> PullRequest | None:
+        return await self.call(self.github.find_pr, head_sha, base)
+
+    async def checks(self, commit: str) -> dict[str, CheckRun]:
+        return await self.call(self.github.checks, commit)
+
+    async def action_runs(self, branch: str, head_sha: str) -> list[ActionRun]:
+        return await self.call(self.github.action_runs, branch, head_sha)
+
+    async def release_assets(self, tag: str) -> list[ReleaseAsset]:
+        return await self.call(self.github.release_assets, tag)
+
+    async def download_asset_to(self, asset_id: int, out: IO[bytes]) -> str:
+        return await self.call(self.github.download_asset_to, asset_id, out)
+
+    async def map(self, fn: Callable[[A], T], items: Iterable[A]) -> list[T]:
+        """Call `fn` for each item concurrently; results are in item order."""
+        return list(await asyncio.gather(*(self.call(fn, item) for item in items)))
+
+
+def map_sync(
+    fn: Callable[[A], T],
+    items: Iterable[A],
+    max_concurrency: int = MAX_CONCURRENCY,
+    provider: GitHub | None = None,
+) -> list[T]:
+    """Synchronous adapter: call `fn` for each item concurrently.
+
+    This lets synchronous tools overlap independent requests without
+    becoming async themselves. The provider is only created if `fn` goes
+    through the `AsyncGitHub` (it usually calls the `github` module).
+    """
+    gh = AsyncGitHub(provider, max_concurrency=max_concurrency)
+    return asyncio.run(gh.map(fn, items))
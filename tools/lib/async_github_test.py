@@ -0,0 +1,73 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from lib import async_github, github
+
+
+class TestAsyncGitHub(unittest.TestCase):
+    def setUp(self) -> None:
+        self.provider = MagicMock(spec=github.GitHub)
+        self.gh = async_github.AsyncGitHub(self.provider, max_concurrency=2)
+
+    def test_mirrors_methods(self) -> None:
+        self.provider.checks.return_value = {}
+        self.assertEqual(asyncio.run(self.gh.checks("sha")), {})
+        self.provider.checks.assert_called_once_with("sha")
+
+    def test_unknown_method(self) -> None:
+        with self.assertRaises(AttributeError):
+            self.gh.no_such_method  # type: ignore[attr-defined]
+
+    def test_paginated_runs_on_worker_thread(self) -> None:
+        threads = []
+
+        def pages(*args: object) -> object:
+            threads.append(threading.current_thread())
+            yield 1
+            threads.append(threading.current_thread())
+            yield 2
+
+        self.provider.api_paginated.side_effect = pages
+        self.assertEqual(asyncio.run(self.gh.api_paginated("/x")), [1, 2])
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_provider_is_lazy(self) -> None:
+        with patch.dict(vars(github)), patch("lib.github._default") as default:
+            # Make sure DEFAULT_GITHUB goes through the factory.
+            vars(github).pop("DEFAULT_GITHUB", None)
+            gh = async_github.AsyncGitHub()
+            default.assert_not_called()
+            self.assertIs(gh.github, default.return_value)
+
+    def test_bounded_concurrency(self) -> None:
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def work(i: int) -> int:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            return i * 2
+
+        self.assertEqual(asyncio.run(self.gh.map(work, range(6))), [0, 2, 4, 6, 8, 10])
+        self.assertLessEqual(peak, 2)
+
+    def test_map_sync(self) -> None:
+        with patch("lib.github._default") as default:
+            self.assertEqual(async_github.map_sync(str, [1, 2]), ["1", "2"])
+            default.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import atexit
+import base64
+import http.client
+import io
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass
+from typing import Any, Literal, Mapping
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+sleep = time.sleep
+
+Mode = Literal["record", "replay"]
+
+# Headers that carry credentials (or are otherwise useless to replay).
+SCRUBBED_HEADERS = frozenset(
+    {"authorization", "cookie", "set-cookie", "x-github-request-id"}
+)
+
+# Conditional request headers depend on the state of the on-disk cache, which
+# differs between recording and replay. They are dropped so that recorded
+# responses are always complete (never 304 Not Modified).
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+# Query parameters that carry credentials, e.g. in the signed object storage
+# URLs that asset downloads redirect to.
+_SECRET_PARAM = re.compile(r"^(x-amz-.*|token|sig|signature|jwt)$", re.IGNORECASE)
+
+
+def scrub_url(url: str) -> str:
+    """Remove credentials from the query string of a URL."""
+    parts = urllib.parse.urlsplit(url)
+    query = [
+        (k, "REDACTED" if _SECRET_PARAM.match(k) else v)
+        for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def _scrub_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    return {k: v for k, v in headers.items() if k.lower() not in SCRUBBED_HEADERS}
+
+
+@dataclass
+class Interaction:
+    method: str
+    url: str
+    status: int
+    headers: dict[str, str]
+    # The body, base64-encoded.
+    body: str
+    # Seconds between sending the request and receiving the full response.
+    elapsed: float
+
+
+class Cassette(requests.adapters.BaseAdapter):
+    """A transport that records HTTP interactions or replays them.
+
+    In "record" mode, requests go to the network and the interactions are
+    written to `path` (without credentials) when the cassette is closed or
+    the process exits. In "replay" mode, requests are answered from `path`
+    without any network access. Requests are matched by method and URL in
+    the order they were recorded, so polling the same URL replays the
+    sequence of responses; once a sequence is used up, its last response is
+    repeated.
+
+    Replay takes no time by default. `latency` simulates a fixed delay per
+    request; None replays the recorded delays.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: Mode,
+        latency: float | None = 0.0,
+        inner: requests.adapters.BaseAdapter | None = None,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._interactions: list[Interaction] = []
+        self._replayed: dict[tuple[str, str], int] = {}
+        if mode == "record":
+            self._inner = inner or requests.adapters.HTTPAdapter()
+            atexit.register(self.save)
+        else:
+            with open(path, "r") as f:
+                self._interactions = [
+                    Interaction(**i) for i in json.load(f)["interactions"]
+                ]
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> requests.Response:
+        for header in CONDITIONAL_HEADERS:
+            request.headers.pop(header, None)
+        method = str(request.method)
+        url = scrub_url(str(request.url))
+        if self.mode == "replay":
+            interaction = self._next(method, url)
+            delay = interaction.elapsed if self.latency is None else self.latency
+            if delay > 0:
+                sleep(delay)
+            return self._response(request, interaction)
+
+        start = time.monotonic()
+        response = self._inner.send(
+            request,
+            stream=stream,
+            timeout=timeout,
+            verify=verify,
+            cert=cert,
+            proxies=proxies,
+        )
+        # Reading the content here keeps it available to the caller, also
+        # for streamed responses.
+        body = response.content
+        with self._lock:
+            self._interactions.append(
+                Interaction(
+                    method=method,
+                    url=url,
+                    status=response.status_code,
+                    headers=_scrub_headers(response.headers),
+                    body=base64.b64encode(body).decode("ascii"),
+                    elapsed=time.monotonic() - start,
+                )
+            )
+        return response
+
+    def _next(self, method: str, url: str) -> Interaction:
+        with self._lock:
+            matches = [
+                i for i in self._interactions if (i.method, i.url) == (method, url)
+            ]
+            if not matches:
+                raise requests.exceptions.ConnectionError(
+                    f"No recorded interaction for {method} {url} in {self.path}"
+                )
+            n = self._replayed.get((method, url), 0)
+            self._replayed[(method, url)] = n + 1
+            return matches[min(n, len(matches) - 1)]
+
+    def _response(
+        self, request: requests.PreparedRequest, interaction: Interaction
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction.status
+        response.headers = CaseInsensitiveDict(interaction.headers)
+        response.raw = io.BytesIO(base64.b64decode(interaction.body))
+        response.url = str(request.url)
+        response.request = request
+        response.reason = http.client.responses.get(interaction.status, "")
+        return response
+
+    def save(self) -> None:
+        """Write the recorded interactions to the cassette file."""
+        if self.mode != "record":
+            return
+        with self._lock:
+            data = {"interactions": [asdict(i) for i in self._interactions]}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(data, f, indent=1)
+
+    def close(self) -> None:
+        if self.mode == "record":
+            self.save()
+            self._inner.close()
+
+
+def from_env() -> Cassette | None:
+    """Create a cassette as configured by the environment, if any.
+
+    $CI_TOOLS_CASSETTE is the cassette file, and $CI_TOOLS_CASSETTE_MODE is
+    "record" or "replay" (default). $CI_TOOLS_CASSETTE_LATENCY is the
+    simulated latency in seconds per request, or "recorded".
+    """
+    path = os.getenv("CI_TOOLS_CASSETTE")
+    if not path:
+        return None
+    mode = os.getenv("CI_TOOLS_CASSETTE_MODE", "replay")
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Invalid CI_TOOLS_CASSETTE_MODE: {mode}")
+    latency = os.getenv("CI_TOOLS_CASSETTE_LATENCY", "0")
+    return Cassette(
+        path,
+        "record" if mode == "record" else "replay",
+        latency=None if latency == "recorded" else float(latency),
+    )
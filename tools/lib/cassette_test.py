@@ -0,0 +1,115 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import json
+import os
+import tempfile
+import unittest
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import requests
+import requests.adapters
+from lib import cassette, github
+
+
+class _Server(requests.adapters.BaseAdapter):
+    """Answers every request with the next issue title."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[requests.PreparedRequest] = []
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> requests.Response:
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers.update(
+            {"Content-Type": "application/json", "Set-Cookie": "session=secret"}
+        )
+        response._content = json.dumps({"title": f"v{len(self.requests)}"}).encode()
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "cassette.json")
+
+    def _github(self, transport: requests.adapters.BaseAdapter) -> github.GitHub:
+        return github.GitHub(
+            api_url="https://api.test",
+            github_token="secret-token",
+            repo_name="owner/repo",
+            http=github.HttpConfig(cache_dir=None),
+            transport=transport,
+        )
+
+    def _record(self) -> _Server:
+        server = _Server()
+        gh = self._github(cassette.Cassette(self.path, "record", inner=server))
+        gh.api_uncached("/repos/owner/repo/issues/1")
+        gh.api_uncached("/repos/owner/repo/issues/1")
+        gh.close()
+        return server
+
+    def test_record_scrubs_secrets(self) -> None:
+        server = self._record()
+        self.assertEqual(len(server.requests), 2)
+        with open(self.path) as f:
+            data = f.read()
+        self.assertNotIn("secret", data)
+        self.assertEqual(len(json.loads(data)["interactions"]), 2)
+
+    def test_replay_in_order(self) -> None:
+        self._record()
+        gh = self._github(cassette.Cassette(self.path, "replay"))
+        titles = [
+            gh.api_uncached("/repos/owner/repo/issues/1")["title"] for _ in range(3)
+        ]
+        # The last response repeats once the recording is used up.
+        self.assertEqual(titles, ["v1", "v2", "v2"])
+
+    @patch("lib.retry.sleep")
+    def test_replay_unknown_request(self, sleep: MagicMock) -> None:
+        self._record()
+        gh = self._github(cassette.Cassette(self.path, "replay"))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            gh.api_uncached("/repos/owner/repo/issues/2")
+
+    def test_replay_streamed_download(self) -> None:
+        server = _Server()
+        gh = self._github(cassette.Cassette(self.path, "record", inner=server))
+        recorded = gh.download_asset(1)
+        gh.close()
+        gh = self._github(cassette.Cassette(self.path, "replay"))
+        self.assertEqual(gh.download_asset(1), recorded)
+
+    @patch("lib.cassette.sleep")
+    def test_simulated_latency(self, sleep: MagicMock) -> None:
+        self._record()
+        gh = self._github(cassette.Cassette(self.path, "replay", latency=0.25))
+        gh.api_uncached("/repos/owner/repo/issues/1")
+        sleep.assert_called_once_with(0.25)
+
+    def test_scrub_url(self) -> None:
+        self.assertEqual(
+            cassette.scrub_url("https://s3.test/a?X-Amz-Signature=abc&name=b"),
+            "https://s3.test/a?X-Amz-Signature=REDACTED&name=b",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,19 +1,40 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2024-2026 The TokTok team
+import bisect
+import contextlib
+import functools
+import os
 import pathlib
 import re
 import subprocess  # nosec
-import unittest
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any
+from typing import IO, Any, Callable, Iterable, Iterator
 
-from lib import types
+from lib import gitdir, metrics, types
 
 VERSION_REGEX = re.compile(r"v\d+\.\d+(?:\.\d+)?(?:-rc\.\d+)?")
 RELEASE_BRANCH_PREFIX = "release"
 RELEASE_BRANCH_REGEX = re.compile(f"{RELEASE_BRANCH_PREFIX}/{VERSION_REGEX.pattern}")
 
 
+@functools.cache
+def _configure_registry() -> None:
+    """Set up metrics.GIT_REGISTRY from the environment.
+
+    This happens when the first git command runs rather than at import, so
+    that the environment the program sets up before using git counts.
+    CI_TOOLS_GIT_TRACE names a file to append every git command to (one JSON
+    object per line), CI_TOOLS_GIT_METRICS_FILE one to write the totals per
+    subcommand to (JSON) at exit.
+    """
+    trace_path = os.getenv("CI_TOOLS_GIT_TRACE")
+    if trace_path:
+        metrics.GIT_REGISTRY.trace_path = trace_path
+    metrics.GIT_REGISTRY.export_at_exit(os.getenv("CI_TOOLS_GIT_METRICS_FILE"))
+
+
 @dataclass
 class Version:
     major: int
@@ -42,8 +63,11 @@ class Version:
         return self.rc < other.rc
 
 
+_VERSION_PARTS = re.compile(r"v(\d+)\.(\d+)(?:\.(\d+))?(?:-rc\.(\d+))?")
+
+
 def parse_version(version: str) -> Version:
-    match = re.match(r"v(\d+)\.(\d+)(?:\.(\d+))?(?:-rc\.(\d+))?", version)
+    match = _VERSION_PARTS.match(version)
     if not match:
         raise ValueError(f"Could not parse version: {version}")
     return Version(
@@ -54,25 +78,390 @@ def parse_version(version: str) -> Version:
     )
 
 
-class Git:
-    """A provider for Git commands."""
+# Sorts like Version: a release comes after all of its release candidates.
+_VersionKey = tuple[int, int, int, bool, int]
+
+
+def _version_key(v: Version) -> _VersionKey:
+    return (v.major, v.minor, v.patch, v.rc is None, v.rc or 0)
+
+
+class VersionIndex:
+    """Release tags sorted by version, built once from a list of tags.
+
+    Tags that don't look like versions are ignored. Like release_tags, the
+    views with RCs leave out the RCs of versions that have been released.
+    The filtered views are computed when first needed.
+    """
+
+    def __init__(self, tags: Iterable[str]) -> None:
+        # Newest first, so that tags with equal versions (v1.0 and v1.0.0)
+        # keep their input order, as in the original sort.
+        newest_first = sorted(
+            (
+                (_version_key(parse_version(t)), t)
+                for t in tags
+                if VERSION_REGEX.match(t)
+            ),
+            key=lambda kt: kt[0],
+            reverse=True,
+        )
+        self._all = newest_first[::-1]
+        self._all_keys = [k for k, _ in self._all]
+        self._views: dict[bool, tuple[list[str], list[_VersionKey], set[str]]] = {}
+
+    def _view(self, with_rc: bool) -> tuple[list[str], list[_VersionKey], set[str]]:
+        """The tags (newest first), their keys (oldest first) and a set of them."""
+        if with_rc not in self._views:
+            released = {t for _, t in self._all if "-rc." not in t}
+            view = [
+                (k, t)
+                for k, t in self._all
+                if "-rc." not in t or (with_rc and t.split("-rc.")[0] not in released)
+            ]
+            self._views[with_rc] = (
+                [t for _, t in reversed(view)],
+                [k for k, _ in view],
+                {t for _, t in view},
+            )
+        return self._views[with_rc]
+
+    def tags(self, with_rc: bool = True) -> list[str]:
+        """The release tags, newest first."""
+        return list(self._view(with_rc)[0])
+
+    def __contains__(self, tag: object) -> bool:
+        return tag in self._view(True)[2]
+
+    def exists(self, tag: str, with_rc: bool = True) -> bool:
+        return tag in self._view(with_rc)[2]
+
+    def previous(self, version: str, with_rc: bool = True) -> str | None:
+        """The newest release tag older than a version, if any."""
+        newest_first, keys, _ = self._view(with_rc)
+        i = bisect.bisect_left(keys, _version_key(parse_version(version)))
+        return newest_first[len(keys) - i] if i > 0 else None
+
+    def next(self, version: str, with_rc: bool = True) -> str | None:
+        """The oldest release tag newer than a version, if any."""
+        newest_first, keys, _ = self._view(with_rc)
+        i = bisect.bisect_right(keys, _version_key(parse_version(version)))
+        return newest_first[len(keys) - 1 - i] if i < len(keys) else None
+
+    def latest_rc(self, version: str) -> str | None:
+        """The newest release candidate tag for a version, released or not."""
+        v = parse_version(version)
+        # Keys of the RCs of the version are between these two.
+        lo = bisect.bisect_left(self._all_keys, (v.major, v.minor, v.patch, False, 0))
+        hi = bisect.bisect_left(self._all_keys, (v.major, v.minor, v.patch, True, 0))
+        return self._all[hi - 1][1] if hi > lo else None
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    sha: str
+    type: str
+    size: int
+
+
+class ObjectReader:
+    """A long-lived `git cat-file` process that looks up objects over a pipe.
+
+    Starting git costs several milliseconds, asking a running `cat-file
+    --batch` costs microseconds. With `contents=False`, the process runs
+    `--batch-check` and only reports the object's sha, type and size.
+
+    The process is started on first use. It is restarted if the current
+    directory changed (it would otherwise keep reading the old repository)
+    and in a forked child, which must not share the parent's pipes.
+    """
+
+    def __init__(
+        self,
+        contents: bool = True,
+        command_metrics: metrics.CommandMetrics | None = None,
+    ) -> None:
+        self._mode = "--batch" if contents else "--batch-check"
+        self._metrics = command_metrics or metrics.GIT_REGISTRY
+        self._lock = threading.Lock()
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._pid: int | None = None
+        self._cwd: str | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The process belongs to this one; an unpickled reader starts its own.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_proc"] = None
+        state["_pid"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _process(self) -> "subprocess.Popen[bytes]":
+        cwd = os.getcwd()
+        if self._proc is not None and self._pid == os.getpid():
+            if self._cwd == cwd and self._proc.poll() is None:
+                return self._proc
+            self._stop()
+        _configure_registry()
+        start = time.monotonic()
+        self._proc = subprocess.Popen(  # nosec
+            ["git", "cat-file", self._mode],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._metrics.record(["cat-file", self._mode], time.monotonic() - start)
+        self._pid = os.getpid()
+        self._cwd = cwd
+        return self._proc
+
+    def _stop(self) -> None:
+        if self._proc is None:
+            return
+        if self._pid == os.getpid():
+            for pipe in (self._proc.stdin, self._proc.stdout):
+                if pipe is not None:
+                    pipe.close()
+            self._proc.wait()
+        self._proc = None
+
+    def close(self) -> None:
+        """Stop the git process; the next lookup starts a new one."""
+        with self._lock:
+            self._stop()
+
+    def lookup(self, rev: str) -> tuple[ObjectInfo, bytes | None] | None:
+        """Look up an object by any revision name git understands.
+
+        Returns None if there is no such object. The contents are None if
+        this reader was created with `contents=False`.
+        """
+        if "\n" in rev:
+            raise ValueError(f"Invalid revision: {rev!r}")
+        with self._lock:
+            proc = self._process()
+            stdin: IO[bytes] = proc.stdin  # type: ignore[assignment]
+            stdout: IO[bytes] = proc.stdout  # type: ignore[assignment]
+            try:
+                stdin.write(rev.encode("utf-8") + b"\n")
+                stdin.flush()
+                header = stdout.readline().decode("utf-8").split()
+                if header and header[-1] in ("missing", "ambiguous"):
+                    return None
+                if len(header) == 3:
+                    info = ObjectInfo(header[0], header[1], int(header[2]))
+                    if self._mode == "--batch-check":
+                        return info, None
+                    data = stdout.read(info.size + 1)
+                    if len(data) == info.size + 1:
+                        return info, data[:-1]
+            except (BrokenPipeError, ValueError):
+                pass
+            self._stop()
+            raise subprocess.CalledProcessError(
+                proc.returncode or 1, ["git", "cat-file", self._mode]
+            )
+
+
+@dataclass(frozen=True)
+class Ref:
+    # Full name, e.g. "refs/heads/master" or "refs/tags/v1.0.0".
+    name: str
+    sha: str
+    # The commit an annotated tag points to; the same as `sha` for other refs.
+    peeled: str
+    # Unix time of an annotated tag; None for other refs.
+    tagger_date: int | None
+
+
+class RefSnapshot:
+    """The refs of a repository at one point in time.
+
+    All refs and the branch HEAD points to are read with a single `git
+    for-each-ref`. Tags merged into HEAD and the list of remotes are read
+    once, on first use. Git drops the snapshot whenever it runs a command
+    that may change refs.
+    """
+
+    def __init__(self, run_output: Callable[[list[str]], str]) -> None:
+        self._run_output = run_output
+        self._refs: dict[str, Ref] | None = None
+        self._head: str | None = None
+        self._merged_tags: list[str] | None = None
+        self._versions: VersionIndex | None = None
+        self._remotes: list[str] | None = None
+
+    def _load(self) -> dict[str, Ref]:
+        if self._refs is None:
+            out = self._run_output(
+                [
+                    "for-each-ref",
+                    "--format=%(HEAD)%00%(refname)%00%(objectname)"
+                    "%00%(*objectname)%00%(taggerdate:unix)",
+                ]
+            )
+            refs: dict[str, Ref] = {}
+            for line in out.splitlines():
+                head, name, sha, peeled, date = line.split("\0")
+                refs[name] = Ref(name, sha, peeled or sha, int(date) if date else None)
+                if head == "*":
+                    self._head = name
+            self._refs = refs
+        return self._refs
+
+    def refs(self) -> dict[str, Ref]:
+        """All refs by full name."""
+        return self._load()
+
+    def head(self) -> str | None:
+        """The full name of the checked out branch, or None if detached."""
+        self._load()
+        return self._head
+
+    def resolve(self, name: str) -> Ref | None:
+        """Find the ref a short name like "master" or "origin/master" means."""
+        refs = self._load()
+        if name == "HEAD":
+            return refs.get(self._head) if self._head is not None else None
+        for prefix in gitdir.REF_PREFIXES:
+            if prefix + name in refs:
+                return refs[prefix + name]
+        return refs.get(f"refs/remotes/{name}/HEAD")
+
+    def branches(self, remote: str | None = None) -> list[str]:
+        """Short names of the local branches, or of the branches of a remote."""
+        prefix = "refs/heads/" if remote is None else f"refs/remotes/{remote}/"
+        return [
+            name.removeprefix(prefix)
+            for name in self._load()
+            if name.startswith(prefix) and (remote is None or name != prefix + "HEAD")
+        ]
 
-    def __init__(self) -> None:
+    def merged_tags(self) -> list[str]:
+        """Names of the tags reachable from HEAD."""
+        if self._merged_tags is None:
+            self._merged_tags = self._run_output(["tag", "--merged"]).splitlines()
+        return self._merged_tags
+
+    def versions(self) -> VersionIndex:
+        """The release tags reachable from HEAD."""
+        if self._versions is None:
+            self._versions = VersionIndex(self.merged_tags())
+        return self._versions
+
+    def remotes(self) -> list[str]:
+        if self._remotes is None:
+            self._remotes = self._run_output(["remote"]).splitlines()
+        return self._remotes
+
+
+class Git:
+    """A provider for Git commands.
+
+    With `read_files`, root, current_branch, branch_sha and remotes read the
+    answer from the files in .git when they can, instead of running git.
+    Every git process started is recorded in `command_metrics` (by default
+    the process-wide metrics.GIT_REGISTRY).
+    """
+
+    def __init__(
+        self,
+        read_files: bool = True,
+        command_metrics: metrics.CommandMetrics | None = None,
+    ) -> None:
         self._root_cache: str | None = None
+        self._read_files = read_files
+        self._gitdir: tuple[str, gitdir.GitDir | None] | None = None
+        self._metrics = command_metrics or metrics.GIT_REGISTRY
+        self._objects = ObjectReader(command_metrics=self._metrics)
+        self._object_info = ObjectReader(contents=False, command_metrics=self._metrics)
+        self._refs: RefSnapshot | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_refs"] = None
+        return state
+
+    def _files(self) -> gitdir.GitDir | None:
+        """The repository files of the current directory, if they can be read."""
+        if not self._read_files:
+            return None
+        cwd = os.getcwd()
+        if self._gitdir is None or self._gitdir[0] != cwd:
+            self._gitdir = (cwd, gitdir.GitDir.find(cwd))
+        return self._gitdir[1]
+
+    @contextlib.contextmanager
+    def _recorded(self, args: list[str]) -> Iterator[None]:
+        _configure_registry()
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self._metrics.record(args, time.monotonic() - start, failed=True)
+            raise
+        self._metrics.record(args, time.monotonic() - start)
 
     def _run_output(self, args: list[str]) -> str:
-        return subprocess.check_output(["git"] + args).strip().decode("utf-8")
+        with self._recorded(args):
+            return subprocess.check_output(["git"] + args).strip().decode("utf-8")
 
     def _run_call(self, args: list[str]) -> None:
-        subprocess.check_call(["git"] + args)  # nosec
+        try:
+            with self._recorded(args):
+                subprocess.check_call(["git"] + args)  # nosec
+        finally:
+            # Any command run this way may have moved a branch or made a tag.
+            self.invalidate_refs()
 
     def _run_status(self, args: list[str]) -> int:
-        return subprocess.run(["git"] + args, check=False).returncode  # nosec
+        with self._recorded(args):
+            return subprocess.run(["git"] + args, check=False).returncode  # nosec
+
+    def read_object(self, rev: str) -> tuple[ObjectInfo, bytes] | None:
+        """Read an object (e.g. "v1.0.0" or "HEAD^{tree}"), or None if missing."""
+        found = self._objects.lookup(rev)
+        if found is None:
+            return None
+        info, data = found
+        assert data is not None  # nosec
+        return info, data
+
+    def object_info(self, rev: str) -> ObjectInfo | None:
+        """Get the sha, type and size of an object, or None if missing."""
+        found = self._object_info.lookup(rev)
+        return found[0] if found is not None else None
+
+    def refs(self) -> RefSnapshot:
+        """Get the current ref snapshot, reading the refs if needed."""
+        if self._refs is None:
+            self._refs = RefSnapshot(self._run_output)
+        return self._refs
+
+    def invalidate_refs(self) -> None:
+        """Forget the ref snapshot, e.g. after refs were changed outside Git."""
+        self._refs = None
+
+    def command_metrics(self) -> metrics.CommandMetrics:
+        """Get the per-subcommand telemetry of the git processes started."""
+        return self._metrics
+
+    def close(self) -> None:
+        """Stop the long-lived git processes (they restart on demand)."""
+        self._objects.close()
+        self._object_info.close()
 
     def root(self) -> str:
         """Get the root directory of the git repository."""
         if self._root_cache is None:
-            self._root_cache = self._run_output(["rev-parse", "--show-toplevel"])
+            files = self._files()
+            if files is not None:
+                self._root_cache = files.worktree
+            else:
+                self._root_cache = self._run_output(["rev-parse", "--show-toplevel"])
         return self._root_cache
 
     def root_dir(self) -> pathlib.Path:
@@ -119,55 +508,49 @@ class Git:
 
     def remotes(self) -> list[str]:
         """Return a list of remote names (e.g. origin, upstream)."""
-        return self._run_output(["remote"]).splitlines()
+        files = self._files()
+        remotes = files.remotes() if files is not None else None
+        if remotes is not None:
+            return remotes
+        return self.refs().remotes()
 
     def branch_sha(self, branch: str) -> str:
         """Get the SHA of a branch."""
+        files = self._files()
+        sha = files.resolve(branch) if files is not None else None
+        if sha is not None:
+            return sha
+        ref = self.refs().resolve(branch)
+        if ref is not None:
+            return ref.peeled
         return self._run_output(["rev-list", "--max-count=1", branch])
 
     def branches(self, remote: str | None = None) -> list[str]:
         """Get a list of branches, optionally from a remote."""
         if remote is not None and remote not in self.remotes():
             raise ValueError(f"Remote {remote} does not exist.")
-        args = [
-            "branch",
-            "--list",
-            "--no-column",
-            "--format=%(refname:short)",
-        ]
-        if remote is not None:
-            args.append("--remotes")
-
-        bs = self._run_output(args).splitlines()
-        if remote is None:
-            return bs
-        return [b.split("/", 1)[1] for b in bs if b.startswith(f"{remote}/")]
+        return self.refs().branches(remote)
 
     def current_branch(self) -> str:
-        """Get the current branch name."""
-        return self._run_output(["rev-parse", "--abbrev-ref", "HEAD"])
+        """Get the current branch name ("HEAD" if detached)."""
+        files = self._files()
+        head = files.head() if files is not None else None
+        if head is not None and head.startswith("ref: refs/heads/"):
+            return head.removeprefix("ref: refs/heads/")
+        head = self.refs().head()
+        return head.removeprefix("refs/heads/") if head is not None else "HEAD"
 
     def release_tags(self, with_rc: bool = True) -> list[str]:
-        tags = self._run_output(["tag", "--merged"]).splitlines()
-        all_tags = sorted(
-            (tag for tag in tags if re.match(VERSION_REGEX, tag)),
-            reverse=True,
-            key=parse_version,
-        )
+        """Get the release tags reachable from HEAD, newest first.
 
-        if not with_rc:
-            return [t for t in all_tags if "-rc." not in t]
-
-        prod_versions = {t for t in all_tags if "-rc." not in t}
-        return [
-            t
-            for t in all_tags
-            if "-rc." not in t or t.split("-rc.")[0] not in prod_versions
-        ]
+        Without `with_rc`, release candidates are left out. Otherwise, only
+        the RCs of versions that haven't been released are included.
+        """
+        return self.refs().versions().tags(with_rc)
 
     def release_tag_exists(self, tag: str) -> bool:
         """Check if a tag exists."""
-        return tag in self.release_tags()
+        return tag in self.refs().versions()
 
     def tag(self, tag: str, message: str, sign: bool) -> None:
         """Create a signed tag with a message."""
@@ -199,9 +582,10 @@ class Git:
 
     def tag_has_signature(self, tag: str) -> bool:
         """Check if a tag has a signature."""
-        return "-----BEGIN PGP SIGNATURE-----" in self._run_output(
-            ["cat-file", "tag", tag]
-        )
+        obj = self.read_object(tag)
+        if obj is None:
+            raise ValueError(f"Tag {tag} does not exist.")
+        return obj[0].type == "tag" and b"-----BEGIN PGP SIGNATURE-----" in obj[1]
 
     def verify_tag(self, tag: str) -> bool:
         """Verify the signature of a tag."""
@@ -296,7 +680,11 @@ class Git:
 
     def commit_message(self, commit_sha: str) -> str:
         """Get the commit message of a commit."""
-        return self._run_output(["show", "--quiet", "--format=%B", commit_sha])
+        obj = self.read_object(f"{commit_sha}^{{commit}}")
+        if obj is None:
+            raise ValueError(f"Commit {commit_sha} does not exist.")
+        # The message follows the headers and the first empty line.
+        return obj[1].partition(b"\n\n")[2].strip().decode("utf-8")
 
     def is_up_to_date(self, branch: str, remote: str) -> bool:
         """Check if a branch sha is equal to its remote counterpart."""
@@ -361,6 +749,18 @@ def root_dir() -> pathlib.Path:
     return DEFAULT_GIT.root_dir()
 
 
+def read_object(rev: str) -> tuple[ObjectInfo, bytes] | None:
+    return DEFAULT_GIT.read_object(rev)
+
+
+def object_info(rev: str) -> ObjectInfo | None:
+    return DEFAULT_GIT.object_info(rev)
+
+
+def command_metrics() -> metrics.CommandMetrics:
+    return DEFAULT_GIT.command_metrics()
+
+
 def fetch(*remotes: str) -> None:
     DEFAULT_GIT.fetch(*remotes)
 
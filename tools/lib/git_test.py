@@ -1,9 +1,14 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2026 The TokTok team
+import os
+import pickle
+import subprocess  # nosec
+import sys
+import tempfile
 import unittest
 import unittest.mock
 
-from lib import git
+from lib import git, metrics
 
 
 class TestParseVersion(unittest.TestCase):
@@ -49,10 +54,252 @@ class TestReleaseTags(unittest.TestCase):
         g._run_output = unittest.mock.MagicMock(  # type: ignore
             return_value="v1.1.0-rc.1\nv1.0.0"
         )
+        g.invalidate_refs()
         tags = g.release_tags(with_rc=True)
         self.assertIn("v1.1.0-rc.1", tags)
         self.assertIn("v1.0.0", tags)
 
 
+class TestVersionIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = git.VersionIndex(
+            [
+                "v0.9.0",
+                "v1.0.0",
+                "v1.0.0-rc.1",
+                "v1.0.0-rc.2",
+                "v1.1.0-rc.1",
+                "v1.1.0-rc.2",
+                "nightly",
+            ]
+        )
+
+    def test_tags(self) -> None:
+        self.assertEqual(
+            self.index.tags(), ["v1.1.0-rc.2", "v1.1.0-rc.1", "v1.0.0", "v0.9.0"]
+        )
+        self.assertEqual(self.index.tags(with_rc=False), ["v1.0.0", "v0.9.0"])
+
+    def test_exists(self) -> None:
+        self.assertIn("v1.0.0", self.index)
+        self.assertIn("v1.1.0-rc.1", self.index)
+        # Superseded by the release.
+        self.assertNotIn("v1.0.0-rc.1", self.index)
+        self.assertNotIn("nightly", self.index)
+        self.assertFalse(self.index.exists("v1.1.0-rc.1", with_rc=False))
+
+    def test_previous_and_next(self) -> None:
+        self.assertEqual(self.index.previous("v1.0.0"), "v0.9.0")
+        self.assertEqual(self.index.previous("v1.1.0"), "v1.1.0-rc.2")
+        self.assertEqual(self.index.previous("v1.1.0", with_rc=False), "v1.0.0")
+        self.assertEqual(self.index.previous("v1.0.5"), "v1.0.0")
+        self.assertIsNone(self.index.previous("v0.9.0"))
+        self.assertEqual(self.index.next("v0.9.0"), "v1.0.0")
+        self.assertEqual(self.index.next("v1.0.0"), "v1.1.0-rc.1")
+        self.assertIsNone(self.index.next("v1.0.0", with_rc=False))
+        self.assertIsNone(self.index.next("v1.1.0"))
+
+    def test_latest_rc(self) -> None:
+        self.assertEqual(self.index.latest_rc("v1.0.0"), "v1.0.0-rc.2")
+        self.assertEqual(self.index.latest_rc("v1.1.0"), "v1.1.0-rc.2")
+        self.assertIsNone(self.index.latest_rc("v0.9.0"))
+        self.assertIsNone(self.index.latest_rc("v2.0.0"))
+
+
+class GitRepoTestCase(unittest.TestCase):
+    """Runs each test in a new repository with one commit and two tags."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp.name)
+        env = {
+            "GIT_AUTHOR_NAME": "Alice",
+            "GIT_AUTHOR_EMAIL": "alice@example.com",
+            "GIT_AUTHOR_DATE": "1700000000 +0000",
+            "GIT_COMMITTER_NAME": "Alice",
+            "GIT_COMMITTER_EMAIL": "alice@example.com",
+            "GIT_COMMITTER_DATE": "1700000000 +0000",
+            "GIT_CONFIG_GLOBAL": os.devnull,
+            "GIT_CONFIG_NOSYSTEM": "1",
+        }
+        patcher = unittest.mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.run_git("init", "--quiet")
+        self.run_git("commit", "--quiet", "--allow-empty", "-m", "Title\n\nBody")
+        self.run_git("tag", "--annotate", "--message", "Release", "v1.0.0")
+        self.run_git("tag", "v1.0.1")
+        self.git = git.Git()
+        self.addCleanup(self.git.close)
+
+    def run_git(self, *args: str) -> None:
+        subprocess.check_call(["git", *args])  # nosec
+
+
+class TestObjectReader(GitRepoTestCase):
+    def test_read_object(self) -> None:
+        obj = self.git.read_object("v1.0.0")
+        assert obj is not None
+        self.assertEqual(obj[0].type, "tag")
+        self.assertIn(b"tagger Alice <alice@example.com> 1700000000", obj[1])
+        self.assertEqual(len(obj[1]), obj[0].size)
+        self.assertIsNone(self.git.read_object("v2.0.0"))
+        self.assertIsNone(self.git.read_object("not a revision"))
+
+    def test_object_info(self) -> None:
+        info = self.git.object_info("v1.0.1")
+        assert info is not None
+        self.assertEqual(info.type, "commit")
+        self.assertEqual(info.sha, self.git.branch_sha("HEAD"))
+        self.assertIsNone(self.git.object_info("v2.0.0"))
+
+    def test_commit_message_and_signature(self) -> None:
+        self.assertEqual(self.git.commit_message("v1.0.0"), "Title\n\nBody")
+        self.assertFalse(self.git.tag_has_signature("v1.0.0"))
+        self.assertFalse(self.git.tag_has_signature("v1.0.1"))
+        with self.assertRaises(ValueError):
+            self.git.tag_has_signature("v2.0.0")
+
+    def test_sees_new_objects(self) -> None:
+        self.assertIsNone(self.git.object_info("v2.0.0"))
+        self.run_git("tag", "v2.0.0")
+        self.assertIsNotNone(self.git.object_info("v2.0.0"))
+
+    def test_follows_directory_change(self) -> None:
+        self.assertIsNotNone(self.git.object_info("v1.0.0"))
+        with tempfile.TemporaryDirectory() as other:
+            os.chdir(other)
+            self.run_git("init", "--quiet")
+            self.assertIsNone(self.git.object_info("v1.0.0"))
+
+    def test_pickle(self) -> None:
+        self.assertIsNotNone(self.git.read_object("HEAD"))
+        g = pickle.loads(pickle.dumps(self.git))
+        self.addCleanup(g.close)
+        self.assertEqual(g.commit_message("HEAD"), "Title\n\nBody")
+
+    def test_invalid_revision(self) -> None:
+        with self.assertRaises(ValueError):
+            self.git.read_object("HEAD\nHEAD")
+
+
+class TestRefSnapshot(GitRepoTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.git = git.Git(read_files=False)
+        self.addCleanup(self.git.close)
+        self.run_git("branch", "-M", "master")
+        self.run_git("remote", "add", "origin", "https://github.com/TokTok/ci-tools")
+        self.run_git("update-ref", "refs/remotes/origin/master", "HEAD")
+        self.run_git(
+            "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/master"
+        )
+        self.calls: list[list[str]] = []
+        run_output = self.git._run_output
+
+        def counting_run_output(args: list[str]) -> str:
+            self.calls.append(args)
+            return run_output(args)
+
+        self.git._run_output = counting_run_output  # type: ignore
+
+    def test_queries_share_one_snapshot(self) -> None:
+        head = self.git.object_info("HEAD")
+        assert head is not None
+        self.assertTrue(self.git.is_up_to_date("master", "origin"))
+        self.assertEqual(self.git.current_branch(), "master")
+        self.assertEqual(self.git.branches(), ["master"])
+        self.assertEqual(self.git.branches("origin"), ["master"])
+        self.assertEqual(self.git.branch_sha("v1.0.0"), head.sha)
+        self.assertEqual(self.git.branch_sha("origin/master"), head.sha)
+        self.assertEqual(self.git.remotes(), ["origin"])
+        self.assertEqual([args[0] for args in self.calls], ["remote", "for-each-ref"])
+
+    def test_ref_details(self) -> None:
+        refs = self.git.refs().refs()
+        tag = refs["refs/tags/v1.0.0"]
+        self.assertEqual(tag.tagger_date, 1700000000)
+        self.assertNotEqual(tag.sha, tag.peeled)
+        self.assertEqual(tag.peeled, refs["refs/heads/master"].sha)
+        self.assertIsNone(refs["refs/tags/v1.0.1"].tagger_date)
+
+    def test_mutations_invalidate(self) -> None:
+        self.assertEqual(self.git.release_tags(), ["v1.0.1", "v1.0.0"])
+        self.assertTrue(self.git.release_tag_exists("v1.0.0"))
+        self.assertFalse(self.git.release_tag_exists("v1.1.0"))
+        self.assertEqual(self.calls.count(["tag", "--merged"]), 1)
+        self.git.tag("v1.1.0", "Release", sign=False)
+        self.assertEqual(self.git.release_tags(), ["v1.1.0", "v1.0.1", "v1.0.0"])
+        self.git.create_branch("release/v1.1.0", "master")
+        self.assertEqual(self.git.current_branch(), "release/v1.1.0")
+        self.assertEqual(self.git.release_branches(), ["release/v1.1.0"])
+
+    def test_detached_head(self) -> None:
+        self.git.checkout("v1.0.0")
+        self.assertEqual(self.git.current_branch(), "HEAD")
+        self.assertEqual(self.git.branch_sha("HEAD"), self.git.branch_sha("master"))
+
+    def test_unknown_revision_falls_back_to_git(self) -> None:
+        self.assertEqual(self.git.branch_sha("HEAD~0"), self.git.branch_sha("master"))
+        self.assertIn(["rev-list", "--max-count=1", "HEAD~0"], self.calls)
+
+
+class TestCommandMetrics(GitRepoTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.run_git("branch", "-M", "master")
+        self.run_git("remote", "add", "origin", "https://github.com/TokTok/ci-tools")
+        self.run_git("update-ref", "refs/remotes/origin/master", "HEAD")
+        self.metrics = metrics.CommandMetrics()
+        self.git = git.Git(command_metrics=self.metrics)
+        self.addCleanup(self.git.close)
+
+    def test_records_commands(self) -> None:
+        self.git.tag("v1.1.0", "Release", sign=False)
+        self.assertFalse(self.git.diff_exitcode())
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.git.files_changed("no-such-ref")
+        commands = self.metrics.commands()
+        self.assertEqual(commands["tag"].calls, 1)
+        self.assertEqual(commands["diff"].calls, 2)
+        self.assertEqual(commands["diff"].failures, 1)
+
+    def test_release_queries_budget(self) -> None:
+        # What create_release asks before deciding what to do.
+        with self.metrics.budget(3):
+            for _ in range(10):
+                self.git.current_branch()
+                self.git.branch_sha("HEAD")
+                self.git.is_up_to_date("master", "origin")
+                self.git.release_tags()
+                self.git.release_tag_exists("v1.0.0")
+                self.git.tag_has_signature("v1.0.0")
+                self.git.commit_message("HEAD")
+
+    def test_budget_after_mutation(self) -> None:
+        self.git.release_tags()
+        self.git.tag("v1.1.0", "Release", sign=False)
+        # One for-each-ref and one tag --merged to see the new tag.
+        with self.metrics.budget(2):
+            self.assertIn("v1.1.0", self.git.release_tags())
+            self.assertTrue(self.git.release_tag_exists("v1.1.0"))
+
+    def test_trace_configured_after_import(self) -> None:
+        trace = os.path.join(os.getcwd(), "trace.jsonl")
+        script = (
+            "import os, lib.git as g; "
+            f"os.environ['CI_TOOLS_GIT_TRACE'] = {trace!r}; "
+            "g.Git(read_files=False).current_branch()"
+        )
+        subprocess.check_call(  # nosec
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        with open(trace) as f:
+            self.assertIn('"args"', f.read())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,214 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import os
+import re
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# The order in which git tries to expand a short ref name (see gitrevisions).
+REF_PREFIXES = ("refs/", "refs/tags/", "refs/heads/", "refs/remotes/")
+
+_SHA = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+# Refs that belong to a single worktree rather than the whole repository.
+_PER_WORKTREE = re.compile(r"^(?:[A-Z_]+|refs/(?:bisect|worktree|rewritten)/.*)$")
+
+# Config sections that pull in other files or use the deprecated
+# [remote.name] syntax: the caller has to ask git for the remotes.
+_CONFIG_UNSUPPORTED = re.compile(
+    r"^\s*\[\s*(?:include(?:if)?\b|remote\.)", re.IGNORECASE
+)
+_CONFIG_REMOTE = re.compile(
+    r'^\s*\[\s*remote\s+"((?:[^"\\]|\\.)*)"\s*\]', re.IGNORECASE
+)
+# Sections that (may) add remotes, in config files other than the repository's.
+_CONFIG_REMOTE_SOURCE = re.compile(
+    r"^\s*\[\s*(?:include(?:if)?|remote)\b", re.IGNORECASE
+)
+
+# Where git may find a system-wide config file. Which one it uses depends on
+# how it was built, so we look at all of them.
+SYSTEM_CONFIGS = (
+    "/etc/gitconfig",
+    "/usr/local/etc/gitconfig",
+    "/opt/homebrew/etc/gitconfig",
+)
+
+# Symbolic refs pointing to symbolic refs are followed this far.
+_MAX_SYMREF_DEPTH = 5
+
+
+class GitDir:
+    """Reads HEAD, refs and remotes from the files in .git, without running git.
+
+    Only the plain layout is understood: a .git directory, or a .git file
+    with a "gitdir:" line as in worktrees and submodules, with loose refs
+    and a packed-refs file. Methods return None when they can't be sure of
+    the answer, and the caller asks git instead.
+    """
+
+    def __init__(self, worktree: str, git_dir: str, common_dir: str) -> None:
+        self.worktree = worktree
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        # Parsed files by path, with the (mtime, size) they were parsed at.
+        self._parsed: dict[str, tuple[tuple[int, int], object]] = {}
+
+    @staticmethod
+    def find(start: str) -> "GitDir | None":
+        """Find the repository containing a directory, like git would."""
+        if any(v in os.environ for v in ("GIT_DIR", "GIT_WORK_TREE", "GIT_COMMON_DIR")):
+            return None
+        path = os.path.abspath(start)
+        while True:
+            dot_git = os.path.join(path, ".git")
+            if os.path.isdir(dot_git):
+                return GitDir._open(path, dot_git)
+            if os.path.isfile(dot_git):
+                with open(dot_git, "r") as f:
+                    line = f.readline().strip()
+                if not line.startswith("gitdir: "):
+                    return None
+                git_dir = os.path.join(path, line.removeprefix("gitdir: "))
+                return GitDir._open(path, os.path.normpath(git_dir))
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    @staticmethod
+    def _open(worktree: str, git_dir: str) -> "GitDir | None":
+        if not os.path.isfile(os.path.join(git_dir, "HEAD")):
+            return None
+        common_dir = git_dir
+        commondir_file = os.path.join(git_dir, "commondir")
+        if os.path.isfile(commondir_file):
+            with open(commondir_file, "r") as f:
+                common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+        if os.path.exists(os.path.join(common_dir, "reftable")):
+            return None
+        return GitDir(os.path.realpath(worktree), git_dir, common_dir)
+
+    def _cached(self, path: str, parse: Callable[[str], T]) -> T | None:
+        """Parse a file, reusing the last result while the file is unchanged."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._parsed.get(path)
+        if cached is None or cached[0] != stamp:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = (stamp, parse(f.read()))
+            self._parsed[path] = cached
+        return cached[1]  # type: ignore[return-value]
+
+    def _packed_refs(self) -> dict[str, str]:
+        def parse(text: str) -> dict[str, str]:
+            refs: dict[str, str] = {}
+            for line in text.splitlines():
+                if line and line[0] not in "#^":
+                    sha, _, name = line.partition(" ")
+                    refs[name] = sha
+            return refs
+
+        path = os.path.join(self.common_dir, "packed-refs")
+        return self._cached(path, parse) or {}
+
+    def _read_ref(self, name: str) -> str | None:
+        """The content of a ref: a SHA or "ref: <target>"."""
+        base = self.git_dir if _PER_WORKTREE.match(name) else self.common_dir
+        try:
+            with open(os.path.join(base, name), "r") as f:
+                return f.read().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return self._packed_refs().get(name)
+
+    def head(self) -> str | None:
+        """The content of HEAD: "ref: <branch>" or a detached commit SHA."""
+        return self._read_ref("HEAD")
+
+    def ref_sha(self, name: str) -> str | None:
+        """The SHA a full ref name points to, following symbolic refs."""
+        for _ in range(_MAX_SYMREF_DEPTH):
+            value = self._read_ref(name)
+            if value is None:
+                return None
+            if not value.startswith("ref: "):
+                return value if _SHA.fullmatch(value) else None
+            name = value.removeprefix("ref: ")
+        return None
+
+    def resolve(self, name: str) -> str | None:
+        """The commit a branch name like "master" or "origin/master" means.
+
+        Tags (which may need peeling) and anything that isn't a ref name
+        give None.
+        """
+        if name == "HEAD":
+            return self.ref_sha("HEAD")
+        if not name or name.startswith("/") or ".." in name or "\\" in name:
+            return None
+        candidates = [p + name for p in REF_PREFIXES] + [f"refs/remotes/{name}/HEAD"]
+        if name.startswith("refs/") or _PER_WORKTREE.match(name):
+            candidates.insert(0, name)
+        for full_name in candidates:
+            if self._read_ref(full_name) is not None:
+                if full_name.startswith("refs/tags/"):
+                    return None
+                return self.ref_sha(full_name)
+        return None
+
+    def _other_configs(self) -> list[str] | None:
+        """The config files besides the repository's that git would read.
+
+        None if config also comes from somewhere we don't read (the
+        environment).
+        """
+        if any(v in os.environ for v in ("GIT_CONFIG_COUNT", "GIT_CONFIG_PARAMETERS")):
+            return None
+        paths = [os.path.join(self.git_dir, "config.worktree")]
+        if "GIT_CONFIG_GLOBAL" in os.environ:
+            paths.append(os.environ["GIT_CONFIG_GLOBAL"])
+        else:
+            home = os.path.expanduser("~")
+            xdg = os.getenv("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+            paths += [
+                os.path.join(xdg, "git", "config"),
+                os.path.join(home, ".gitconfig"),
+            ]
+        if "GIT_CONFIG_SYSTEM" in os.environ:
+            paths.append(os.environ["GIT_CONFIG_SYSTEM"])
+        elif not os.getenv("GIT_CONFIG_NOSYSTEM"):
+            paths += SYSTEM_CONFIGS
+        return paths
+
+    def remotes(self) -> list[str] | None:
+        """The names of the remotes configured in the repository, sorted.
+
+        None if remotes may also be configured outside the repository's
+        config file: in an included file, the worktree, global or system
+        config, or the environment.
+        """
+
+        def parse(text: str) -> list[str] | None:
+            if any(_CONFIG_UNSUPPORTED.match(line) for line in text.splitlines()):
+                return None
+            names = {
+                re.sub(r"\\(.)", r"\1", m.group(1))
+                for m in map(_CONFIG_REMOTE.match, text.splitlines())
+                if m
+            }
+            return sorted(names)
+
+        def adds_remotes(text: str) -> bool:
+            return any(_CONFIG_REMOTE_SOURCE.match(line) for line in text.splitlines())
+
+        others = self._other_configs()
+        if others is None:
+            return None
+        for path in others:
+            if path != os.devnull and self._cached(path, adds_remotes):
+                return None
+        return self._cached(os.path.join(self.common_dir, "config"), parse)
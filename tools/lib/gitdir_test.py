@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import os
+import subprocess  # nosec
+import tempfile
+import unittest
+import unittest.mock
+
+from lib import git, gitdir
+
+
+def run_git(*args: str) -> str:
+    return subprocess.check_output(["git", *args]).decode("utf-8").strip()  # nosec
+
+
+class GitDirTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        self.repo = os.path.realpath(os.path.join(tmp.name, "repo"))
+        os.makedirs(self.repo)
+        os.chdir(self.repo)
+        patcher = unittest.mock.patch.dict(
+            os.environ,
+            {
+                "GIT_AUTHOR_NAME": "Alice",
+                "GIT_AUTHOR_EMAIL": "alice@example.com",
+                "GIT_COMMITTER_NAME": "Alice",
+                "GIT_COMMITTER_EMAIL": "alice@example.com",
+                "GIT_CONFIG_GLOBAL": os.devnull,
+                "GIT_CONFIG_NOSYSTEM": "1",
+            },
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        run_git("init", "--quiet", "--initial-branch=master")
+        run_git("commit", "--quiet", "--allow-empty", "-m", "Initial")
+        run_git("remote", "add", "upstream", "https://github.com/TokTok/ci-tools")
+        run_git("remote", "add", "origin", "https://github.com/alice/ci-tools")
+        run_git("update-ref", "refs/remotes/origin/master", "HEAD")
+        run_git(
+            "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/master"
+        )
+        run_git("tag", "--annotate", "--message", "Release", "v1.0.0")
+
+    def files(self) -> gitdir.GitDir:
+        files = gitdir.GitDir.find(os.getcwd())
+        assert files is not None
+        return files
+
+    def assert_matches_git(self, files: gitdir.GitDir) -> None:
+        self.assertEqual(files.worktree, run_git("rev-parse", "--show-toplevel"))
+        self.assertEqual(files.remotes(), run_git("remote").splitlines())
+        for name in ("HEAD", "master", "origin/master", "origin", "refs/heads/master"):
+            self.assertEqual(files.resolve(name), run_git("rev-parse", name), name)
+
+    def test_loose_refs(self) -> None:
+        files = self.files()
+        self.assert_matches_git(files)
+        self.assertEqual(files.head(), "ref: refs/heads/master")
+
+    def test_packed_refs(self) -> None:
+        run_git("pack-refs", "--all")
+        self.assertFalse(os.path.exists(".git/refs/heads/master"))
+        files = self.files()
+        self.assert_matches_git(files)
+        # A loose ref overrides the packed one.
+        run_git("commit", "--quiet", "--allow-empty", "-m", "Second")
+        self.assert_matches_git(files)
+
+    def test_subdirectory(self) -> None:
+        os.makedirs("a/b")
+        os.chdir("a/b")
+        self.assert_matches_git(self.files())
+
+    def test_worktree(self) -> None:
+        run_git("worktree", "add", "--quiet", "-b", "feature", "../feature")
+        os.chdir("../feature")
+        run_git("commit", "--quiet", "--allow-empty", "-m", "Feature")
+        files = self.files()
+        self.assert_matches_git(files)
+        self.assertEqual(files.head(), "ref: refs/heads/feature")
+        self.assertEqual(files.resolve("feature"), run_git("rev-parse", "HEAD"))
+
+    def test_detached_head(self) -> None:
+        run_git("checkout", "--quiet", "--detach")
+        files = self.files()
+        self.assertEqual(files.head(), run_git("rev-parse", "HEAD"))
+        self.assertEqual(files.resolve("HEAD"), run_git("rev-parse", "HEAD"))
+
+    def test_defers_to_git(self) -> None:
+        files = self.files()
+        # Tags may need peeling; revisions aren't refs.
+        self.assertIsNone(files.resolve("v1.0.0"))
+        self.assertIsNone(files.resolve("HEAD~0"))
+        self.assertIsNone(files.resolve("../config"))
+        with open(".git/config", "a") as f:
+            f.write("[include]\n\tpath = other.config\n")
+        self.assertIsNone(files.remotes())
+        with unittest.mock.patch.dict(os.environ, {"GIT_DIR": ".git"}):
+            self.assertIsNone(gitdir.GitDir.find(os.getcwd()))
+
+    def test_remotes_from_other_configs(self) -> None:
+        files = self.files()
+        global_config = os.path.join(os.path.dirname(self.repo), "gitconfig")
+        with open(global_config, "w") as f:
+            f.write('[remote "mirror"]\n\turl = https://example.com/ci-tools\n')
+        with unittest.mock.patch.dict(os.environ, {"GIT_CONFIG_GLOBAL": global_config}):
+            self.assertIsNone(files.remotes())
+            g = git.Git()
+            self.addCleanup(g.close)
+            self.assertEqual(g.remotes(), ["mirror", "origin", "upstream"])
+            self.assertEqual(g.remotes(), run_git("remote").splitlines())
+        with unittest.mock.patch.dict(os.environ, {"GIT_CONFIG_COUNT": "0"}):
+            self.assertIsNone(files.remotes())
+        with open(".git/config.worktree", "w") as f:
+            f.write("[include]\n\tpath = remotes.config\n")
+        self.assertIsNone(files.remotes())
+
+    def test_git_provider_runs_no_git(self) -> None:
+        g = git.Git()
+        self.addCleanup(g.close)
+        with unittest.mock.patch("subprocess.check_output") as check_output:
+            self.assertEqual(g.current_branch(), "master")
+            self.assertEqual(g.remotes(), ["origin", "upstream"])
+            self.assertEqual(g.root(), self.repo)
+            self.assertEqual(
+                g.branch_sha("origin/master"), g.branch_sha("refs/heads/master")
+            )
+        check_output.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
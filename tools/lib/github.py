@@ -1,15 +1,33 @@
 #!/usr/bin/env python3
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2024-2026 The TokTok team
+import base64
+import hashlib
+import io
 import os
 import re
+import tempfile
+import threading
+import time
 import urllib.parse
-from dataclasses import dataclass
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import IO, Any
+from typing import IO, Any, Callable, Iterator
 
 import requests
-from lib import git, types
+import requests.adapters
+from lib import (
+    cassette,
+    git,
+    http_cache,
+    metrics,
+    ratelimit,
+    response_cache,
+    retry,
+    types,
+)
 
 
 class AuthLevel(Enum):
@@ -138,6 +156,9 @@ class ReleaseAsset:
     content_type: str
     url: str
     browser_download_url: str
+    size: int = 0
+    # "sha256:<hex>", if GitHub has computed it.
+    digest: str | None = None
 
     @staticmethod
     def fromJSON(asset: dict[str, Any]) -> "ReleaseAsset":
@@ -147,9 +168,159 @@ class ReleaseAsset:
             content_type=str(asset["content_type"]),
             url=str(asset["url"]),
             browser_download_url=str(asset["browser_download_url"]),
+            size=int(asset.get("size", 0)),
+            digest=asset.get("digest"),
         )
 
 
+@dataclass
+class AssetUpload:
+    """A file to upload as a release asset."""
+
+    name: str
+    content_type: str
+    # Path of the file, or a seekable binary stream positioned at its start.
+    source: str | IO[bytes]
+
+
+@dataclass
+class UploadResult:
+    name: str
+    size: int
+    seconds: float
+    # True if an identical asset already existed, so nothing was uploaded.
+    skipped: bool
+
+    def throughput(self) -> float:
+        """Upload speed in bytes per second."""
+        return self.size / self.seconds if self.seconds > 0 else 0.0
+
+
+# How many of the newest releases the snapshot query looks through for the
+# release tag. A release in progress is almost always among them.
+SNAPSHOT_RELEASES = 10
+
+# `repository.release(tagName:)` doesn't return draft releases, so we look for
+# the tag in the newest releases instead, which include drafts.
+RELEASE_SNAPSHOT_QUERY = """
+query ReleaseSnapshot(
+  $owner: String!
+  $name: String!
+  $head: String!
+  $base: String!
+  $releases: Int!
+  $issue: Int!
+  $withIssue: Boolean!
+) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(headRefName: $head, baseRefName: $base, first: 100) {
+      nodes {
+        number
+        headRepositoryOwner {
+          login
+        }
+      }
+    }
+    releases(first: $releases, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        tagName
+        publishedAt
+        releaseAssets(first: 100) {
+          nodes {
+            name
+          }
+          pageInfo {
+            hasNextPage
+          }
+        }
+      }
+      pageInfo {
+        hasNextPage
+      }
+    }
+    issue(number: $issue) @include(if: $withIssue) {
+      body
+    }
+  }
+}
+"""
+
+
+@dataclass
+class ReleaseSnapshot:
+    """The GitHub state of a release in progress, read in one round trip."""
+
+    # Whether a PR exists for the release branch (in any state).
+    has_pr: bool
+    release_exists: bool
+    release_published: bool
+    asset_names: list[str]
+    # Whether `asset_names` is complete (False if there are too many assets to
+    # fetch in one query).
+    assets_complete: bool
+    issue_body: str | None
+    # Whether the release fields are known (False if the tag wasn't among the
+    # releases the query looked at, but there are older ones).
+    release_complete: bool = True
+
+    @staticmethod
+    def fromJSON(repo: dict[str, Any], head_owner: str, tag: str) -> "ReleaseSnapshot":
+        releases = repo["releases"]
+        release = next((r for r in releases["nodes"] if r["tagName"] == tag), None)
+        assets = release["releaseAssets"] if release else None
+        issue = repo.get("issue")
+        return ReleaseSnapshot(
+            has_pr=any(
+                (pr["headRepositoryOwner"] or {}).get("login") == head_owner
+                for pr in repo["pullRequests"]["nodes"]
+            ),
+            release_exists=release is not None,
+            release_published=bool(release and release["publishedAt"]),
+            asset_names=[str(a["name"]) for a in assets["nodes"]] if assets else [],
+            assets_complete=not assets or not assets["pageInfo"]["hasNextPage"],
+            issue_body=str(issue["body"]) if issue else None,
+            release_complete=release is not None
+            or not releases["pageInfo"]["hasNextPage"],
+        )
+
+
+def _blob_sha(data: bytes) -> str:
+    """Compute the git object ID of a blob with the given content."""
+    return hashlib.sha1(
+        b"blob %d\0" % len(data) + data, usedforsecurity=False
+    ).hexdigest()
+
+
+def _blob_json(data: bytes) -> dict[str, str]:
+    """The request body for creating a blob with the given content."""
+    try:
+        return {"content": data.decode("utf-8"), "encoding": "utf-8"}
+    except UnicodeDecodeError:
+        return {"content": base64.b64encode(data).decode("ascii"), "encoding": "base64"}
+
+
+def _file_digest(f: IO[bytes]) -> str:
+    digest = hashlib.sha256()
+    while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _extract_member(z: zipfile.ZipFile, info: zipfile.ZipInfo, path: str) -> bool:
+    """Write a zip member to `path` unless the file already has its content.
+
+    Returns whether the file was written.
+    """
+    if os.path.exists(path) and os.path.getsize(path) == info.file_size:
+        with open(path, "rb") as f, z.open(info) as member:
+            if _file_digest(f) == _file_digest(member):
+                return False
+    with open(path, "wb") as out, z.open(info) as member:
+        while chunk := member.read(DOWNLOAD_CHUNK_SIZE):
+            out.write(chunk)
+    return True
+
+
 def _process_error(response: requests.Response) -> None:
     try:
         response.raise_for_status()
@@ -158,7 +329,60 @@ def _process_error(response: requests.Response) -> None:
         raise e
 
 
-api_requests: list[str] = []
+# The largest page size GitHub allows for REST list endpoints.
+MAX_PER_PAGE = 100
+
+# How often to retry a request that was rejected by a rate limit.
+RATE_LIMIT_RETRIES = 3
+
+# Downloads are written to their destination in chunks of this size.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# How often to resume a download after the connection dropped.
+DOWNLOAD_RESUMES = 3
+
+# Artifact zips up to this size are kept in memory while extracting; larger
+# ones are spooled to a temporary file.
+ARTIFACT_SPOOL_SIZE = 16 * 1024 * 1024
+
+# How many release assets to upload at the same time.
+UPLOAD_WORKERS = 4
+
+UPLOADS_URL = "https://uploads.github.com"
+
+
+@dataclass
+class HttpConfig:
+    """Connection pooling and timeout settings for the GitHub provider."""
+
+    # Number of hosts to keep connection pools for (api, uploads, and the
+    # object storage that asset downloads redirect to).
+    pool_connections: int = 4
+    # Maximum number of keep-alive connections per host.
+    pool_maxsize: int = 16
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+    # Directory for the persistent conditional-request cache, or None to
+    # disable it.
+    cache_dir: str | None = field(default_factory=http_cache.default_directory)
+    # Maximum number of responses kept in memory.
+    cache_entries: int = 512
+
+    def timeout(self) -> tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+
+@dataclass
+class _ReleaseIndex:
+    """Release IDs by tag name, filled lazily by a sweep over /releases."""
+
+    ids: dict[str, int] = field(default_factory=dict)
+    sweep: Iterator[Any] | None = None
+    done: bool = False
+
+    def __getstate__(self) -> dict[str, Any]:
+        # A generator can't be pickled; the sweep starts over instead.
+        return {"ids": self.ids, "sweep": None, "done": False}
 
 
 class GitHub:
@@ -167,17 +391,41 @@ class GitHub:
     def __init__(
         self,
         git_prov: git.Git = git.DEFAULT_GIT,
-        api_url: str = os.getenv("GITHUB_API_URL") or "https://api.github.com",
-        github_token: str | None = os.getenv("GITHUB_TOKEN"),
-        releaser_token: str | None = os.getenv("TOKEN_RELEASES"),
-        repo_name: str | None = os.getenv("GITHUB_REPOSITORY"),
+        api_url: str | None = None,
+        github_token: str | None = None,
+        releaser_token: str | None = None,
+        repo_name: str | None = None,
+        http: HttpConfig | None = None,
+        rate_limiter: ratelimit.RateLimiter | None = None,
+        request_metrics: metrics.Metrics | None = None,
+        transport: requests.adapters.BaseAdapter | None = None,
+        retry_policy: retry.RetryPolicy | None = None,
     ) -> None:
         self.git = git_prov
-        self._api_url = api_url
-        self._github_token = github_token
-        self._releaser_token = releaser_token
-        self._repo_name = repo_name
-        self._cache: dict[tuple[Any, ...], Any] = {}
+        self._api_url = (
+            api_url or os.getenv("GITHUB_API_URL") or "https://api.github.com"
+        )
+        self._github_token = github_token or os.getenv("GITHUB_TOKEN")
+        self._releaser_token = releaser_token or os.getenv("TOKEN_RELEASES")
+        self._repo_name = repo_name or os.getenv("GITHUB_REPOSITORY")
+        self._http = http or HttpConfig()
+        self._limiter = rate_limiter or ratelimit.RateLimiter()
+        self._retry = retry_policy or retry.RetryPolicy()
+        self._breaker = retry.CircuitBreaker(
+            self._retry.failure_threshold, self._retry.reset_timeout
+        )
+        self._metrics = request_metrics or metrics.REGISTRY
+        # Replaces the pooled HTTP adapter, e.g. with a `cassette.Cassette`.
+        self._transport = transport
+        self._cache = response_cache.ResponseCache(self._http.cache_entries)
+        self._session_lock = threading.Lock()
+        self._session_pid: int | None = None
+        self._session_obj: requests.Session | None = None
+        # Guards the release index, which lives in the response cache.
+        self._release_lock = threading.Lock()
+        self._disk_cache = (
+            http_cache.HttpCache(self._http.cache_dir) if self._http.cache_dir else None
+        )
 
         if self._github_token:
             print("Authorization with GITHUB_TOKEN")
@@ -188,6 +436,273 @@ class GitHub:
         if self._releaser_token:
             print("Authorization with TOKEN_RELEASES")
 
+    def __getstate__(self) -> dict[str, Any]:
+        # Sessions and locks can't be pickled (e.g. when passing the provider
+        # to a multiprocessing pool); the receiving process makes its own.
+        state = self.__dict__.copy()
+        state["_session_lock"] = None
+        state["_session_pid"] = None
+        state["_session_obj"] = None
+        state["_release_lock"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._session_lock = threading.Lock()
+        self._release_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        """Get the pooled keep-alive session shared by all API calls.
+
+        The session is shared between threads (the urllib3 connection pool is
+        thread-safe), but never across a fork: a child process must not reuse
+        the sockets of its parent, so it gets a fresh session.
+        """
+        with self._session_lock:
+            if self._session_obj is None or self._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = self._transport or requests.adapters.HTTPAdapter(
+                    pool_connections=self._http.pool_connections,
+                    pool_maxsize=self._http.pool_maxsize,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session_obj = session
+                self._session_pid = os.getpid()
+            return self._session_obj
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        with self._session_lock:
+            if self._session_obj is not None and self._session_pid == os.getpid():
+                self._session_obj.close()
+            self._session_obj = None
+            self._session_pid = None
+
+    def _bucket(self, auth: AuthLevel) -> str:
+        """Get the name of the rate limit budget used by an auth level."""
+        if auth == AuthLevel.RELEASER:
+            return AuthLevel.RELEASER.name
+        return AuthLevel.GITHUB.name if self._github_token else "ANONYMOUS"
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        auth: AuthLevel,
+        headers: dict[str, str] | None = None,
+        write: bool | None = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send an HTTP request through the pooled session.
+
+        Requests are paced by the rate limiter. Writes (any method other than
+        GET and HEAD, unless `write` says otherwise) have the highest
+        priority; reads made inside `ratelimit.priority(Priority.LOW)` yield
+        to everything else when the budget runs low. Requests rejected by a
+        rate limit are retried once the limit allows it. Reads and idempotent
+        writes that fail with a server error or a dropped connection are
+        retried with backoff, and endpoints that keep failing are given a
+        rest by the circuit breaker.
+        """
+        bucket = self._bucket(auth)
+        resource = ratelimit.resource(urllib.parse.urlsplit(url).path)
+        if write is None:
+            write = method not in ("GET", "HEAD")
+        priority = ratelimit.Priority.HIGH if write else ratelimit.current_priority()
+        headers = {**self._auth_headers(auth=auth), **(headers or {})}
+        endpoint = metrics.endpoint_template(method, url)
+        data: Any = kwargs.get("data")
+        start = data.tell() if hasattr(data, "seek") else None
+        # A consumed stream can't be sent again, but a seekable file or an
+        # in-memory body can.
+        resendable = data is None or isinstance(data, (bytes, str)) or start is not None
+        rate_limited = 0
+        failures = 0
+        while True:
+            self._breaker.check(endpoint)
+            try:
+                self._limiter.acquire(bucket, priority, write, resource)
+                began = time.monotonic()
+                response = self._session().request(
+                    method, url, headers=headers, timeout=self._http.timeout(), **kwargs
+                )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                self._breaker.failure(endpoint)
+                if not (
+                    resendable
+                    and failures + 1 < self._retry.attempts
+                    and self._retry.retryable(method, write, e)
+                ):
+                    raise
+                wait = self._retry.backoff(failures)
+                failures += 1
+                message = (
+                    f"{type(e).__name__} on {method} {url}; retrying in {wait:.1f}s"
+                )
+            except BaseException:
+                # Count it against the endpoint, so a circuit breaker probe
+                # doesn't stay in flight forever.
+                self._breaker.failure(endpoint)
+                raise
+            else:
+                self._metrics.record(
+                    method,
+                    url,
+                    response.status_code,
+                    time.monotonic() - began,
+                    (
+                        int(response.headers.get("Content-Length", 0))
+                        if kwargs.get("stream")
+                        else len(response.content)
+                    ),
+                    response.headers,
+                )
+                self._limiter.update(bucket, response.headers, resource)
+                if response.status_code in retry.TRANSIENT_STATUSES:
+                    self._breaker.failure(endpoint)
+                    if not (
+                        resendable
+                        and failures + 1 < self._retry.attempts
+                        and self._retry.retryable(method, write)
+                    ):
+                        break
+                    wait = self._retry.backoff(failures, response.headers)
+                    failures += 1
+                    message = (
+                        f"HTTP {response.status_code} on {method} {url};"
+                        f" retrying in {wait:.1f}s"
+                    )
+                else:
+                    self._breaker.success(endpoint)
+                    limit_wait = self._limiter.backoff(
+                        bucket, response.status_code, response.headers, resource
+                    )
+                    if (
+                        limit_wait is None
+                        or rate_limited == RATE_LIMIT_RETRIES
+                        or not resendable
+                    ):
+                        break
+                    rate_limited += 1
+                    # The rate limiter makes the next `acquire` wait.
+                    wait = 0.0
+                    message = (
+                        f"Rate limited on {method} {url}; retrying in {limit_wait:.0f}s"
+                    )
+                # Give the connection of a streamed response back to the pool.
+                response.close()
+            print(message)
+            self._metrics.record_retry(method, url)
+            if start is not None:
+                data.seek(start)
+            if wait > 0:
+                retry.sleep(wait)
+        if write:
+            # Make sure we read our own writes.
+            self._cache.invalidate(self._cache_path(url))
+        return response
+
+    def _cache_path(self, url: str) -> str:
+        """Get the API-relative path (as the response cache keys it) of a URL.
+
+        The API may be served under a path prefix (e.g. GitHub Enterprise's
+        /api/v3), and uploads go to a different host with a prefix of its own.
+        """
+        path = urllib.parse.urlsplit(url).path
+        prefix = urllib.parse.urlsplit(self._api_url).path.rstrip("/")
+        if prefix and path.startswith(prefix + "/"):
+            return path[len(prefix) :]
+        repos = path.find("/repos/")
+        return path[repos:] if repos > 0 else path
+
+    def _download(
+        self,
+        url: str,
+        auth: AuthLevel,
+        out: IO[bytes],
+        headers: dict[str, str] | None = None,
+    ) -> str:
+        """Stream a download into `out` and return its SHA-256 hex digest.
+
+        The body is written in chunks as it arrives, so memory use doesn't
+        depend on the size of the download. If the connection drops, the rest
+        is requested with a Range header. If the server ignores the range and
+        sends everything again, `out` is rewound, which requires it to be
+        seekable.
+        """
+        digest = hashlib.sha256()
+        written = 0
+        resumes = 0
+        while True:
+            range_headers = {"Range": f"bytes={written}-"} if written else {}
+            response = self._request(
+                "GET",
+                url,
+                auth,
+                headers={**(headers or {}), **range_headers},
+                stream=True,
+            )
+            with response:
+                self._process_error(response)
+                if written and response.status_code != 206:
+                    out.seek(out.tell() - written)
+                    out.truncate()
+                    digest = hashlib.sha256()
+                    written = 0
+                try:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        out.write(chunk)
+                        digest.update(chunk)
+                        written += len(chunk)
+                    return digest.hexdigest()
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError,
+                ) as e:
+                    if resumes == DOWNLOAD_RESUMES:
+                        raise
+                    resumes += 1
+                    print(f"Download interrupted after {written} bytes; resuming: {e}")
+
+    def _get(
+        self, url: str, auth: AuthLevel, params: dict[str, str | int]
+    ) -> tuple[Any, str | None]:
+        """GET a JSON resource, revalidating against the on-disk cache.
+
+        Returns the decoded body and the URL of the next page, if any. If the
+        server responds with 304 Not Modified (which doesn't count against the
+        rate limit), the body is served from disk.
+        """
+        headers: dict[str, str] = {}
+        key = None
+        entry = None
+        if self._disk_cache is not None:
+            # Hash the credentials into the key so different tokens never
+            # share cache entries.
+            authorization = self._auth_headers(auth=auth).get("Authorization", "")
+            key = self._disk_cache.key(url, auth.name, authorization, params)
+            entry = self._disk_cache.load(key)
+            if entry is not None:
+                headers.update(entry.conditional_headers())
+        response = self._request("GET", url, auth, headers=headers, params=params)
+        if entry is not None and response.status_code == 304:
+            return entry.json(), entry.next_url
+        self._process_error(response)
+        next_url = response.links.get("next", {}).get("url")
+        if self._disk_cache is not None and key is not None:
+            self._disk_cache.store(
+                key,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                body=response.text,
+                next_url=next_url,
+            )
+        return response.json(), next_url
+
     def _process_error(self, response: requests.Response) -> None:
         try:
             response.raise_for_status()
@@ -211,14 +726,8 @@ class GitHub:
         auth: AuthLevel = AuthLevel.OPTIONAL,
         params: tuple[tuple[str, str | int], ...] = tuple(),
     ) -> Any:
-        api_requests.append(f"GET {self._api_url}{url}")
-        response = requests.get(
-            f"{self._api_url}{url}",
-            headers=self._auth_headers(auth=auth),
-            params=dict(params),
-        )
-        self._process_error(response)
-        return response.json()
+        body, _ = self._get(f"{self._api_url}{url}", auth, dict(params))
+        return body
 
     def api_post(
         self,
@@ -227,10 +736,10 @@ class GitHub:
         json: Any = None,
         params: dict[str, Any] | None = None,
     ) -> Any:
-        api_requests.append(f"POST {self._api_url}{url}")
-        response = requests.post(
+        response = self._request(
+            "POST",
             f"{self._api_url}{url}",
-            headers=self._auth_headers(auth=auth),
+            auth,
             json=json,
             params=params,
         )
@@ -245,10 +754,10 @@ class GitHub:
         auth: AuthLevel = AuthLevel.GITHUB,
         json: Any = None,
     ) -> Any:
-        api_requests.append(f"PATCH {self._api_url}{url}")
-        response = requests.patch(
+        response = self._request(
+            "PATCH",
             f"{self._api_url}{url}",
-            headers=self._auth_headers(auth=auth),
+            auth,
             json=json,
         )
         self._process_error(response)
@@ -262,10 +771,10 @@ class GitHub:
         auth: AuthLevel = AuthLevel.GITHUB,
         json: Any = None,
     ) -> Any:
-        api_requests.append(f"PUT {self._api_url}{url}")
-        response = requests.put(
+        response = self._request(
+            "PUT",
             f"{self._api_url}{url}",
-            headers=self._auth_headers(auth=auth),
+            auth,
             json=json,
         )
         self._process_error(response)
@@ -279,10 +788,10 @@ class GitHub:
         auth: AuthLevel = AuthLevel.GITHUB,
         json: Any = None,
     ) -> None:
-        api_requests.append(f"DELETE {self._api_url}{url}")
-        response = requests.delete(
+        response = self._request(
+            "DELETE",
             f"{self._api_url}{url}",
-            headers=self._auth_headers(auth=auth),
+            auth,
             json=json,
         )
         self._process_error(response)
@@ -293,24 +802,86 @@ class GitHub:
         auth: AuthLevel = AuthLevel.OPTIONAL,
         params: tuple[tuple[str, str | int], ...] = tuple(),
     ) -> Any:
-        key = (url, auth, params)
-        if key not in self._cache:
-            self._cache[key] = self.api_uncached(url, auth, params)
-        return self._cache[key]
+        # Concurrent identical reads share one request.
+        found, value = self._cache.get_or_load(
+            (url, auth, params), url, lambda: self.api_uncached(url, auth, params)
+        )
+        if found:
+            self._metrics.record_cache_hit("GET", url)
+        return value
+
+    def api_paginated(
+        self,
+        url: str,
+        auth: AuthLevel = AuthLevel.OPTIONAL,
+        params: tuple[tuple[str, str | int], ...] = tuple(),
+        key: str | None = None,
+    ) -> Iterator[Any]:
+        """Iterate over all items of a paginated list endpoint.
+
+        Pages are requested with the maximum page size and fetched lazily by
+        following the `Link: rel="next"` header, so a caller that stops early
+        doesn't pay for the remaining pages. For endpoints that wrap the list
+        in an object (e.g. `{"workflow_runs": [...]}`), pass the `key`.
+        """
+        query: dict[str, str | int] = {"per_page": MAX_PER_PAGE, **dict(params)}
+        next_url: str | None = f"{self._api_url}{url}"
+        while next_url:
+            page, next_url = self._get(next_url, auth, query)
+            yield from page[key] if key is not None else page
+            # The next link already carries the query string.
+            query = {}
+
+    def api_list(
+        self,
+        url: str,
+        auth: AuthLevel = AuthLevel.OPTIONAL,
+        params: tuple[tuple[str, str | int], ...] = tuple(),
+        key: str | None = None,
+    ) -> list[Any]:
+        """Get all items of a paginated list endpoint (cached)."""
+        found, items = self._cache.get_or_load(
+            ("list", url, auth, params, key),
+            url,
+            lambda: list(self.api_paginated(url, auth, params, key)),
+        )
+        if found:
+            self._metrics.record_cache_hit("GET", url)
+        return list(items)
 
     def clear_cache(self) -> None:
         """Clear the cache of API calls."""
         self._cache.clear()
 
-    def graphql(self, query: str) -> Any:
-        """Call the GitHub GraphQL API with the given query."""
-        response = requests.post(
+    def cache_stats(self) -> response_cache.CacheStats:
+        """Get the hit, miss and eviction counts of the response cache."""
+        return self._cache.stats
+
+    def request_metrics(self) -> metrics.Metrics:
+        """Get the per-endpoint request telemetry."""
+        return self._metrics
+
+    def _invalidate_releases(self) -> None:
+        """Forget the release index, e.g. after creating or editing a release.
+
+        Writes through `_request` already do this; this also covers providers
+        that override the request methods.
+        """
+        self._cache.invalidate(f"/repos/{self.repository()}/releases")
+
+    def graphql(self, query: str, variables: dict[str, Any] | None = None) -> Any:
+        """Call the GitHub GraphQL API with the given query.
+
+        Queries are paced and prioritized like REST reads; only mutations
+        count as writes.
+        """
+        response = self._request(
+            "POST",
             f"{self._api_url}/graphql",
-            headers={
-                "Accept": "application/json",
-                **self._auth_headers(AuthLevel.GITHUB),
-            },
-            json={"query": query},
+            AuthLevel.GITHUB,
+            headers={"Accept": "application/json"},
+            write=query.lstrip().startswith("mutation"),
+            json={"query": query, "variables": variables or {}},
         )
         self._process_error(response)
         return response.json()["data"]
@@ -322,11 +893,39 @@ class GitHub:
         return str(self.api("/user", auth=AuthLevel.GITHUB)["login"])
 
     def get_release_id(self, tag: str) -> int | None:
-        """Get the GitHub release ID number for a tag, or None if not found."""
-        for release in self.api(f"/repos/{self.repository()}/releases"):
-            if release["tag_name"] == tag:
-                return int(release["id"])
-        return None
+        """Get the GitHub release ID number for a tag, or None if not found.
+
+        Releases are indexed by tag as the (newest first) release list is
+        paged through, and the sweep only goes as far as the requested tag.
+        Later lookups are answered from the index or continue the sweep where
+        the previous one stopped. The index is kept in the response cache, so
+        it expires like the release list and is dropped by writes to releases.
+        We don't use the `releases/tags/{tag}` endpoint because it doesn't
+        return draft releases.
+        """
+        path = f"/repos/{self.repository()}/releases"
+        with self._release_lock:
+            found, index = self._cache.get(("release_index", path))
+            if not found:
+                index = _ReleaseIndex()
+                self._cache.put(("release_index", path), path, index)
+            if tag in index.ids:
+                return int(index.ids[tag])
+            if index.done:
+                return None
+            if index.sweep is None:
+                index.sweep = self.api_paginated(path)
+            try:
+                for release in index.sweep:
+                    index.ids[str(release["tag_name"])] = int(release["id"])
+                    if release["tag_name"] == tag:
+                        return int(release["id"])
+            except Exception:
+                # A failed generator can't be resumed; start over next time.
+                index.sweep = None
+                raise
+            index.done = True
+            return None
 
     def release_id(self, tag: str) -> int:
         """Get the GitHub release ID number for a tag."""
@@ -393,7 +992,7 @@ class GitHub:
         """Get the names and IDs of all milestones in the repository."""
         return {
             m["title"]: Milestone.fromJSON(m)
-            for m in self.api(f"/repos/{self.repository()}/milestones")
+            for m in self.api_list(f"/repos/{self.repository()}/milestones")
         }
 
     def milestone(self, title: str) -> Milestone:
@@ -429,7 +1028,7 @@ class GitHub:
         """Get all the open issues for a given milestone."""
         return [
             Issue.fromJSON(i)
-            for i in self.api(
+            for i in self.api_list(
                 f"/repos/{self.repository()}/issues",
                 params=(
                     ("milestone", milestone),
@@ -466,7 +1065,7 @@ class GitHub:
         """Get the names of all prereleases for a given version in the repository."""
         return [
             r["tag_name"]
-            for r in self.api(f"/repos/{self.repository()}/releases")
+            for r in self.api_list(f"/repos/{self.repository()}/releases")
             if f"{version}-rc." in r["tag_name"] and r["prerelease"] and not r["draft"]
         ]
 
@@ -514,15 +1113,13 @@ class GitHub:
 
     def find_pr(self, head_sha: str, base: str) -> PullRequest | None:
         """Find a PR with the given title, head.sha, and base."""
-        response = self.api_uncached(
+        for pr in self.api_paginated(
             f"/repos/{self.repository()}/pulls",
             params=(
                 ("state", "all"),
                 ("base", base),
-                ("per_page", 100),
             ),
-        )
-        for pr in response:
+        ):
             if pr["head"]["sha"] == head_sha:
                 return PullRequest.fromJSON(pr)
         return None
@@ -531,16 +1128,16 @@ class GitHub:
         self, head: str, base: str, state: str = "all"
     ) -> PullRequest | None:
         """Find a PR with the given head (actor:branch) and base."""
-        response = self.api_uncached(
+        for pr in self.api_paginated(
             f"/repos/{self.repository()}/pulls",
             params=(
                 ("state", state),
                 ("base", base),
                 ("head", head),
-                ("per_page", 100),
             ),
-        )
-        return PullRequest.fromJSON(response[0]) if response else None
+        ):
+            return PullRequest.fromJSON(pr)
+        return None
 
     def change_pr(self, number: int, changes: dict[str, str | int]) -> None:
         """Modify a PR with the given number."""
@@ -558,44 +1155,84 @@ class GitHub:
 
     def checks(self, commit: str) -> dict[str, CheckRun]:
         """Return all the GitHub Actions results."""
-        check_runs = {
+        # The per-commit listing covers all check suites, so this is one
+        # request per 100 check runs instead of one per suite.
+        return {
             r["name"]: CheckRun.fromJSON(r)
-            for s in self.api_uncached(
-                f"/repos/{self.repository()}/commits/{commit}/check-suites",
-            )["check_suites"]
-            for r in self.api_uncached(
-                f"/repos/{self.repository()}/check-suites/{s['id']}/check-runs",
-            )["check_runs"]
+            for r in self.api_paginated(
+                f"/repos/{self.repository()}/commits/{commit}/check-runs",
+                params=(("filter", "latest"),),
+                key="check_runs",
+            )
         }
-        return check_runs
+
+    def poll_checks(
+        self, commit: str, previous: dict[str, CheckRun]
+    ) -> tuple[dict[str, CheckRun], list[CheckRun]]:
+        """Return all the check runs and those that changed since `previous`.
+
+        `previous` is the result of the last poll for the same commit (or an
+        empty dict for the first poll, in which case all runs are changed).
+        """
+        current = self.checks(commit)
+        return current, [r for name, r in current.items() if previous.get(name) != r]
 
     def action_runs(self, branch: str, head_sha: str) -> list[ActionRun]:
         """Return all the GitHub Actions results."""
         return [
             ActionRun.fromJSON(r)
-            for r in self.api_uncached(
+            for r in self.api_paginated(
                 f"/repos/{self.repository()}/actions/runs",
                 params=(("branch", branch), ("head_sha", head_sha)),
-            )["workflow_runs"]
+                key="workflow_runs",
+            )
         ]
 
     def download_artifact(self, name: str, run_id: int) -> bytes:
         """Download the artifact with the given name from the given run."""
-        response = requests.get(
-            f"{self._api_url}/repos/{self.repository()}/actions/runs/{run_id}/artifacts",
-            headers=self._auth_headers(AuthLevel.GITHUB),
-        )
-        self._process_error(response)
-        for artifact in response.json()["artifacts"]:
+        buffer = io.BytesIO()
+        self.download_artifact_to(name, run_id, buffer)
+        return buffer.getvalue()
+
+    def download_artifact_to(self, name: str, run_id: int, out: IO[bytes]) -> str:
+        """Stream the artifact zip with the given name from the given run.
+
+        Returns the SHA-256 hex digest of the downloaded data.
+        """
+        for artifact in self.api_paginated(
+            f"/repos/{self.repository()}/actions/runs/{run_id}/artifacts",
+            auth=AuthLevel.GITHUB,
+            key="artifacts",
+        ):
             if artifact["name"] == name:
-                response = requests.get(
+                return self._download(
                     f"{self._api_url}/repos/{self.repository()}/actions/artifacts/{artifact['id']}/zip",
-                    headers=self._auth_headers(AuthLevel.GITHUB),
+                    AuthLevel.GITHUB,
+                    out,
                 )
-                self._process_error(response)
-                return response.content
         raise ValueError(f"Artifact {name} not found in run {run_id}")
 
+    def extract_artifact(
+        self, name: str, run_id: int, select: Callable[[str], str | None]
+    ) -> list[str]:
+        """Download the artifact zip with the given name and extract from it.
+
+        The zip is streamed into a spooled temporary file rather than held in
+        memory. `select` maps a member name to the path to extract it to, or
+        to None to skip it. Files that already have the member's content are
+        not rewritten. Returns the paths that were written.
+        """
+        with tempfile.SpooledTemporaryFile(max_size=ARTIFACT_SPOOL_SIZE) as spool:
+            self.download_artifact_to(name, run_id, spool)
+            spool.seek(0)
+            written = []
+            with zipfile.ZipFile(spool) as z:
+                for info in z.infolist():
+                    path = None if info.is_dir() else select(info.filename)
+                    if path is not None and _extract_member(z, info, path):
+                        written.append(path)
+            return written
+
     def release_assets(self, tag: str) -> list[ReleaseAsset]:
         """Return all the assets for a given tag."""
         rid = self.get_release_id(tag)
@@ -610,15 +1247,21 @@ class GitHub:
 
     def download_asset(self, asset_id: int) -> bytes:
         """Download the asset with the given ID."""
-        response = requests.get(
+        buffer = io.BytesIO()
+        self.download_asset_to(asset_id, buffer)
+        return buffer.getvalue()
+
+    def download_asset_to(self, asset_id: int, out: IO[bytes]) -> str:
+        """Stream the asset with the given ID into `out`.
+
+        Returns the SHA-256 hex digest of the downloaded data.
+        """
+        return self._download(
             f"{self._api_url}/repos/{self.repository()}/releases/assets/{asset_id}",
-            headers={
-                "Accept": "application/octet-stream",
-                **self._auth_headers(AuthLevel.OPTIONAL),
-            },
+            AuthLevel.OPTIONAL,
+            out,
+            headers={"Accept": "application/octet-stream"},
         )
-        self._process_error(response)
-        return response.content
 
     def api_post_uploads(
         self,
@@ -627,13 +1270,11 @@ class GitHub:
         data: Any,
         params: dict[str, Any] | None = None,
     ) -> Any:
-        api_requests.append(f"POST https://uploads.github.com{url}")
-        response = requests.post(
-            f"https://uploads.github.com{url}",
-            headers={
-                "Content-Type": content_type,
-                **self._auth_headers(AuthLevel.GITHUB),
-            },
+        response = self._request(
+            "POST",
+            url if url.startswith(("http://", "https://")) else f"{UPLOADS_URL}{url}",
+            AuthLevel.GITHUB,
+            headers={"Content-Type": content_type},
             data=data,
             params=params,
         )
@@ -643,17 +1284,109 @@ class GitHub:
         return None
 
     def upload_asset(
-        self, tag: str, filename: str, content_type: str, data: bytes | IO[bytes]
-    ) -> None:
-        """Upload an asset to the release with the given tag."""
-        rid = self.release_id(tag)
-        self.api_post_uploads(
-            f"/repos/{self.repository()}/releases/{rid}/assets",
+        self,
+        tag: str,
+        filename: str,
+        content_type: str,
+        data: bytes | IO[bytes],
+        upload_url: str | None = None,
+    ) -> Any:
+        """Upload an asset to the release with the given tag.
+
+        Pass the release's `upload_url` if you already have it, to avoid
+        looking up the release again. Returns the new asset object.
+        """
+        if upload_url is None:
+            upload_url = str(self.release(tag)["upload_url"])
+        # The URL is a template: ".../assets{?name,label}".
+        return self.api_post_uploads(
+            upload_url.split("{", 1)[0],
             content_type,
             data,
             params={"name": filename},
         )
 
+    def upload_assets(
+        self,
+        tag: str,
+        uploads: list[AssetUpload],
+        max_workers: int = UPLOAD_WORKERS,
+    ) -> list[UploadResult]:
+        """Upload several assets to the release with the given tag.
+
+        The release is looked up once and the files are uploaded concurrently
+        to the upload URL it names. Assets that already exist with the same
+        size and SHA-256 digest are skipped; existing assets with different
+        content are replaced once the new content is uploaded.
+        """
+        release = self.get_release(tag)
+        if release is None:
+            raise ValueError(f"Release {tag} not found in {self.repository()}")
+        upload_url = str(release["upload_url"])
+        existing = {
+            a.name: a for a in (ReleaseAsset.fromJSON(a) for a in release["assets"])
+        }
+
+        def upload(item: AssetUpload) -> UploadResult:
+            if isinstance(item.source, str):
+                with open(item.source, "rb") as f:
+                    return self._upload_one(tag, upload_url, existing, item, f)
+            return self._upload_one(tag, upload_url, existing, item, item.source)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(upload, uploads))
+        for r in results:
+            if r.skipped:
+                print(f"{r.name} is already uploaded")
+            else:
+                print(
+                    f"Uploaded {r.name}: {r.size / 1e6:.1f} MB in {r.seconds:.1f}s"
+                    f" ({r.throughput() / 1e6:.1f} MB/s)"
+                )
+        return results
+
+    def _upload_one(
+        self,
+        tag: str,
+        upload_url: str,
+        existing: dict[str, ReleaseAsset],
+        item: AssetUpload,
+        data: IO[bytes],
+    ) -> UploadResult:
+        start = data.tell()
+        digest = hashlib.sha256()
+        while chunk := data.read(DOWNLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+        size = data.tell() - start
+        data.seek(start)
+
+        name = item.name
+        old = existing.get(item.name)
+        if old is not None:
+            if old.size == size and old.digest == f"sha256:{digest.hexdigest()}":
+                return UploadResult(item.name, size, 0.0, skipped=True)
+            # Upload the new content next to the old asset and only swap them
+            # once it's there, so a failed upload doesn't lose the asset.
+            name = f"{item.name}.{digest.hexdigest()[:12]}.tmp"
+            if name in existing:
+                # Left behind by an earlier failed replacement.
+                self.api_delete(
+                    f"/repos/{self.repository()}/releases/assets/{existing[name].id}"
+                )
+
+        began = time.monotonic()
+        asset = self.upload_asset(
+            tag, name, item.content_type, data, upload_url=upload_url
+        )
+        seconds = time.monotonic() - began
+        if old is not None:
+            self.api_delete(f"/repos/{self.repository()}/releases/assets/{old.id}")
+            self.api_patch(
+                f"/repos/{self.repository()}/releases/assets/{asset['id']}",
+                json={"name": item.name},
+            )
+        return UploadResult(item.name, size, seconds, skipped=False)
+
     def mark_ready_for_review(self, pr_node_id: str) -> None:
         """Mark a PR as ready for review."""
         self.graphql(f"""
@@ -673,24 +1406,46 @@ class GitHub:
         head_branch: str,
         target_branch: str,
     ) -> str:
-        """Create a signed commit (by github-actions[bot]) for the given commit."""
-        files_changed = self.git.files_changed(commit_sha)
-        tree_objects = []
-        for file in files_changed:
-            with open(file, "rb") as f:
-                blob_response = self.api_post(
-                    f"/repos/{slug}/git/blobs",
-                    json={"content": f.read().decode("utf-8"), "encoding": "utf-8"},
-                )
-                tree_objects.append(
-                    {
-                        "path": file,
-                        "mode": "100644",
-                        "type": "blob",
-                        "sha": blob_response["sha"],
-                    }
-                )
+        """Create a signed commit (by github-actions[bot]) for the given commit.
+
+        Blob SHAs are computed locally. Only files whose content the server
+        doesn't already have in the base tree are uploaded, concurrently.
+        """
         head_sha = self.git.branch_sha(head_branch)
+        base_tree = self._tree_entries(slug, head_sha)
+        known = {e["sha"] for e in base_tree.values()}
+
+        contents: dict[str, bytes] = {}
+        for file in self.git.files_changed(commit_sha):
+            with open(file, "rb") as f:
+                contents[file] = f.read()
+        shas = {file: _blob_sha(data) for file, data in contents.items()}
+        missing = {
+            sha: contents[file] for file, sha in shas.items() if sha not in known
+        }
+
+        def create_blob(data: bytes) -> str:
+            return str(
+                self.api_post(f"/repos/{slug}/git/blobs", json=_blob_json(data))["sha"]
+            )
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+            for sha, created in zip(missing, pool.map(create_blob, missing.values())):
+                if created != sha:
+                    raise ValueError(
+                        f"Blob SHA mismatch: expected {sha}, got {created}"
+                    )
+
+        tree_objects = [
+            {
+                "path": file,
+                "mode": base_tree.get(file, {}).get("mode", "100644"),
+                "type": "blob",
+                "sha": sha,
+            }
+            for file, sha in shas.items()
+            if base_tree.get(file, {}).get("sha") != sha
+        ]
         tree_response = self.api_post(
             f"/repos/{slug}/git/trees",
             json={
@@ -739,6 +1494,17 @@ class GitHub:
             )
         return target_sha
 
+    def _tree_entries(self, slug: types.RepoSlug, commit: str) -> dict[str, Any]:
+        """Get the blob entries of the tree of a commit, by path.
+
+        If GitHub truncates the (very large) tree, the result is incomplete,
+        which only means some blobs are uploaded again.
+        """
+        tree = self.api_uncached(
+            f"/repos/{slug}/git/trees/{commit}", params=(("recursive", "1"),)
+        )
+        return {e["path"]: e for e in tree["tree"] if e["type"] == "blob"}
+
     def tag(
         self, slug: types.RepoSlug, commit_sha: str, tag_name: str, tag_message: str
     ) -> str:
@@ -773,7 +1539,7 @@ class GitHub:
         if rid:
             return self.api_uncached(f"/repos/{self.repository()}/releases/{rid}")
 
-        return self.api_post(
+        release = self.api_post(
             f"/repos/{self.repository()}/releases",
             json={
                 "tag_name": tag,
@@ -782,6 +1548,8 @@ class GitHub:
                 "draft": True,
             },
         )
+        self._invalidate_releases()
+        return release
 
     def set_release_notes(self, tag: str, notes: str, prerelease: bool) -> None:
         """Set the release notes for a given tag in the release description."""
@@ -793,6 +1561,7 @@ class GitHub:
                 "prerelease": prerelease,
             },
         )
+        self._invalidate_releases()
 
     def release_is_published(self, tag: str) -> bool:
         """Check if the release with the given tag is published."""
@@ -806,6 +1575,45 @@ class GitHub:
             is not None
         )
 
+    def release_snapshot(
+        self, tag: str, head: str, base: str, issue: int | None = None
+    ) -> ReleaseSnapshot:
+        """Get the PR, release, asset and tracking issue state of a release.
+
+        This replaces the half dozen REST calls (PR search, release lookup,
+        release object, assets, issue) with a single GraphQL query. `head` is
+        in the same "owner:branch" form as for `find_pr_for_branch`.
+        """
+        head_owner, head_branch = head.split(":", 1)
+        owner, name = self.repository().split("/", 1)
+        data = self.graphql(
+            RELEASE_SNAPSHOT_QUERY,
+            {
+                "owner": owner,
+                "name": name,
+                "head": head_branch,
+                "base": base,
+                "releases": SNAPSHOT_RELEASES,
+                "issue": issue or 0,
+                "withIssue": bool(issue),
+            },
+        )
+        snapshot = ReleaseSnapshot.fromJSON(data["repository"], head_owner, tag)
+        if not snapshot.release_complete:
+            rid = self.get_release_id(tag)
+            snapshot.release_exists = rid is not None
+            if rid is not None:
+                release = self.api_uncached(
+                    f"/repos/{self.repository()}/releases/{rid}"
+                )
+                snapshot.release_published = release["published_at"] is not None
+                snapshot.asset_names = [str(a["name"]) for a in release["assets"]]
+            snapshot.release_complete = snapshot.assets_complete = True
+        elif not snapshot.assets_complete:
+            snapshot.asset_names = [a.name for a in self.release_assets(tag)]
+            snapshot.assets_complete = True
+        return snapshot
+
     def head_ref(self) -> str:
         return os.getenv("GITHUB_HEAD_REF") or self.git.current_branch()
 
@@ -840,189 +1648,255 @@ class GitHub:
         raise ValueError("No upstream or origin remotes found")
 
 
-DEFAULT_GITHUB = GitHub()
+# The provider behind the module-level functions. It is created on first use
+# (see `__getattr__`), so importing this module doesn't read the environment,
+# print the authorization banner or open a cassette. Creating it also arranges
+# for the request metrics of all providers to be written to
+# $CI_TOOLS_METRICS_FILE at exit (Prometheus text if it ends in .prom,
+# otherwise JSON).
+DEFAULT_GITHUB: GitHub
+_default_lock = threading.Lock()
+
+
+def _default() -> GitHub:
+    """Get DEFAULT_GITHUB, creating it if it doesn't exist yet."""
+    provider: GitHub | None = globals().get("DEFAULT_GITHUB")
+    if provider is None:
+        with _default_lock:
+            provider = globals().get("DEFAULT_GITHUB")
+            if provider is None:
+                metrics.REGISTRY.export_at_exit(os.getenv("CI_TOOLS_METRICS_FILE"))
+                provider = GitHub(transport=cassette.from_env())
+                globals()["DEFAULT_GITHUB"] = provider
+    return provider
+
+
+def __getattr__(name: str) -> Any:
+    if name == "DEFAULT_GITHUB":
+        return _default()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def username() -> str | None:
-    return DEFAULT_GITHUB.username()
+    return _default().username()
 
 
 def get_release_id(tag: str) -> int | None:
-    return DEFAULT_GITHUB.get_release_id(tag)
+    return _default().get_release_id(tag)
 
 
 def release_id(tag: str) -> int:
-    return DEFAULT_GITHUB.release_id(tag)
+    return _default().release_id(tag)
+
+
+def release(tag: str) -> Any:
+    return _default().release(tag)
 
 
 def actor() -> str:
-    return DEFAULT_GITHUB.actor()
+    return _default().actor()
 
 
 def milestones() -> dict[str, Milestone]:
-    return DEFAULT_GITHUB.milestones()
+    return _default().milestones()
 
 
 def milestone(title: str) -> Milestone:
-    return DEFAULT_GITHUB.milestone(title)
+    return _default().milestone(title)
 
 
 def next_milestone() -> Milestone:
-    return DEFAULT_GITHUB.next_milestone()
+    return _default().next_milestone()
 
 
 def assign_milestone(issue_id: int, milestone: int) -> None:
-    DEFAULT_GITHUB.assign_milestone(issue_id, milestone)
+    _default().assign_milestone(issue_id, milestone)
 
 
 def close_milestone(number: int) -> None:
-    DEFAULT_GITHUB.close_milestone(number)
+    _default().close_milestone(number)
 
 
 def open_milestone_issues(milestone: int) -> list[Issue]:
-    return DEFAULT_GITHUB.open_milestone_issues(milestone)
+    return _default().open_milestone_issues(milestone)
 
 
 def get_issue(issue_number: int) -> Issue:
-    return DEFAULT_GITHUB.get_issue(issue_number)
+    return _default().get_issue(issue_number)
 
 
 def rename_issue(issue_number: int, title: str) -> None:
-    DEFAULT_GITHUB.rename_issue(issue_number, title)
+    _default().rename_issue(issue_number, title)
 
 
 def close_issue(issue_number: int) -> None:
-    DEFAULT_GITHUB.close_issue(issue_number)
+    _default().close_issue(issue_number)
 
 
 def latest_release() -> str:
-    return DEFAULT_GITHUB.latest_release()
+    return _default().latest_release()
 
 
 def prereleases(version: str) -> list[str]:
-    return DEFAULT_GITHUB.prereleases(version)
+    return _default().prereleases(version)
 
 
 def release_candidates(version: str) -> list[int]:
-    return DEFAULT_GITHUB.release_candidates(version)
+    return _default().release_candidates(version)
 
 
 def issue_assign(issue_id: int, assignees: list[str]) -> None:
-    DEFAULT_GITHUB.issue_assign(issue_id, assignees)
+    _default().issue_assign(issue_id, assignees)
 
 
 def issue_unassign(issue_id: int, assignees: list[str]) -> None:
-    DEFAULT_GITHUB.issue_unassign(issue_id, assignees)
+    _default().issue_unassign(issue_id, assignees)
 
 
 def create_pr(
     title: str, body: str, head: str, base: str, milestone: int
 ) -> PullRequest:
-    return DEFAULT_GITHUB.create_pr(title, body, head, base, milestone)
+    return _default().create_pr(title, body, head, base, milestone)
 
 
 def find_pr(head_sha: str, base: str) -> PullRequest | None:
-    return DEFAULT_GITHUB.find_pr(head_sha, base)
+    return _default().find_pr(head_sha, base)
 
 
 def find_pr_for_branch(head: str, base: str, state: str = "all") -> PullRequest | None:
-    return DEFAULT_GITHUB.find_pr_for_branch(head, base, state)
+    return _default().find_pr_for_branch(head, base, state)
 
 
 def change_pr(number: int, changes: dict[str, str | int]) -> None:
-    DEFAULT_GITHUB.change_pr(number, changes)
+    _default().change_pr(number, changes)
 
 
 def change_issue(number: int, changes: dict[str, str | int]) -> None:
-    DEFAULT_GITHUB.change_issue(number, changes)
+    _default().change_issue(number, changes)
 
 
 def checks(commit: str) -> dict[str, CheckRun]:
-    return DEFAULT_GITHUB.checks(commit)
+    return _default().checks(commit)
+
+
+def poll_checks(
+    commit: str, previous: dict[str, CheckRun]
+) -> tuple[dict[str, CheckRun], list[CheckRun]]:
+    return _default().poll_checks(commit, previous)
 
 
 def action_runs(branch: str, head_sha: str) -> list[ActionRun]:
-    return DEFAULT_GITHUB.action_runs(branch, head_sha)
+    return _default().action_runs(branch, head_sha)
 
 
 def download_artifact(name: str, run_id: int) -> bytes:
-    return DEFAULT_GITHUB.download_artifact(name, run_id)
+    return _default().download_artifact(name, run_id)
+
+
+def download_artifact_to(name: str, run_id: int, out: IO[bytes]) -> str:
+    return _default().download_artifact_to(name, run_id, out)
+
+
+def extract_artifact(
+    name: str, run_id: int, select: Callable[[str], str | None]
+) -> list[str]:
+    return _default().extract_artifact(name, run_id, select)
 
 
 def release_assets(tag: str) -> list[ReleaseAsset]:
-    return DEFAULT_GITHUB.release_assets(tag)
+    return _default().release_assets(tag)
 
 
 def download_asset(asset_id: int) -> bytes:
-    return DEFAULT_GITHUB.download_asset(asset_id)
+    return _default().download_asset(asset_id)
+
+
+def download_asset_to(asset_id: int, out: IO[bytes]) -> str:
+    return _default().download_asset_to(asset_id, out)
 
 
 def upload_asset(
-    tag: str, filename: str, content_type: str, data: bytes | IO[bytes]
-) -> None:
-    DEFAULT_GITHUB.upload_asset(tag, filename, content_type, data)
+    tag: str,
+    filename: str,
+    content_type: str,
+    data: bytes | IO[bytes],
+    upload_url: str | None = None,
+) -> Any:
+    return _default().upload_asset(tag, filename, content_type, data, upload_url)
+
+
+def upload_assets(
+    tag: str, uploads: list[AssetUpload], max_workers: int = UPLOAD_WORKERS
+) -> list[UploadResult]:
+    return _default().upload_assets(tag, uploads, max_workers)
 
 
 def mark_ready_for_review(pr_node_id: str) -> None:
-    DEFAULT_GITHUB.mark_ready_for_review(pr_node_id)
+    _default().mark_ready_for_review(pr_node_id)
 
 
 def push_signed(
     slug: types.RepoSlug, commit_sha: str, head_branch: str, target_branch: str
 ) -> str:
-    return DEFAULT_GITHUB.push_signed(slug, commit_sha, head_branch, target_branch)
+    return _default().push_signed(slug, commit_sha, head_branch, target_branch)
 
 
 def tag(slug: types.RepoSlug, commit_sha: str, tag_name: str, tag_message: str) -> str:
-    return DEFAULT_GITHUB.tag(slug, commit_sha, tag_name, tag_message)
+    return _default().tag(slug, commit_sha, tag_name, tag_message)
 
 
 def set_release_notes(tag: str, notes: str, prerelease: bool) -> None:
-    DEFAULT_GITHUB.set_release_notes(tag, notes, prerelease)
+    _default().set_release_notes(tag, notes, prerelease)
 
 
 def release_is_published(tag: str) -> bool:
-    return DEFAULT_GITHUB.release_is_published(tag)
+    return _default().release_is_published(tag)
 
 
 def repository() -> str:
-    return DEFAULT_GITHUB.repository()
+    return _default().repository()
 
 
 def repository_name() -> str:
-    return DEFAULT_GITHUB.repository_name()
+    return _default().repository_name()
+
+
+def release_snapshot(
+    tag: str, head: str, base: str, issue: int | None = None
+) -> ReleaseSnapshot:
+    return _default().release_snapshot(tag, head, base, issue)
 
 
 def head_ref() -> str:
-    return DEFAULT_GITHUB.head_ref()
+    return _default().head_ref()
 
 
 def pr_number() -> int:
-    return DEFAULT_GITHUB.pr_number()
+    return _default().pr_number()
 
 
 def ref_name() -> str:
-    return DEFAULT_GITHUB.ref_name()
+    return _default().ref_name()
 
 
 def pr() -> Any:
-    return DEFAULT_GITHUB.pr()
+    return _default().pr()
 
 
 def pr_branch() -> str:
-    return DEFAULT_GITHUB.pr_branch()
+    return _default().pr_branch()
 
 
 def base_ref() -> str:
-    return DEFAULT_GITHUB.base_ref()
+    return _default().base_ref()
 
 
 def base_branch() -> str:
-    return DEFAULT_GITHUB.base_branch()
+    return _default().base_branch()
 
 
 def api_url() -> str:
-    return DEFAULT_GITHUB._api_url
+    return _default()._api_url
 
 
 def api(
@@ -1030,11 +1904,37 @@ def api(
     auth: AuthLevel = AuthLevel.OPTIONAL,
     params: tuple[tuple[str, str | int], ...] = tuple(),
 ) -> Any:
-    return DEFAULT_GITHUB.api(url, auth, params)
+    return _default().api(url, auth, params)
+
+
+def api_paginated(
+    url: str,
+    auth: AuthLevel = AuthLevel.OPTIONAL,
+    params: tuple[tuple[str, str | int], ...] = tuple(),
+    key: str | None = None,
+) -> Iterator[Any]:
+    return _default().api_paginated(url, auth, params, key)
+
+
+def api_list(
+    url: str,
+    auth: AuthLevel = AuthLevel.OPTIONAL,
+    params: tuple[tuple[str, str | int], ...] = tuple(),
+    key: str | None = None,
+) -> list[Any]:
+    return _default().api_list(url, auth, params, key)
 
 
 def clear_cache() -> None:
-    DEFAULT_GITHUB.clear_cache()
+    _default().clear_cache()
+
+
+def cache_stats() -> response_cache.CacheStats:
+    return _default().cache_stats()
+
+
+def request_metrics() -> metrics.Metrics:
+    return _default().request_metrics()
 
 
 def patch_markdown_section(body: str, header: str, content: str) -> str:
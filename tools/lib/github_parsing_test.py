@@ -1,8 +1,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2026 The TokTok team
 import unittest
+from typing import Any
 
-from lib.github import CheckRun, Issue, Milestone, PullRequest
+from lib.github import CheckRun, Issue, Milestone, PullRequest, ReleaseSnapshot
 
 
 class TestGitHubParsing(unittest.TestCase):
@@ -65,6 +66,66 @@ class TestGitHubParsing(unittest.TestCase):
         self.assertEqual(cr.id, 789)
         self.assertEqual(cr.conclusion, "success")
 
+    def test_release_snapshot_from_json(self) -> None:
+        data = {
+            "pullRequests": {
+                "nodes": [
+                    {"number": 1, "headRepositoryOwner": {"login": "someone"}},
+                    {"number": 2, "headRepositoryOwner": {"login": "releaser"}},
+                ]
+            },
+            "releases": {
+                "nodes": [
+                    {
+                        "tagName": "v1.1",
+                        "publishedAt": None,
+                        "releaseAssets": {
+                            "nodes": [],
+                            "pageInfo": {"hasNextPage": False},
+                        },
+                    },
+                    {
+                        "tagName": "v1.0",
+                        "publishedAt": None,
+                        "releaseAssets": {
+                            "nodes": [{"name": "v1.0.tar.gz"}, {"name": "v1.0.tar.xz"}],
+                            "pageInfo": {"hasNextPage": False},
+                        },
+                    },
+                ],
+                "pageInfo": {"hasNextPage": True},
+            },
+            "issue": {"body": "Dashboard"},
+        }
+        snapshot = ReleaseSnapshot.fromJSON(data, "releaser", "v1.0")
+        self.assertTrue(snapshot.has_pr)
+        self.assertTrue(snapshot.release_exists)
+        self.assertFalse(snapshot.release_published)
+        self.assertEqual(snapshot.asset_names, ["v1.0.tar.gz", "v1.0.tar.xz"])
+        self.assertTrue(snapshot.assets_complete)
+        self.assertEqual(snapshot.issue_body, "Dashboard")
+        self.assertTrue(snapshot.release_complete)
+
+    def test_release_snapshot_without_release(self) -> None:
+        data: dict[str, Any] = {
+            "pullRequests": {"nodes": []},
+            "releases": {"nodes": [], "pageInfo": {"hasNextPage": False}},
+        }
+        snapshot = ReleaseSnapshot.fromJSON(data, "releaser", "v1.0")
+        self.assertFalse(snapshot.has_pr)
+        self.assertFalse(snapshot.release_exists)
+        self.assertEqual(snapshot.asset_names, [])
+        self.assertIsNone(snapshot.issue_body)
+        self.assertTrue(snapshot.release_complete)
+
+    def test_release_snapshot_with_older_releases(self) -> None:
+        data: dict[str, Any] = {
+            "pullRequests": {"nodes": []},
+            "releases": {"nodes": [], "pageInfo": {"hasNextPage": True}},
+        }
+        snapshot = ReleaseSnapshot.fromJSON(data, "releaser", "v1.0")
+        self.assertFalse(snapshot.release_complete)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,35 @@
 #!/usr/bin/env python3
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2026 The TokTok team
+import base64
+import hashlib
+import io
+import json as jsonlib
+import os
+import pickle
+import subprocess  # nosec
+import sys
+import tempfile
+import time
 import unittest
-from unittest.mock import patch
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Iterator
+from unittest.mock import MagicMock, patch
 
-from lib import github
+import requests
+import urllib3
+from lib import github, metrics, ratelimit, response_cache, retry, types
+
+
+def _response(
+    json: Any, status: int = 200, headers: dict[str, str] | None = None
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = jsonlib.dumps(json).encode()
+    response.headers.update(headers or {})
+    return response
 
 
 class TestGitHubReleases(unittest.TestCase):
@@ -14,16 +39,905 @@ class TestGitHubReleases(unittest.TestCase):
     def test_release_assets_not_found(self) -> None:
         with patch.object(
             self.gh, "repository", return_value="owner/repo"
-        ), patch.object(self.gh, "api", return_value=[]):
+        ), patch.object(self.gh, "api_paginated", return_value=iter([])):
             assets = self.gh.release_assets("v1.0.0")
             self.assertEqual(assets, [])
 
     def test_release_is_published_not_found(self) -> None:
         with patch.object(
             self.gh, "repository", return_value="owner/repo"
-        ), patch.object(self.gh, "api", return_value=[]):
+        ), patch.object(self.gh, "api_paginated", return_value=iter([])):
             self.assertFalse(self.gh.release_is_published("v1.0.0"))
 
+    def test_release_snapshot_is_one_query(self) -> None:
+        repo = {
+            "pullRequests": {"nodes": []},
+            "releases": {
+                "nodes": [
+                    {
+                        "tagName": "v1.0.0",
+                        "publishedAt": "2026-01-01T00:00:00Z",
+                        "releaseAssets": {
+                            "nodes": [{"name": "a"}],
+                            "pageInfo": {"hasNextPage": False},
+                        },
+                    }
+                ],
+                "pageInfo": {"hasNextPage": False},
+            },
+        }
+        with patch.object(
+            self.gh, "repository", return_value="owner/repo"
+        ), patch.object(
+            self.gh, "graphql", return_value={"repository": repo}
+        ) as graphql, patch.object(
+            self.gh, "release_assets"
+        ) as release_assets:
+            snapshot = self.gh.release_snapshot("v1.0.0", "me:release/v1.0.0", "main")
+        graphql.assert_called_once()
+        self.assertEqual(graphql.call_args.args[1]["head"], "release/v1.0.0")
+        self.assertFalse(graphql.call_args.args[1]["withIssue"])
+        release_assets.assert_not_called()
+        self.assertTrue(snapshot.release_published)
+        self.assertEqual(snapshot.asset_names, ["a"])
+
+    def test_release_snapshot_sees_draft_release(self) -> None:
+        # A draft release has no publishedAt, and `release(tagName:)` wouldn't
+        # return it at all.
+        repo = {
+            "pullRequests": {"nodes": []},
+            "releases": {
+                "nodes": [
+                    {
+                        "tagName": "v1.0.0",
+                        "publishedAt": None,
+                        "releaseAssets": {
+                            "nodes": [{"name": "v1.0.0.tar.gz"}],
+                            "pageInfo": {"hasNextPage": False},
+                        },
+                    }
+                ],
+                "pageInfo": {"hasNextPage": True},
+            },
+        }
+        with patch.object(
+            self.gh, "repository", return_value="owner/repo"
+        ), patch.object(
+            self.gh, "graphql", return_value={"repository": repo}
+        ), patch.object(
+            self.gh, "get_release_id"
+        ) as get_release_id:
+            snapshot = self.gh.release_snapshot("v1.0.0", "me:release/v1.0.0", "main")
+        get_release_id.assert_not_called()
+        self.assertTrue(snapshot.release_exists)
+        self.assertFalse(snapshot.release_published)
+        self.assertEqual(snapshot.asset_names, ["v1.0.0.tar.gz"])
+
+    def test_release_snapshot_falls_back_for_older_release(self) -> None:
+        repo = {
+            "pullRequests": {"nodes": []},
+            "releases": {"nodes": [], "pageInfo": {"hasNextPage": True}},
+        }
+        release = {"published_at": None, "assets": [{"name": "a"}]}
+        with patch.object(
+            self.gh, "repository", return_value="owner/repo"
+        ), patch.object(
+            self.gh, "graphql", return_value={"repository": repo}
+        ), patch.object(
+            self.gh, "get_release_id", return_value=7
+        ), patch.object(
+            self.gh, "api_uncached", return_value=release
+        ) as api_uncached:
+            snapshot = self.gh.release_snapshot("v0.1.0", "me:release/v0.1.0", "main")
+        api_uncached.assert_called_once_with("/repos/owner/repo/releases/7")
+        self.assertTrue(snapshot.release_exists)
+        self.assertFalse(snapshot.release_published)
+        self.assertEqual(snapshot.asset_names, ["a"])
+
+    def test_release_snapshot_falls_back_for_many_assets(self) -> None:
+        repo = {
+            "pullRequests": {"nodes": []},
+            "releases": {
+                "nodes": [
+                    {
+                        "tagName": "v1.0.0",
+                        "publishedAt": None,
+                        "releaseAssets": {
+                            "nodes": [{"name": "a"}],
+                            "pageInfo": {"hasNextPage": True},
+                        },
+                    }
+                ],
+                "pageInfo": {"hasNextPage": False},
+            },
+        }
+        assets = [github.ReleaseAsset(i, str(i), "", "", "") for i in range(3)]
+        with patch.object(
+            self.gh, "repository", return_value="owner/repo"
+        ), patch.object(
+            self.gh, "graphql", return_value={"repository": repo}
+        ), patch.object(
+            self.gh, "release_assets", return_value=assets
+        ):
+            snapshot = self.gh.release_snapshot("v1.0.0", "me:release/v1.0.0", "main")
+        self.assertEqual(snapshot.asset_names, ["0", "1", "2"])
+
+
+class TestDefaultProvider(unittest.TestCase):
+    def test_import_does_not_create_provider(self) -> None:
+        output = subprocess.check_output(  # nosec
+            [
+                sys.executable,
+                "-c",
+                "import lib.github as g; print('DEFAULT_GITHUB' in vars(g))",
+            ],
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        self.assertEqual(output.decode().strip(), "False")
+
+    def test_reads_environment_when_created(self) -> None:
+        env = {
+            "GITHUB_API_URL": "https://ghes.test/api/v3",
+            "GITHUB_TOKEN": "token",
+            "GITHUB_REPOSITORY": "owner/repo",
+        }
+        with patch.dict(os.environ, env):
+            gh = github.GitHub(http=github.HttpConfig(cache_dir=None))
+        self.assertEqual(gh._api_url, "https://ghes.test/api/v3")
+        self.assertEqual(gh._github_token, "token")
+        self.assertEqual(gh.repository(), "owner/repo")
+
+    def test_created_on_first_use(self) -> None:
+        with patch("lib.github.GitHub") as cls, patch.dict(vars(github)):
+            vars(github).pop("DEFAULT_GITHUB", None)
+            cls.return_value.actor.return_value = "alice"
+            self.assertEqual(github.actor(), "alice")
+            self.assertEqual(github.actor(), "alice")
+            self.assertIs(github.DEFAULT_GITHUB, cls.return_value)
+        cls.assert_called_once()
+
+
+class TestGitHubSession(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gh = github.GitHub(
+            github_token="token",  # nosec
+            http=github.HttpConfig(pool_maxsize=2, read_timeout=5.0, cache_dir=None),
+        )
+
+    def test_session_is_reused(self) -> None:
+        self.assertIs(self.gh._session(), self.gh._session())
+
+    def test_session_is_recreated_after_fork(self) -> None:
+        session = self.gh._session()
+        with patch("os.getpid", return_value=-1):
+            self.assertIsNot(self.gh._session(), session)
+
+    def test_requests_use_pool_and_timeout(self) -> None:
+        with patch.object(
+            self.gh._session(), "request", return_value=_response({})
+        ) as request:
+            self.gh.api_uncached("/user")
+            self.gh.api_post("/repos/o/r/issues", json={})
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(request.call_args.kwargs["timeout"], (10.0, 5.0))
+
+    def test_pickle_drops_session(self) -> None:
+        self.gh._session()
+        gh = pickle.loads(pickle.dumps(self.gh))
+        self.assertIsNone(gh._session_obj)
+        self.assertIsNotNone(gh._session())
+
+
+class TestRateLimitRetry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gh = github.GitHub(
+            api_url="https://api.test",
+            github_token="token",  # nosec
+            http=github.HttpConfig(cache_dir=None),
+        )
+
+    @patch("lib.ratelimit.sleep")
+    def test_retries_after_secondary_limit(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(),
+            "request",
+            side_effect=[
+                _response({}, status=403, headers={"Retry-After": "7"}),
+                _response({"login": "alice"}),
+            ],
+        ) as request:
+            self.assertEqual(self.gh.api_uncached("/user")["login"], "alice")
+        self.assertEqual(request.call_count, 2)
+        self.assertGreater(sleep.call_args.args[0], 6)
+
+    @patch("lib.ratelimit.sleep")
+    def test_forbidden_is_not_retried(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(), "request", return_value=_response({}, status=403)
+        ) as request:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.gh.api_uncached("/user")
+        self.assertEqual(request.call_count, 1)
+        sleep.assert_not_called()
+
+
+class TestTransientErrorRetry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = metrics.Metrics()
+        self.gh = github.GitHub(
+            api_url="https://api.test",
+            github_token="token",  # nosec
+            http=github.HttpConfig(cache_dir=None),
+            request_metrics=self.metrics,
+            retry_policy=retry.RetryPolicy(attempts=3, failure_threshold=5),
+        )
+
+    @patch("lib.retry.sleep")
+    def test_retries_server_errors(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(),
+            "request",
+            side_effect=[
+                _response({}, status=502),
+                requests.exceptions.ConnectionError("reset"),
+                _response({"login": "alice"}),
+            ],
+        ) as request:
+            self.assertEqual(self.gh.api_uncached("/user")["login"], "alice")
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(self.metrics.endpoints()["GET /user"].retries, 2)
+
+    @patch("lib.retry.sleep")
+    def test_closes_retried_stream(self, sleep: MagicMock) -> None:
+        failed = _response({}, status=502)
+        failed.close = MagicMock()  # type: ignore[method-assign]
+        with patch.object(
+            self.gh._session(),
+            "request",
+            side_effect=[failed, _response({})],
+        ):
+            response = self.gh._request(
+                "GET",
+                "https://api.test/repos/owner/repo/releases/assets/1",
+                github.AuthLevel.OPTIONAL,
+                stream=True,
+            )
+        failed.close.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+
+    @patch("lib.retry.sleep")
+    def test_honors_retry_after(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(),
+            "request",
+            side_effect=[
+                _response({}, status=503, headers={"Retry-After": "5"}),
+                _response({"login": "alice"}),
+            ],
+        ):
+            self.gh.api_uncached("/user")
+        sleep.assert_called_once_with(5.0)
+
+    @patch("lib.retry.sleep")
+    def test_gives_up_after_attempts(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(), "request", return_value=_response({}, status=500)
+        ) as request:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.gh.api_uncached("/user")
+        self.assertEqual(request.call_count, 3)
+
+    @patch("lib.retry.sleep")
+    def test_post_is_not_retried(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(), "request", return_value=_response({}, status=502)
+        ) as request:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.gh.api_post("/repos/owner/repo/issues", json={})
+        self.assertEqual(request.call_count, 1)
+        sleep.assert_not_called()
+
+    @patch("lib.retry.sleep")
+    def test_graphql_query_is_retried(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(),
+            "request",
+            side_effect=[_response({}, status=502), _response({"data": {}})],
+        ) as request:
+            self.gh.graphql("query { viewer { login } }")
+        self.assertEqual(request.call_count, 2)
+
+    @patch("lib.retry.sleep")
+    def test_bytes_body_is_resent(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(),
+            "request",
+            side_effect=[requests.exceptions.ConnectTimeout(), _response({})],
+        ) as request:
+            self.gh._request(
+                "POST",
+                "https://uploads.test/repos/owner/repo/releases/1/assets",
+                github.AuthLevel.GITHUB,
+                data=b"binary",
+            )
+        self.assertEqual(request.call_count, 2)
+
+    @patch("lib.retry.sleep")
+    def test_unexpected_error_ends_probe(self, sleep: MagicMock) -> None:
+        self.gh._breaker.reset_timeout = 0
+        with patch.object(
+            self.gh._session(), "request", return_value=_response({}, status=502)
+        ) as request:
+            for _ in range(2):
+                with self.assertRaises(requests.exceptions.HTTPError):
+                    self.gh.api_uncached("/user")
+            request.side_effect = requests.exceptions.TooManyRedirects()
+            with self.assertRaises(requests.exceptions.TooManyRedirects):
+                self.gh.api_uncached("/user")
+            # The next request may probe again.
+            request.side_effect = None
+            request.return_value = _response({"login": "alice"})
+            self.assertEqual(self.gh.api_uncached("/user")["login"], "alice")
+
+    @patch("lib.retry.sleep")
+    def test_circuit_breaker_stops_requests(self, sleep: MagicMock) -> None:
+        with patch.object(
+            self.gh._session(), "request", return_value=_response({}, status=502)
+        ) as request:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.gh.api_uncached("/repos/owner/repo/issues/1")
+            with self.assertRaises(retry.CircuitOpenError):
+                self.gh.api_uncached("/repos/owner/repo/issues/2")
+            # Other endpoints still work.
+            request.return_value = _response({"login": "alice"})
+            self.gh.api_uncached("/user")
+        self.assertEqual(request.call_count, 6)
+
+
+class TestPagination(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gh = github.GitHub(
+            api_url="https://api.test",
+            repo_name="owner/repo",
+            http=github.HttpConfig(cache_dir=None),
+        )
+        self.pages = {
+            "https://api.test/repos/owner/repo/releases": _response(
+                [{"id": 1, "tag_name": "v1.0.1"}, {"id": 2, "tag_name": "v1.0.0"}],
+                headers={"Link": '<https://api.test/next?page=2>; rel="next"'},
+            ),
+            "https://api.test/next?page=2": _response(
+                [{"id": 3, "tag_name": "v0.9.0"}]
+            ),
+        }
+        self.request = MagicMock(
+            side_effect=lambda method, url, auth, **kw: self.pages[url]
+        )
+
+    def test_follows_next_links(self) -> None:
+        with patch.object(self.gh, "_request", self.request):
+            self.assertEqual(self.gh.get_release_id("v0.9.0"), 3)
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual(
+            self.request.call_args_list[0].kwargs["params"],
+            {"per_page": github.MAX_PER_PAGE},
+        )
+        # The next link already contains the query string.
+        self.assertEqual(self.request.call_args_list[1].kwargs["params"], {})
+
+    def test_stops_early(self) -> None:
+        with patch.object(self.gh, "_request", self.request):
+            self.assertEqual(self.gh.get_release_id("v1.0.0"), 2)
+        self.assertEqual(self.request.call_count, 1)
+
+    def test_release_index(self) -> None:
+        with patch.object(self.gh, "_request", self.request):
+            self.assertEqual(self.gh.get_release_id("v1.0.1"), 1)
+            self.assertEqual(self.gh.get_release_id("v1.0.0"), 2)
+            self.assertEqual(self.request.call_count, 1)
+            # Continues the sweep on the next page.
+            self.assertEqual(self.gh.get_release_id("v0.9.0"), 3)
+            self.assertEqual(self.request.call_count, 2)
+            # Misses after a full sweep are free.
+            self.assertIsNone(self.gh.get_release_id("v2.0.0"))
+            self.assertIsNone(self.gh.get_release_id("v2.0.0"))
+            self.assertEqual(self.request.call_count, 2)
+
+    def test_release_index_expires(self) -> None:
+        now = 0.0
+        self.gh._cache = response_cache.ResponseCache(clock=lambda: now)
+        with patch.object(self.gh, "_request", self.request):
+            self.assertIsNone(self.gh.get_release_id("v2.0.0"))
+            # Someone creates the release by hand.
+            self.pages["https://api.test/repos/owner/repo/releases"] = _response(
+                [{"id": 5, "tag_name": "v2.0.0"}]
+            )
+            self.assertIsNone(self.gh.get_release_id("v2.0.0"))
+            now = 61.0
+            self.assertEqual(self.gh.get_release_id("v2.0.0"), 5)
+
+    def test_release_index_invalidated_on_create(self) -> None:
+        self.pages["https://api.test/repos/owner/repo/releases"] = _response(
+            [{"id": 1, "tag_name": "v1.0.1"}]
+        )
+        with patch.object(self.gh, "_request", self.request):
+            self.assertIsNone(self.gh.get_release_id("v1.1.0"))
+        with patch.object(self.gh, "api_post", return_value={"id": 4}):
+            self.gh.create_release("v1.1.0", "notes", prerelease=False)
+        self.pages["https://api.test/repos/owner/repo/releases"] = _response(
+            [{"id": 4, "tag_name": "v1.1.0"}, {"id": 1, "tag_name": "v1.0.1"}]
+        )
+        with patch.object(self.gh, "_request", self.request):
+            self.assertEqual(self.gh.get_release_id("v1.1.0"), 4)
+
+    def test_list_with_key(self) -> None:
+        self.pages["https://api.test/repos/owner/repo/actions/runs/1/artifacts"] = (
+            _response({"total_count": 1, "artifacts": [{"name": "a"}]})
+        )
+        with patch.object(self.gh, "_request", self.request):
+            self.assertEqual(
+                self.gh.api_list(
+                    "/repos/owner/repo/actions/runs/1/artifacts", key="artifacts"
+                ),
+                [{"name": "a"}],
+            )
+
+    def test_checks_is_one_request(self) -> None:
+        def run(name: str, status: str, conclusion: str | None) -> dict[str, Any]:
+            return {
+                "id": hash(name),
+                "name": name,
+                "status": status,
+                "conclusion": conclusion,
+                "html_url": "url",
+            }
+
+        url = "https://api.test/repos/owner/repo/commits/sha/check-runs"
+        self.pages[url] = _response(
+            {"check_runs": [run("a", "completed", "success"), run("b", "queued", None)]}
+        )
+        with patch.object(self.gh, "_request", self.request):
+            checks, changed = self.gh.poll_checks("sha", {})
+        self.assertEqual(self.request.call_count, 1)
+        self.assertEqual(set(checks), {"a", "b"})
+        self.assertEqual(len(changed), 2)
+
+        self.pages[url] = _response(
+            {
+                "check_runs": [
+                    run("a", "completed", "success"),
+                    run("b", "completed", "failure"),
+                ]
+            }
+        )
+        with patch.object(self.gh, "_request", self.request):
+            checks, changed = self.gh.poll_checks("sha", checks)
+        self.assertEqual([c.name for c in changed], ["b"])
+        self.assertEqual(checks["b"].conclusion, "failure")
+
+
+class _Raw:
+    """A response body that drops the connection after `fail_after` bytes."""
+
+    def __init__(self, data: bytes, fail_after: int | None = None) -> None:
+        self.data = data
+        self.fail_after = fail_after
+
+    def stream(self, chunk_size: int, decode_content: bool) -> Iterator[bytes]:
+        end = len(self.data) if self.fail_after is None else self.fail_after
+        for i in range(0, end, chunk_size):
+            yield self.data[i : min(i + chunk_size, end)]
+        if self.fail_after is not None:
+            raise urllib3.exceptions.ProtocolError("Connection broken")
+
+    def close(self) -> None:
+        pass
+
+
+def _stream(
+    data: bytes, status: int = 200, fail_after: int | None = None
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = _Raw(data, fail_after)
+    return response
+
+
+class TestDownload(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gh = github.GitHub(
+            api_url="https://api.test",
+            repo_name="owner/repo",
+            http=github.HttpConfig(cache_dir=None),
+        )
+        self.data = bytes(range(256)) * 64
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+
+    def test_streams_to_file(self) -> None:
+        out = io.BytesIO()
+        with patch.object(self.gh, "_request", return_value=_stream(self.data)) as r:
+            self.assertEqual(self.gh.download_asset_to(1, out), self.sha256)
+        self.assertEqual(out.getvalue(), self.data)
+        self.assertTrue(r.call_args.kwargs["stream"])
+
+    def test_resumes_with_range(self) -> None:
+        out = io.BytesIO()
+        responses = [
+            _stream(self.data, fail_after=1000),
+            _stream(self.data[1000:], status=206),
+        ]
+        with patch.object(self.gh, "_request", side_effect=responses) as r:
+            self.assertEqual(self.gh.download_asset_to(1, out), self.sha256)
+        self.assertEqual(out.getvalue(), self.data)
+        self.assertEqual(r.call_args.kwargs["headers"]["Range"], "bytes=1000-")
+
+    def test_restarts_if_range_is_ignored(self) -> None:
+        out = io.BytesIO(b"prefix")
+        out.seek(0, io.SEEK_END)
+        responses = [_stream(self.data, fail_after=1000), _stream(self.data)]
+        with patch.object(self.gh, "_request", side_effect=responses):
+            self.assertEqual(self.gh.download_asset_to(1, out), self.sha256)
+        self.assertEqual(out.getvalue(), b"prefix" + self.data)
+
+    def test_gives_up_eventually(self) -> None:
+        responses = [
+            _stream(self.data, fail_after=0) for _ in range(github.DOWNLOAD_RESUMES + 1)
+        ]
+        with patch.object(self.gh, "_request", side_effect=responses):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                self.gh.download_asset_to(1, io.BytesIO())
+
+    def test_extract_artifact_writes_only_changed_members(self) -> None:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as z:
+            z.writestr("dir/", b"")
+            z.writestr("dir/same.png", b"same")
+            z.writestr("dir/changed.png", b"new")
+            z.writestr("dir/ignored.txt", b"ignored")
+
+        def download(name: str, run_id: int, out: IO[bytes]) -> str:
+            out.write(buffer.getvalue())
+            return ""
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, content in (("same.png", b"same"), ("changed.png", b"old")):
+                with open(os.path.join(tmpdir, name), "wb") as f:
+                    f.write(content)
+            selected: list[str] = []
+
+            def select(member: str) -> str | None:
+                selected.append(member)
+                if not member.endswith(".png"):
+                    return None
+                return os.path.join(tmpdir, os.path.basename(member))
+
+            with patch.object(self.gh, "download_artifact_to", side_effect=download):
+                written = self.gh.extract_artifact("goldens", 1, select)
+            self.assertEqual(written, [os.path.join(tmpdir, "changed.png")])
+            with open(os.path.join(tmpdir, "changed.png"), "rb") as changed:
+                self.assertEqual(changed.read(), b"new")
+        self.assertNotIn("dir/", selected)
+
+
+class TestUploadAssets(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gh = github.GitHub(
+            repo_name="owner/repo", http=github.HttpConfig(cache_dir=None)
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _asset(self, id: int, name: str, data: bytes) -> dict[str, Any]:
+        return {
+            "id": id,
+            "name": name,
+            "content_type": "application/octet-stream",
+            "url": "url",
+            "browser_download_url": "url",
+            "size": len(data),
+            "digest": f"sha256:{hashlib.sha256(data).hexdigest()}",
+        }
+
+    def test_uploads_and_skips(self) -> None:
+        path = f"{self.tmpdir.name}/a.tar.gz"
+        with open(path, "wb") as f:
+            f.write(b"new")
+        release = {
+            "upload_url": "https://uploads.test/repos/owner/repo/releases/1/assets{?name,label}",
+            "assets": [
+                self._asset(10, "same", b"same"),
+                self._asset(11, "changed", b"old"),
+            ],
+        }
+        uploads = [
+            github.AssetUpload("a.tar.gz", "application/gzip", path),
+            github.AssetUpload("same", "text/plain", io.BytesIO(b"same")),
+            github.AssetUpload("changed", "text/plain", io.BytesIO(b"changed")),
+        ]
+        with patch.object(
+            self.gh, "get_release", return_value=release
+        ) as get_release, patch.object(
+            self.gh, "api_post_uploads", return_value={"id": 12}
+        ) as post, patch.object(
+            self.gh, "api_delete"
+        ) as delete, patch.object(
+            self.gh, "api_patch"
+        ) as rename:
+            results = self.gh.upload_assets("v1.0.0", uploads, max_workers=2)
+
+        get_release.assert_called_once_with("v1.0.0")
+        self.assertEqual([r.skipped for r in results], [False, True, False])
+        self.assertEqual([r.size for r in results], [3, 4, 7])
+        temp = f"changed.{hashlib.sha256(b'changed').hexdigest()[:12]}.tmp"
+        self.assertEqual(
+            sorted(c.kwargs["params"]["name"] for c in post.call_args_list),
+            ["a.tar.gz", temp],
+        )
+        for c in post.call_args_list:
+            self.assertEqual(
+                c.args[0], "https://uploads.test/repos/owner/repo/releases/1/assets"
+            )
+        # The old asset is only replaced once the new one is uploaded.
+        delete.assert_called_once_with("/repos/owner/repo/releases/assets/11")
+        rename.assert_called_once_with(
+            "/repos/owner/repo/releases/assets/12", json={"name": "changed"}
+        )
+
+    def test_failed_upload_keeps_old_asset(self) -> None:
+        release = {
+            "upload_url": "https://uploads.test/repos/owner/repo/releases/1/assets",
+            "assets": [self._asset(11, "changed", b"old")],
+        }
+        uploads = [github.AssetUpload("changed", "text/plain", io.BytesIO(b"new"))]
+        with patch.object(self.gh, "get_release", return_value=release), patch.object(
+            self.gh, "api_post_uploads", side_effect=requests.HTTPError("502")
+        ), patch.object(self.gh, "api_delete") as delete:
+            with self.assertRaises(requests.HTTPError):
+                self.gh.upload_assets("v1.0.0", uploads)
+        delete.assert_not_called()
+
+    def test_missing_release(self) -> None:
+        with patch.object(self.gh, "get_release", return_value=None):
+            with self.assertRaises(ValueError):
+                self.gh.upload_assets("v1.0.0", [])
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gh = github.GitHub(
+            api_url="https://api.test",
+            github_token="token",
+            repo_name="owner/repo",
+            http=github.HttpConfig(cache_dir=None),
+        )
+
+    def test_reads_own_writes(self) -> None:
+        issue = {"title": "old"}
+        responses = {
+            "GET": lambda: _response(dict(issue)),
+            "PATCH": lambda: _response(issue.update(title="new") or issue),
+        }
+        request = MagicMock(side_effect=lambda method, url, **kw: responses[method]())
+        with patch.object(self.gh, "_session") as session:
+            session.return_value.request = request
+            self.assertEqual(self.gh.api("/repos/owner/repo/issues/1")["title"], "old")
+            self.assertEqual(self.gh.api("/repos/owner/repo/issues/1")["title"], "old")
+            self.assertEqual(request.call_count, 1)
+            self.gh.api_patch("/repos/owner/repo/issues/1", json={"title": "new"})
+            self.assertEqual(self.gh.api("/repos/owner/repo/issues/1")["title"], "new")
+        stats = self.gh.cache_stats()
+        self.assertEqual((stats.hits, stats.misses, stats.invalidations), (1, 2, 1))
+
+    def test_writes_invalidate_under_api_prefix(self) -> None:
+        gh = github.GitHub(
+            api_url="https://ghes.test/api/v3",
+            github_token="token",
+            repo_name="owner/repo",
+            http=github.HttpConfig(cache_dir=None),
+        )
+        with patch.object(gh, "_session") as session:
+            session.return_value.request.return_value = _response({"title": "t"})
+            gh.api("/repos/owner/repo/issues/1")
+            gh.api_patch("/repos/owner/repo/issues/1", json={"title": "new"})
+            gh.api("/repos/owner/repo/issues/1")
+        stats = gh.cache_stats()
+        self.assertEqual((stats.hits, stats.misses, stats.invalidations), (0, 2, 1))
+
+    def test_cache_path(self) -> None:
+        gh = github.GitHub(
+            api_url="https://ghes.test/api/v3", http=github.HttpConfig(cache_dir=None)
+        )
+        self.assertEqual(
+            gh._cache_path("https://ghes.test/api/v3/repos/o/r/issues/1?x=1"),
+            "/repos/o/r/issues/1",
+        )
+        self.assertEqual(
+            gh._cache_path("https://ghes.test/api/uploads/repos/o/r/releases/1/assets"),
+            "/repos/o/r/releases/1/assets",
+        )
+        self.assertEqual(
+            self.gh._cache_path("https://api.test/repos/o/r/issues"),
+            "/repos/o/r/issues",
+        )
+
+    def test_concurrent_reads_share_one_request(self) -> None:
+        def respond(method: str, url: str, **kw: Any) -> requests.Response:
+            # Hold the response until the other readers are waiting for it.
+            deadline = time.monotonic() + 5
+            while self.gh.cache_stats().coalesced < 3 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            return _response({"tag_name": "v1.0.0"})
+
+        request = MagicMock(side_effect=respond)
+        with patch.object(self.gh, "_session") as session:
+            session.return_value.request = request
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(
+                    pool.map(
+                        lambda _: self.gh.api("/repos/owner/repo/releases/1"),
+                        range(4),
+                    )
+                )
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(results, [{"tag_name": "v1.0.0"}] * 4)
+        # Everyone shares the one parsed result.
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_graphql_query_is_a_read(self) -> None:
+        with patch.object(self.gh, "_session") as session, patch.object(
+            self.gh._limiter, "acquire"
+        ) as acquire:
+            session.return_value.request.return_value = _response({"data": {}})
+            self.gh.api("/repos/owner/repo/issues/1")
+            with ratelimit.priority(ratelimit.Priority.LOW):
+                self.gh.graphql("\n  query { viewer { login } }")
+            self.assertEqual(
+                acquire.call_args.args,
+                ("GITHUB", ratelimit.Priority.LOW, False, "graphql"),
+            )
+            # The query didn't invalidate the cached read.
+            self.gh.api("/repos/owner/repo/issues/1")
+            self.assertEqual(self.gh.cache_stats().hits, 1)
+            self.gh.graphql("mutation { addStar }")
+            self.assertEqual(
+                acquire.call_args.args,
+                ("GITHUB", ratelimit.Priority.HIGH, True, "graphql"),
+            )
+
+
+class TestPushSigned(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.files = {
+            f"{self.tmpdir.name}/same.txt": b"unchanged\n",
+            f"{self.tmpdir.name}/moved.txt": b"known content\n",
+            f"{self.tmpdir.name}/new.txt": b"new text\n",
+            f"{self.tmpdir.name}/icon.png": b"\x89PNG\xff\x00",
+        }
+        for path, data in self.files.items():
+            with open(path, "wb") as f:
+                f.write(data)
+        self.git = MagicMock()
+        self.git.files_changed.return_value = list(self.files)
+        self.git.branch_sha.return_value = "head"
+        self.git.commit_message.return_value = "message"
+        self.gh = github.GitHub(
+            git_prov=self.git, http=github.HttpConfig(cache_dir=None)
+        )
+
+    def test_blob_sha_matches_git(self) -> None:
+        # `printf 'hello\n' | git hash-object --stdin`
+        self.assertEqual(
+            github._blob_sha(b"hello\n"), "ce013625030ba8dba906f756967f9e9ca394464a"
+        )
+
+    def test_uploads_only_missing_blobs(self) -> None:
+        base_tree = {
+            "tree": [
+                {
+                    "path": f"{self.tmpdir.name}/same.txt",
+                    "mode": "100755",
+                    "type": "blob",
+                    "sha": github._blob_sha(b"unchanged\n"),
+                },
+                {
+                    "path": "elsewhere.txt",
+                    "mode": "100644",
+                    "type": "blob",
+                    "sha": github._blob_sha(b"known content\n"),
+                },
+            ]
+        }
+        blobs: list[dict[str, str]] = []
+
+        def post(url: str, auth: Any = None, json: Any = None) -> Any:
+            if url.endswith("/git/blobs"):
+                blobs.append(json)
+                data = json["content"].encode()
+                if json["encoding"] == "base64":
+                    data = base64.b64decode(data)
+                return {"sha": github._blob_sha(data)}
+            return {"sha": "new"}
+
+        with patch.object(
+            self.gh, "api_uncached", return_value=base_tree
+        ), patch.object(
+            self.gh, "api_post", side_effect=post
+        ) as api_post, patch.object(
+            self.gh, "api_patch"
+        ):
+            self.gh.push_signed(types.RepoSlug("o", "r"), "commit", "head", "target")
+
+        self.assertEqual(sorted(b["encoding"] for b in blobs), ["base64", "utf-8"])
+        tree = next(
+            c.kwargs["json"]["tree"]
+            for c in api_post.call_args_list
+            if c.args[0].endswith("/git/trees")
+        )
+        self.assertEqual(
+            sorted(os.path.basename(e["path"]) for e in tree),
+            ["icon.png", "moved.txt", "new.txt"],
+        )
+
+
+class TestConditionalRequests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.gh = github.GitHub(
+            api_url="https://api.test",
+            github_token="token",  # nosec
+            http=github.HttpConfig(cache_dir=self.tmpdir.name),
+        )
+
+    def test_not_modified_is_served_from_disk(self) -> None:
+        request = MagicMock(
+            side_effect=[
+                _response({"login": "alice"}, headers={"ETag": '"abc"'}),
+                _response(None, status=304),
+            ]
+        )
+        with patch.object(self.gh, "_request", request):
+            self.assertEqual(self.gh.api_uncached("/user")["login"], "alice")
+            self.assertEqual(self.gh.api_uncached("/user")["login"], "alice")
+        self.assertNotIn("If-None-Match", request.call_args_list[0].kwargs["headers"])
+        self.assertEqual(
+            request.call_args_list[1].kwargs["headers"]["If-None-Match"], '"abc"'
+        )
+
+    def test_cache_survives_new_provider(self) -> None:
+        with patch.object(
+            self.gh,
+            "_request",
+            return_value=_response([1], headers={"ETag": '"v1"'}),
+        ):
+            self.gh.api_uncached("/repos/o/r/releases")
+        gh = github.GitHub(
+            api_url="https://api.test",
+            github_token="token",  # nosec
+            http=github.HttpConfig(cache_dir=self.tmpdir.name),
+        )
+        with patch.object(gh, "_request", return_value=_response(None, status=304)):
+            self.assertEqual(gh.api_uncached("/repos/o/r/releases"), [1])
+
+    def test_cache_is_keyed_by_token(self) -> None:
+        with patch.object(
+            self.gh,
+            "_request",
+            return_value=_response([1], headers={"ETag": '"v1"'}),
+        ):
+            self.gh.api_uncached("/repos/o/r/releases")
+        gh = github.GitHub(
+            api_url="https://api.test",
+            github_token="other",  # nosec
+            http=github.HttpConfig(cache_dir=self.tmpdir.name),
+        )
+        with patch.object(gh, "_request", return_value=_response([2])) as request:
+            self.assertEqual(gh.api_uncached("/repos/o/r/releases"), [2])
+        self.assertNotIn("If-None-Match", request.call_args.kwargs["headers"])
+
 
 class TestMarkdownPatcher(unittest.TestCase):
     def test_patch_new_section(self) -> None:
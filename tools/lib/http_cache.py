@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+def default_directory() -> str | None:
+    """Get the directory for the on-disk HTTP cache.
+
+    $CI_TOOLS_CACHE_DIR overrides the location; setting it to an empty string
+    disables the cache.
+    """
+    configured = os.getenv("CI_TOOLS_CACHE_DIR")
+    if configured is not None:
+        return configured or None
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "toktok-ci-tools", "github")
+
+
+@dataclass
+class CacheEntry:
+    etag: str | None
+    last_modified: str | None
+    body: str
+    next_url: str | None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers that make the server answer 304 if nothing changed."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class HttpCache:
+    """A persistent cache for conditional GET requests.
+
+    Entries are stored one file per key. They are never served without
+    revalidation: the caller sends the validators from `conditional_headers`
+    and only uses the stored body if the server responds with 304.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def key(self, *parts: Any) -> str:
+        """Compute a stable cache key from the request identity."""
+        data = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> CacheEntry | None:
+        """Load a cache entry, or None if there is no (valid) entry."""
+        try:
+            with open(self._path(key), "r") as f:
+                return CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def store(
+        self,
+        key: str,
+        etag: str | None,
+        last_modified: str | None,
+        body: str,
+        next_url: str | None = None,
+    ) -> None:
+        """Store a response body with its validators.
+
+        Responses without validators are not stored, since they could never be
+        revalidated.
+        """
+        if not etag and not last_modified:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            # Write to a temporary file first so concurrent readers (e.g. other
+            # release jobs on the same machine) never see a partial entry.
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(asdict(CacheEntry(etag, last_modified, body, next_url)), f)
+            os.replace(tmp, path)
+        except OSError as e:
+            # The cache is an optimization; never fail a request because of it.
+            print(f"Could not write HTTP cache entry {path}: {e}")
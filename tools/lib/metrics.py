@@ -0,0 +1,342 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import atexit
+import bisect
+import collections
+import contextlib
+import json
+import re
+import threading
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Mapping
+
+# Upper bounds (in seconds) of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Path segments that are followed by a name rather than a fixed word.
+_NAMED = {
+    "assets": "{id}",
+    "commits": "{sha}",
+}
+# Path segments that are followed by a name that may itself contain slashes
+# (e.g. "refs/heads/feature/x"), so everything after them is one name.
+_NAMED_REST = {
+    "branches": "{branch}",
+    "compare": "{basehead}",
+    "contents": "{path}",
+    "heads": "{branch}",
+    "matching-refs": "{ref}",
+    "tags": "{tag}",
+}
+_ID = re.compile(r"^\d+$")
+_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+
+def endpoint_template(method: str, url: str) -> str:
+    """Normalize a request to its endpoint template.
+
+    Requests for different issues, commits, branches or repositories count
+    towards the same endpoint, e.g. "GET /repos/{owner}/{repo}/issues/{id}",
+    so the number of endpoints stays bounded.
+    """
+    parts = urllib.parse.urlsplit(url).path.split("/")
+    repos = parts.index("repos") if "repos" in parts else -1
+    out = []
+    for i, part in enumerate(parts):
+        prev = parts[i - 1] if i > 0 else ""
+        if repos >= 0 and i == repos + 1:
+            out.append("{owner}")
+        elif repos >= 0 and i == repos + 2:
+            out.append("{repo}")
+        elif prev in _NAMED_REST and part:
+            out.append(_NAMED_REST[prev])
+            break
+        elif _ID.match(part):
+            out.append("{id}")
+        elif _SHA.match(part):
+            out.append("{sha}")
+        elif prev in _NAMED:
+            out.append(_NAMED[prev])
+        else:
+            out.append(part)
+    return f"{method} {'/'.join(out)}"
+
+
+@dataclass
+class EndpointStats:
+    calls: int = 0
+    # Reads answered without a request: from the in-memory cache, or by
+    # sharing the response of a concurrent identical read.
+    cache_hits: int = 0
+    # Requests answered with 304 Not Modified from the on-disk cache.
+    not_modified: int = 0
+    response_bytes: int = 0
+    latency_sum: float = 0.0
+    # Counts per LATENCY_BUCKETS entry, plus one for everything slower.
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    statuses: collections.Counter[int] = field(default_factory=collections.Counter)
+    # Requests sent again after a transient error or a rate limit.
+    retries: int = 0
+    # The X-RateLimit-Remaining of the last response, if any.
+    rate_limit_remaining: int | None = None
+
+
+class Metrics:
+    """Per-endpoint telemetry for the HTTP requests of a process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, EndpointStats] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _stats(self, method: str, url: str) -> EndpointStats:
+        return self._endpoints.setdefault(
+            endpoint_template(method, url), EndpointStats()
+        )
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        status: int,
+        seconds: float,
+        response_bytes: int,
+        headers: Mapping[str, str],
+    ) -> None:
+        """Record one request that was sent over the network."""
+        with self._lock:
+            s = self._stats(method, url)
+            s.calls += 1
+            s.statuses[status] += 1
+            if status == 304:
+                s.not_modified += 1
+            s.response_bytes += response_bytes
+            s.latency_sum += seconds
+            s.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            try:
+                s.rate_limit_remaining = int(headers["X-RateLimit-Remaining"])
+            except (KeyError, ValueError):
+                pass
+
+    def record_cache_hit(self, method: str, url: str) -> None:
+        """Record a read that was served from memory."""
+        with self._lock:
+            self._stats(method, url).cache_hits += 1
+
+    def record_retry(self, method: str, url: str) -> None:
+        """Record that a request is about to be sent again."""
+        with self._lock:
+            self._stats(method, url).retries += 1
+
+    def total_requests(self) -> int:
+        with self._lock:
+            return sum(s.calls for s in self._endpoints.values())
+
+    def endpoints(self) -> dict[str, EndpointStats]:
+        with self._lock:
+            return dict(self._endpoints)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_json(self) -> str:
+        with self._lock:
+            return json.dumps(
+                {
+                    endpoint: {
+                        "calls": s.calls,
+                        "cache_hits": s.cache_hits,
+                        "not_modified": s.not_modified,
+                        "response_bytes": s.response_bytes,
+                        "latency_sum": s.latency_sum,
+                        "latency_buckets": dict(
+                            zip([*map(str, LATENCY_BUCKETS), "+Inf"], s.latency_buckets)
+                        ),
+                        "statuses": {str(k): v for k, v in s.statuses.items()},
+                        "retries": s.retries,
+                        "rate_limit_remaining": s.rate_limit_remaining,
+                    }
+                    for endpoint, s in sorted(self._endpoints.items())
+                },
+                indent=2,
+            )
+
+    @staticmethod
+    def _label(value: str) -> str:
+        """Escape a label value for the Prometheus text format."""
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE github_requests_total counter",
+            "# TYPE github_cache_hits_total counter",
+            "# TYPE github_not_modified_total counter",
+            "# TYPE github_response_bytes_total counter",
+            "# TYPE github_retries_total counter",
+            "# TYPE github_request_seconds histogram",
+            "# TYPE github_rate_limit_remaining gauge",
+        ]
+        with self._lock:
+            for endpoint, s in sorted(self._endpoints.items()):
+                method, path = endpoint.split(" ", 1)
+                labels = (
+                    f'method="{self._label(method)}",endpoint="{self._label(path)}"'
+                )
+                for status, count in sorted(s.statuses.items()):
+                    lines.append(
+                        f'github_requests_total{{{labels},status="{status}"}} {count}'
+                    )
+                lines.append(f"github_cache_hits_total{{{labels}}} {s.cache_hits}")
+                lines.append(f"github_not_modified_total{{{labels}}} {s.not_modified}")
+                lines.append(
+                    f"github_response_bytes_total{{{labels}}} {s.response_bytes}"
+                )
+                lines.append(f"github_retries_total{{{labels}}} {s.retries}")
+                cumulative = 0
+                for bound, count in zip(
+                    [*map(str, LATENCY_BUCKETS), "+Inf"], s.latency_buckets
+                ):
+                    cumulative += count
+                    lines.append(
+                        f'github_request_seconds_bucket{{{labels},le="{bound}"}}'
+                        f" {cumulative}"
+                    )
+                lines.append(f"github_request_seconds_sum{{{labels}}} {s.latency_sum}")
+                lines.append(f"github_request_seconds_count{{{labels}}} {s.calls}")
+                if s.rate_limit_remaining is not None:
+                    lines.append(
+                        f"github_rate_limit_remaining{{{labels}}}"
+                        f" {s.rate_limit_remaining}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Write the metrics to a file: Prometheus text for *.prom, else JSON."""
+        with open(path, "w") as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
+
+    def export_at_exit(self, path: str | None) -> None:
+        """Write the metrics to the given file when the process exits."""
+        if path:
+            atexit.register(self.export, path)
+
+
+# The metrics of all GitHub providers in this process.
+REGISTRY = Metrics()
+
+
+@dataclass
+class CommandStats:
+    calls: int = 0
+    # Calls that raised, e.g. because the command exited with an error.
+    failures: int = 0
+    seconds_sum: float = 0.0
+    seconds_max: float = 0.0
+
+
+class CallBudgetExceeded(AssertionError):
+    """More commands were run than a budget allowed."""
+
+
+class CommandMetrics:
+    """Per-subcommand telemetry for the git processes started by a process.
+
+    If `trace_path` is set, every command is also appended to that file as
+    one JSON object per line, in the order they finished.
+    """
+
+    def __init__(self, trace_path: str | None = None) -> None:
+        self.trace_path = trace_path
+        self._lock = threading.Lock()
+        self._commands: dict[str, CommandStats] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, args: list[str], seconds: float, failed: bool = False) -> None:
+        """Record one finished command; `args` start with the subcommand."""
+        with self._lock:
+            s = self._commands.setdefault(args[0], CommandStats())
+            s.calls += 1
+            s.failures += failed
+            s.seconds_sum += seconds
+            s.seconds_max = max(s.seconds_max, seconds)
+            if self.trace_path:
+                with open(self.trace_path, "a") as f:
+                    record = {"args": args, "seconds": seconds, "failed": failed}
+                    print(json.dumps(record), file=f)
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(s.calls for s in self._commands.values())
+
+    def commands(self) -> dict[str, CommandStats]:
+        with self._lock:
+            return dict(self._commands)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._commands.clear()
+
+    @contextlib.contextmanager
+    def budget(self, max_calls: int) -> Iterator[None]:
+        """Raise CallBudgetExceeded if the block runs more than max_calls commands."""
+        before = {k: s.calls for k, s in self.commands().items()}
+        yield
+        spent = {
+            k: s.calls - before.get(k, 0)
+            for k, s in sorted(self.commands().items())
+            if s.calls > before.get(k, 0)
+        }
+        if sum(spent.values()) > max_calls:
+            raise CallBudgetExceeded(
+                f"{sum(spent.values())} commands run, budget was {max_calls}: "
+                + ", ".join(f"{k} x{n}" for k, n in spent.items())
+            )
+
+    def to_json(self) -> str:
+        with self._lock:
+            return json.dumps(
+                {
+                    command: {
+                        "calls": s.calls,
+                        "failures": s.failures,
+                        "seconds_sum": s.seconds_sum,
+                        "seconds_max": s.seconds_max,
+                    }
+                    for command, s in sorted(self._commands.items())
+                },
+                indent=2,
+            )
+
+    def export(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    def export_at_exit(self, path: str | None) -> None:
+        """Write the metrics to the given file when the process exits."""
+        if path:
+            atexit.register(self.export, path)
+
+
+# The metrics of all git commands started by this process.
+GIT_REGISTRY = CommandMetrics()
@@ -0,0 +1,168 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import json
+import os
+import tempfile
+import unittest
+
+from lib.metrics import CallBudgetExceeded, CommandMetrics, Metrics, endpoint_template
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    def test_ids_and_names(self) -> None:
+        self.assertEqual(
+            endpoint_template("GET", "https://api.github.com/repos/a/b/issues/12"),
+            "GET /repos/{owner}/{repo}/issues/{id}",
+        )
+        self.assertEqual(
+            endpoint_template("GET", "https://api.github.com/repos/a/b/branches/main"),
+            "GET /repos/{owner}/{repo}/branches/{branch}",
+        )
+        self.assertEqual(
+            endpoint_template(
+                "GET", f"https://api.github.com/repos/a/b/commits/{'f' * 40}/check-runs"
+            ),
+            "GET /repos/{owner}/{repo}/commits/{sha}/check-runs",
+        )
+        self.assertEqual(
+            endpoint_template(
+                "PATCH", "https://api.github.com/repos/a/b/git/refs/tags/v1"
+            ),
+            "PATCH /repos/{owner}/{repo}/git/refs/tags/{tag}",
+        )
+
+    def test_names_with_slashes(self) -> None:
+        self.assertEqual(
+            endpoint_template(
+                "GET", "https://api.github.com/repos/a/b/git/refs/heads/feature/x"
+            ),
+            "GET /repos/{owner}/{repo}/git/refs/heads/{branch}",
+        )
+        self.assertEqual(
+            endpoint_template(
+                "GET", "https://api.github.com/repos/a/b/compare/main...feature/x"
+            ),
+            "GET /repos/{owner}/{repo}/compare/{basehead}",
+        )
+        self.assertEqual(
+            endpoint_template(
+                "GET", "https://api.github.com/repos/a/b/branches/release/v1/protection"
+            ),
+            "GET /repos/{owner}/{repo}/branches/{branch}",
+        )
+
+    def test_api_prefix(self) -> None:
+        self.assertEqual(
+            endpoint_template("GET", "https://ghes.test/api/v3/repos/a/b/issues/1"),
+            "GET /api/v3/repos/{owner}/{repo}/issues/{id}",
+        )
+
+    def test_ignores_query(self) -> None:
+        self.assertEqual(
+            endpoint_template("GET", "https://api.github.com/user?page=2"),
+            "GET /user",
+        )
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = Metrics()
+        self.metrics.record(
+            "GET",
+            "https://api.test/repos/a/b/issues/1",
+            200,
+            0.3,
+            100,
+            {"X-RateLimit-Remaining": "4999"},
+        )
+        self.metrics.record(
+            "GET", "https://api.test/repos/a/b/issues/2", 304, 70.0, 0, {}
+        )
+        self.metrics.record_cache_hit("GET", "/repos/a/b/issues/1")
+
+    def test_aggregates_by_endpoint(self) -> None:
+        self.assertEqual(self.metrics.total_requests(), 2)
+        (stats,) = self.metrics.endpoints().values()
+        self.assertEqual(stats.calls, 2)
+        self.assertEqual(stats.cache_hits, 1)
+        self.assertEqual(stats.not_modified, 1)
+        self.assertEqual(stats.response_bytes, 100)
+        self.assertEqual(stats.statuses, {200: 1, 304: 1})
+        self.assertEqual(stats.rate_limit_remaining, 4999)
+        self.assertEqual(stats.latency_buckets[3], 1)
+        self.assertEqual(stats.latency_buckets[-1], 1)
+
+    def test_json(self) -> None:
+        data = json.loads(self.metrics.to_json())
+        stats = data["GET /repos/{owner}/{repo}/issues/{id}"]
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["latency_buckets"]["+Inf"], 1)
+
+    def test_prometheus(self) -> None:
+        text = self.metrics.to_prometheus()
+        labels = 'method="GET",endpoint="/repos/{owner}/{repo}/issues/{id}"'
+        self.assertIn(f'github_requests_total{{{labels},status="304"}} 1', text)
+        self.assertIn(f'github_request_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f"github_rate_limit_remaining{{{labels}}} 4999", text)
+
+    def test_prometheus_escapes_labels(self) -> None:
+        m = Metrics()
+        m.record("GET", 'https://api.test/weird\\"path', 200, 0.1, 0, {})
+        self.assertIn('endpoint="/weird\\\\\\"path"', m.to_prometheus())
+        self.assertEqual(Metrics._label("a\nb"), "a\\nb")
+
+    def test_export(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics.prom")
+            self.metrics.export(path)
+            with open(path) as f:
+                self.assertTrue(f.read().startswith("# TYPE"))
+
+
+class TestCommandMetrics(unittest.TestCase):
+    def test_aggregates_by_subcommand(self) -> None:
+        m = CommandMetrics()
+        m.record(["rev-parse", "HEAD"], 0.01)
+        m.record(["rev-parse", "--show-toplevel"], 0.03)
+        m.record(["push", "origin"], 0.5, failed=True)
+        self.assertEqual(m.total_calls(), 3)
+        stats = m.commands()["rev-parse"]
+        self.assertEqual(stats.calls, 2)
+        self.assertAlmostEqual(stats.seconds_sum, 0.04)
+        self.assertEqual(stats.seconds_max, 0.03)
+        self.assertEqual(m.commands()["push"].failures, 1)
+        self.assertEqual(json.loads(m.to_json())["push"]["failures"], 1)
+
+    def test_trace(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "trace.jsonl")
+            m = CommandMetrics(trace_path=path)
+            m.record(["fetch", "origin"], 1.5)
+            m.record(["tag", "v1.0.0"], 0.1, failed=True)
+            with open(path) as f:
+                trace = [json.loads(line) for line in f]
+        self.assertEqual(
+            trace,
+            [
+                {"args": ["fetch", "origin"], "seconds": 1.5, "failed": False},
+                {"args": ["tag", "v1.0.0"], "seconds": 0.1, "failed": True},
+            ],
+        )
+
+    def test_budget(self) -> None:
+        m = CommandMetrics()
+        m.record(["fetch"], 0.1)
+        with m.budget(2):
+            m.record(["rev-parse"], 0.1)
+            m.record(["rev-parse"], 0.1)
+        with self.assertRaisesRegex(
+            CallBudgetExceeded, "3 commands run, budget was 2: log x1, rev-parse x2"
+        ):
+            with m.budget(2):
+                m.record(["rev-parse"], 0.1)
+                m.record(["log"], 0.1)
+                m.record(["rev-parse"], 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
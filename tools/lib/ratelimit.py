@@ -0,0 +1,226 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import contextlib
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Iterator, Mapping
+
+sleep = time.sleep
+
+# How long to back off from a secondary rate limit that didn't say how long
+# to wait (GitHub recommends at least one minute).
+SECONDARY_LIMIT_BACKOFF = 60.0
+
+
+# The rate limit resource of requests that don't say otherwise. GitHub keeps a
+# separate budget per resource (core, search, graphql, ...) for every token.
+CORE = "core"
+
+
+def resource(path: str) -> str:
+    """Guess which rate limit resource a request to `path` counts against.
+
+    Responses name it in the X-RateLimit-Resource header, but we need to know
+    before sending the request which budget to pace it by.
+    """
+    if path.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    if "/search/code" in path:
+        return "code_search"
+    if "/search/" in path:
+        return "search"
+    return CORE
+
+
+class Priority(IntEnum):
+    # Background reads that may be delayed, e.g. dashboard heuristics.
+    LOW = 0
+    # Regular reads.
+    NORMAL = 1
+    # Writes: these are what make progress, so they get the last tokens.
+    HIGH = 2
+
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def priority(p: Priority) -> Iterator[None]:
+    """Run the reads made by the current thread at the given priority."""
+    old = current_priority()
+    _local.priority = p
+    try:
+        yield
+    finally:
+        _local.priority = old
+
+
+def current_priority() -> Priority:
+    """Get the read priority of the current thread."""
+    return getattr(_local, "priority", Priority.NORMAL)
+
+
+# The fraction of the rate limit that a request of the given priority must
+# leave untouched for higher priorities. A LOW request waits for the reset
+# once fewer than 20% of the requests are left; HIGH may use everything.
+RESERVE: dict[Priority, float] = {
+    Priority.LOW: 0.2,
+    Priority.NORMAL: 0.05,
+    Priority.HIGH: 0.0,
+}
+
+
+@dataclass
+class Budget:
+    """What we know about the rate limit of one resource of one token."""
+
+    limit: int | None = None
+    remaining: int | None = None
+    # Epoch seconds at which `remaining` is restored to `limit`.
+    reset: float = 0.0
+    # Epoch seconds before which no request should be sent (Retry-After).
+    blocked_until: float = 0.0
+
+
+class RateLimiter:
+    """Paces requests based on the rate limit headers GitHub returns.
+
+    One budget is kept per token ("bucket") and rate limit resource, since
+    each token has a separate limit for each resource. Writes are spaced out
+    per token, whatever resource they use.
+
+    Budgets are learned from response headers only. Processes sharing a token
+    therefore still see each other's consumption.
+    """
+
+    def __init__(
+        self,
+        pace_below: float = 0.5,
+        min_write_interval: float = 1.0,
+        max_wait: float = 15 * 60,
+    ) -> None:
+        """Initializes a rate limiter with no known budgets.
+
+        Once less than `pace_below` of the limit is left, requests are spread
+        evenly over the time until the reset. Writes are spaced at least
+        `min_write_interval` seconds apart, as GitHub recommends to avoid
+        secondary rate limits. No single request waits longer than `max_wait`
+        seconds; it is sent (and allowed to fail) instead.
+        """
+        self.pace_below = pace_below
+        self.min_write_interval = min_write_interval
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._budgets: dict[tuple[str, str], Budget] = {}
+        # Epoch seconds before which the next write of a bucket may not start.
+        self._next_write: dict[str, float] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def budget(self, bucket: str, resource: str = CORE) -> Budget:
+        with self._lock:
+            return self._budgets.setdefault((bucket, resource), Budget())
+
+    def delay(
+        self, bucket: str, priority: Priority, write: bool, resource: str = CORE
+    ) -> float:
+        """Compute how long a request needs to wait before it may be sent."""
+        with self._lock:
+            return self._delay(bucket, priority, write, resource, time.time())
+
+    def _delay(
+        self, bucket: str, priority: Priority, write: bool, resource: str, now: float
+    ) -> float:
+        b = self._budgets.setdefault((bucket, resource), Budget())
+        delay = max(0.0, b.blocked_until - now)
+        if write:
+            delay = max(delay, self._next_write.get(bucket, 0.0) - now)
+        if b.limit and b.remaining is not None and b.reset > now:
+            if b.remaining <= b.limit * RESERVE[priority]:
+                # Leave the rest of the budget to higher priority requests.
+                delay = max(delay, b.reset - now)
+            elif b.remaining < b.limit * self.pace_below:
+                delay = max(delay, (b.reset - now) / max(b.remaining, 1))
+        return min(delay, self.max_wait)
+
+    def acquire(
+        self, bucket: str, priority: Priority, write: bool, resource: str = CORE
+    ) -> None:
+        """Wait until a request may be sent.
+
+        A write reserves its slot before waiting, so concurrent writes queue
+        up behind each other instead of all seeing the same free slot.
+        """
+        with self._lock:
+            now = time.time()
+            delay = self._delay(bucket, priority, write, resource, now)
+            if write:
+                self._next_write[bucket] = now + delay + self.min_write_interval
+        if delay > 0:
+            sleep(delay)
+
+    def update(
+        self, bucket: str, headers: Mapping[str, str], resource: str = CORE
+    ) -> None:
+        """Learn the current budget from the response headers.
+
+        The budget is that of the X-RateLimit-Resource the response names, or
+        of `resource` if it doesn't.
+        """
+        resource = headers.get("X-RateLimit-Resource", resource)
+        with self._lock:
+            b = self._budgets.setdefault((bucket, resource), Budget())
+            try:
+                if "X-RateLimit-Limit" in headers:
+                    b.limit = int(headers["X-RateLimit-Limit"])
+                if "X-RateLimit-Remaining" in headers:
+                    b.remaining = int(headers["X-RateLimit-Remaining"])
+                if "X-RateLimit-Reset" in headers:
+                    b.reset = float(headers["X-RateLimit-Reset"])
+            except ValueError:
+                pass
+
+    def backoff(
+        self,
+        bucket: str,
+        status: int,
+        headers: Mapping[str, str],
+        resource: str = CORE,
+    ) -> float | None:
+        """Check whether a response was rate limited.
+
+        Returns how long to wait before retrying, or None if the response was
+        not rate limited (or waiting would take longer than `max_wait`).
+        """
+        if status not in (403, 429):
+            return None
+        now = time.time()
+        if "Retry-After" in headers:
+            try:
+                wait = float(headers["Retry-After"])
+            except ValueError:
+                wait = SECONDARY_LIMIT_BACKOFF
+        elif headers.get("X-RateLimit-Remaining") == "0":
+            wait = float(headers.get("X-RateLimit-Reset", now)) - now + 1
+        elif status == 429:
+            wait = SECONDARY_LIMIT_BACKOFF
+        else:
+            # A plain 403: permission denied, not a rate limit.
+            return None
+        if wait > self.max_wait:
+            return None
+        wait = max(wait, 0.0)
+        resource = headers.get("X-RateLimit-Resource", resource)
+        with self._lock:
+            b = self._budgets.setdefault((bucket, resource), Budget())
+            b.blocked_until = max(b.blocked_until, now + wait)
+        return wait
@@ -0,0 +1,117 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import unittest
+from unittest.mock import MagicMock, patch
+
+from lib import ratelimit
+from lib.ratelimit import Priority, RateLimiter
+
+NOW = 1_000_000.0
+
+
+def _headers(limit: int, remaining: int, reset: float) -> dict[str, str]:
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset)),
+    }
+
+
+@patch("time.time", return_value=NOW)
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.limiter = RateLimiter(min_write_interval=1.0)
+
+    def test_unknown_budget_does_not_wait(self, _: MagicMock) -> None:
+        self.assertEqual(self.limiter.delay("GITHUB", Priority.NORMAL, False), 0)
+
+    def test_plenty_left_does_not_wait(self, _: MagicMock) -> None:
+        self.limiter.update("GITHUB", _headers(5000, 4000, NOW + 600))
+        self.assertEqual(self.limiter.delay("GITHUB", Priority.LOW, False), 0)
+
+    def test_paces_when_running_low(self, _: MagicMock) -> None:
+        self.limiter.update("GITHUB", _headers(5000, 2000, NOW + 1000))
+        self.assertAlmostEqual(
+            self.limiter.delay("GITHUB", Priority.NORMAL, False), 0.5
+        )
+
+    def test_low_priority_yields(self, _: MagicMock) -> None:
+        self.limiter.update("GITHUB", _headers(5000, 500, NOW + 600))
+        self.assertEqual(self.limiter.delay("GITHUB", Priority.LOW, False), 600)
+        self.assertLess(self.limiter.delay("GITHUB", Priority.NORMAL, False), 600)
+        self.assertLess(self.limiter.delay("GITHUB", Priority.HIGH, True), 600)
+
+    def test_budgets_are_per_bucket(self, _: MagicMock) -> None:
+        self.limiter.update("GITHUB", _headers(5000, 0, NOW + 600))
+        self.assertEqual(self.limiter.delay("RELEASER", Priority.NORMAL, False), 0)
+
+    def test_budgets_are_per_resource(self, _: MagicMock) -> None:
+        self.limiter.update("GITHUB", _headers(5000, 4000, NOW + 600))
+        self.limiter.update(
+            "GITHUB",
+            {**_headers(5000, 0, NOW + 600), "X-RateLimit-Resource": "graphql"},
+        )
+        self.assertEqual(self.limiter.budget("GITHUB").remaining, 4000)
+        self.assertEqual(self.limiter.budget("GITHUB", "graphql").remaining, 0)
+        self.assertEqual(self.limiter.delay("GITHUB", Priority.NORMAL, False), 0)
+        self.assertEqual(
+            self.limiter.delay("GITHUB", Priority.NORMAL, False, "graphql"), 600
+        )
+
+    def test_resource_header_overrides_guess(self, _: MagicMock) -> None:
+        self.limiter.update(
+            "GITHUB",
+            {**_headers(30, 0, NOW + 60), "X-RateLimit-Resource": "search"},
+            resource=ratelimit.resource("/search/issues"),
+        )
+        self.assertEqual(self.limiter.budget("GITHUB", "search").remaining, 0)
+        self.assertIsNone(self.limiter.budget("GITHUB").remaining)
+
+    def test_resource(self, _: MagicMock) -> None:
+        self.assertEqual(ratelimit.resource("/repos/o/r/issues"), "core")
+        self.assertEqual(ratelimit.resource("/api/graphql"), "graphql")
+        self.assertEqual(ratelimit.resource("/search/issues"), "search")
+        self.assertEqual(ratelimit.resource("/api/v3/search/code"), "code_search")
+
+    def test_writes_are_spaced(self, time: MagicMock) -> None:
+        with patch("lib.ratelimit.sleep") as sleep:
+            self.limiter.acquire("GITHUB", Priority.HIGH, True)
+            sleep.assert_not_called()
+            time.return_value = NOW + 0.25
+            self.limiter.acquire("GITHUB", Priority.HIGH, True)
+            sleep.assert_called_once_with(0.75)
+
+    def test_concurrent_writes_reserve_slots(self, time: MagicMock) -> None:
+        # Nobody has slept yet, but each write still queues behind the last.
+        with patch("lib.ratelimit.sleep") as sleep:
+            for _ in range(3):
+                self.limiter.acquire("GITHUB", Priority.HIGH, True)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1.0, 2.0])
+
+    def test_backoff_retry_after(self, _: MagicMock) -> None:
+        self.assertEqual(self.limiter.backoff("GITHUB", 403, {"Retry-After": "30"}), 30)
+        self.assertEqual(self.limiter.delay("GITHUB", Priority.HIGH, False), 30)
+
+    def test_backoff_primary_limit(self, _: MagicMock) -> None:
+        self.assertEqual(
+            self.limiter.backoff("GITHUB", 403, _headers(5000, 0, NOW + 99)), 100
+        )
+
+    def test_backoff_ignores_other_errors(self, _: MagicMock) -> None:
+        self.assertIsNone(self.limiter.backoff("GITHUB", 403, {}))
+        self.assertIsNone(self.limiter.backoff("GITHUB", 404, {"Retry-After": "1"}))
+
+    def test_backoff_gives_up_on_long_waits(self, _: MagicMock) -> None:
+        self.assertIsNone(
+            self.limiter.backoff("GITHUB", 429, _headers(5000, 0, NOW + 3600))
+        )
+
+    def test_priority_context(self, _: MagicMock) -> None:
+        self.assertEqual(ratelimit.current_priority(), Priority.NORMAL)
+        with ratelimit.priority(Priority.LOW):
+            self.assertEqual(ratelimit.current_priority(), Priority.LOW)
+        self.assertEqual(ratelimit.current_priority(), Priority.NORMAL)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import collections
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+# How long responses from matching endpoints stay fresh, in seconds (None
+# means until invalidated). The first matching pattern wins.
+DEFAULT_TTLS: list[tuple[str, float | None]] = [
+    # The authenticated user never changes during a run.
+    (r"^/user$", None),
+    # Things people change by hand while a release is in progress.
+    (r"/(issues|pulls)(/|$)", 30.0),
+    (r"/releases(/|$)", 60.0),
+    (r"/milestones(/|$)", 120.0),
+]
+DEFAULT_TTL = 300.0
+
+# Writes to a resource type also change what the listed types return: an
+# issue's milestone changes the milestone's issue counts, and a new PR is also
+# an issue.
+RELATED: dict[str, tuple[str, ...]] = {
+    "issues": ("milestones",),
+    "pulls": ("issues",),
+}
+
+_REPO_PATH = re.compile(r"^(/repos/[^/]+/[^/]+)/([^/?]+)")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    # Misses that waited for a concurrent load of the same key instead of
+    # loading it again.
+    coalesced: int = 0
+
+
+@dataclass
+class _Entry:
+    path: str
+    value: Any
+    expires: float | None
+
+
+class _Load:
+    """A load in progress, shared by everyone who misses the same key."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+        # Set when a write to the path is invalidated while the load is in
+        # flight: its result may predate the write, so it isn't stored.
+        self.stale = False
+
+
+class ResponseCache:
+    """An in-memory LRU cache for API responses.
+
+    Entries are keyed by the full request identity but also remember the
+    resource path they were read from, so a write to a path can drop every
+    cached read it affects.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttls: list[tuple[str, float | None]] | None = None,
+        default_ttl: float | None = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self._ttls = [
+            (re.compile(p), ttl) for p, ttl in (DEFAULT_TTLS if ttls is None else ttls)
+        ]
+        self._default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[Any, _Entry] = collections.OrderedDict()
+        self._loads: dict[Any, _Load] = {}
+        self.stats = CacheStats()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_loads"] = {}
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl(self, path: str) -> float | None:
+        """Get the time to live for responses from the given path."""
+        for pattern, ttl in self._ttls:
+            if pattern.search(path):
+                return ttl
+        return self._default_ttl
+
+    def _lookup(self, key: Any) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires is not None:
+            if self._clock() >= entry.expires:
+                del self._entries[key]
+                self.stats.expirations += 1
+                return None
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: Any) -> tuple[bool, Any]:
+        """Look up a key. Returns whether it was found, and the value."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.stats.misses += 1
+                return False, None
+            self.stats.hits += 1
+            return True, entry.value
+
+    def get_or_load(
+        self, key: Any, path: str, load: Callable[[], Any]
+    ) -> tuple[bool, Any]:
+        """Look up a key, and on a miss, load the value and store it.
+
+        Concurrent misses for the same key share a single load: the first
+        caller runs it and the others wait for its result (or exception). If
+        the path is invalidated meanwhile, the result is returned but not
+        stored, and later misses start a new load. Returns whether the value was served without calling `load`, and the
+        value.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.stats.hits += 1
+                return True, entry.value
+            pending = self._loads.get(key)
+            if pending is None:
+                self.stats.misses += 1
+                pending = self._loads[key] = _Load(path)
+                leader = True
+            else:
+                self.stats.coalesced += 1
+                leader = False
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return True, pending.value
+        try:
+            pending.value = load()
+            with self._lock:
+                if not pending.stale:
+                    self._store(key, path, pending.value)
+            return False, pending.value
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._loads.get(key) is pending:
+                    del self._loads[key]
+            pending.done.set()
+
+    def put(self, key: Any, path: str, value: Any) -> None:
+        """Store the response read from `path` under the given key."""
+        with self._lock:
+            self._store(key, path, value)
+
+    def _store(self, key: Any, path: str, value: Any) -> None:
+        ttl = self.ttl(path)
+        expires = None if ttl is None else self._clock() + ttl
+        self._entries[key] = _Entry(path, value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        """Drop the cached reads affected by a write to the given path.
+
+        That is the path itself and everything below it, every collection the
+        path is in (e.g. the issue list for a write to one issue), and the
+        collections of related resource types.
+        """
+        path = path.split("?", 1)[0].rstrip("/")
+        prefixes = [path + "/"]
+        exact = {path}
+        m = _REPO_PATH.match(path)
+        if m:
+            repo, kind = m.groups()
+            # Parents up to (but not including) the repository itself.
+            parent = path
+            while len(parent) > len(repo) + 1 + len(kind):
+                parent = parent.rsplit("/", 1)[0]
+                exact.add(parent)
+            for related in RELATED.get(kind, ()):
+                exact.add(f"{repo}/{related}")
+                prefixes.append(f"{repo}/{related}/")
+
+        def affected(p: str) -> bool:
+            return p in exact or p.startswith(tuple(prefixes))
+
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if affected(e.path)]
+            for k in stale:
+                del self._entries[k]
+            self.stats.invalidations += len(stale)
+            self._drop_loads(affected)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._drop_loads(lambda _: True)
+
+    def _drop_loads(self, affected: Callable[[str], bool]) -> None:
+        """Stop in-flight loads of affected paths from being stored or joined."""
+        for k, pending in list(self._loads.items()):
+            if affected(pending.path):
+                pending.stale = True
+                del self._loads[k]
@@ -0,0 +1,142 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import pickle
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.response_cache import ResponseCache
+
+REPO = "/repos/owner/repo"
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.cache = ResponseCache(max_entries=3, clock=lambda: self.now)
+
+    def test_hit_and_miss(self) -> None:
+        self.assertEqual(self.cache.get("a"), (False, None))
+        self.cache.put("a", f"{REPO}/branches/main", 1)
+        self.assertEqual(self.cache.get("a"), (True, 1))
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(self.cache.stats.misses, 1)
+
+    def test_lru_eviction(self) -> None:
+        for key in "abc":
+            self.cache.put(key, f"{REPO}/branches/{key}", key)
+        self.cache.get("a")
+        self.cache.put("d", f"{REPO}/branches/d", "d")
+        self.assertEqual(len(self.cache), 3)
+        self.assertFalse(self.cache.get("b")[0])
+        self.assertTrue(self.cache.get("a")[0])
+        self.assertEqual(self.cache.stats.evictions, 1)
+
+    def test_ttl(self) -> None:
+        self.cache.put("issue", f"{REPO}/issues/1", 1)
+        self.cache.put("user", "/user", "me")
+        self.now = 31.0
+        self.assertFalse(self.cache.get("issue")[0])
+        self.assertEqual(self.cache.stats.expirations, 1)
+        self.now = 1e9
+        self.assertEqual(self.cache.get("user"), (True, "me"))
+
+    def test_write_invalidates_resource_and_collections(self) -> None:
+        self.cache = ResponseCache(max_entries=10)
+        self.cache.put("issue", f"{REPO}/issues/1", 1)
+        self.cache.put("list", f"{REPO}/issues", [1, 2])
+        self.cache.put("milestones", f"{REPO}/milestones", [])
+        self.cache.put("other", f"{REPO}/issues/2", 2)
+        self.cache.put("repo", REPO, {})
+        self.cache.invalidate(f"{REPO}/issues/1")
+        self.assertFalse(self.cache.get("issue")[0])
+        self.assertFalse(self.cache.get("list")[0])
+        self.assertFalse(self.cache.get("milestones")[0])
+        self.assertTrue(self.cache.get("other")[0])
+        self.assertTrue(self.cache.get("repo")[0])
+        self.assertEqual(self.cache.stats.invalidations, 3)
+
+    def test_write_to_subresource(self) -> None:
+        self.cache.put("issue", f"{REPO}/issues/1", 1)
+        self.cache.invalidate(f"{REPO}/issues/1/assignees")
+        self.assertFalse(self.cache.get("issue")[0])
+
+    def wait_for_coalesced(self, n: int) -> None:
+        deadline = time.monotonic() + 5
+        while self.cache.stats.coalesced < n and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_concurrent_misses_share_one_load(self) -> None:
+        loads = []
+
+        def load() -> str:
+            loads.append(1)
+            self.wait_for_coalesced(3)
+            return "value"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(
+                pool.map(
+                    lambda _: self.cache.get_or_load("k", f"{REPO}/releases", load),
+                    range(4),
+                )
+            )
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(
+            sorted(results),
+            [(False, "value"), (True, "value"), (True, "value"), (True, "value")],
+        )
+        self.assertEqual(self.cache.get("k"), (True, "value"))
+        self.assertEqual(self.cache.stats.coalesced, 3)
+
+    def test_failed_load_is_shared_and_not_cached(self) -> None:
+        started = threading.Event()
+
+        def load() -> str:
+            started.set()
+            self.wait_for_coalesced(1)
+            raise ValueError("boom")
+
+        errors = []
+
+        def follower() -> None:
+            started.wait(5)
+            try:
+                self.cache.get_or_load("k", f"{REPO}/releases", lambda: "unused")
+            except ValueError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=follower)
+        thread.start()
+        with self.assertRaises(ValueError):
+            self.cache.get_or_load("k", f"{REPO}/releases", load)
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(
+            self.cache.get_or_load("k", f"{REPO}/releases", lambda: "retry"),
+            (False, "retry"),
+        )
+
+    def test_write_during_load_is_not_stored(self) -> None:
+        path = f"{REPO}/releases"
+
+        def load() -> str:
+            # A write lands while the read is in flight.
+            self.cache.invalidate(f"{path}/1")
+            return "old"
+
+        self.assertEqual(self.cache.get_or_load("k", path, load), (False, "old"))
+        self.assertEqual(self.cache.get("k"), (False, None))
+        self.assertEqual(
+            self.cache.get_or_load("k", path, lambda: "new"), (False, "new")
+        )
+
+    def test_pickle(self) -> None:
+        cache = ResponseCache()
+        cache.put("a", "/user", 1)
+        self.assertEqual(pickle.loads(pickle.dumps(cache)).get("a"), (True, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
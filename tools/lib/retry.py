@@ -0,0 +1,132 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping
+
+import requests
+
+sleep = time.sleep
+
+# Server errors that are usually gone a moment later.
+TRANSIENT_STATUSES = frozenset({500, 502, 503, 504})
+
+# Methods that can be sent again without changing the outcome, even when they
+# write. Other writes are only retried if they never reached the server.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A request was not sent because its endpoint keeps failing."""
+
+
+@dataclass
+class RetryPolicy:
+    """How to retry requests that failed with a transient error."""
+
+    # Total number of tries, including the first.
+    attempts: int = 5
+    # The backoff before retry n is random in [0, base_delay * 2**n], capped
+    # at max_delay ("full jitter"), unless the server sent Retry-After.
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    # Consecutive failures of an endpoint after which requests to it fail
+    # immediately, for `reset_timeout` seconds. Then one request may try.
+    failure_threshold: int = 10
+    reset_timeout: float = 30.0
+
+    def retryable(
+        self, method: str, write: bool, error: Exception | None = None
+    ) -> bool:
+        """Whether a failed request may be sent again.
+
+        Reads are always safe to repeat, including those sent as POST (e.g.
+        GraphQL queries).
+        """
+        return (
+            not write
+            or method in IDEMPOTENT_METHODS
+            or isinstance(error, requests.exceptions.ConnectTimeout)
+        )
+
+    def backoff(self, attempt: int, headers: Mapping[str, str] | None = None) -> float:
+        """How long to wait before retry number `attempt` (starting at 0)."""
+        if headers and "Retry-After" in headers:
+            try:
+                return min(max(float(headers["Retry-After"]), 0.0), self.max_delay)
+            except ValueError:
+                pass
+        cap = min(self.max_delay, self.base_delay * 2**attempt)
+        return random.uniform(0, cap)  # nosec
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: float | None = None
+    # Whether the one request allowed through after the timeout is in flight.
+    probing: bool = False
+
+
+class CircuitBreaker:
+    """Tracks consecutive failures per endpoint and stops calling broken ones.
+
+    A circuit opens after `failure_threshold` failures in a row. While open,
+    requests fail with CircuitOpenError without being sent. After
+    `reset_timeout` seconds, a single request is let through: if it succeeds,
+    the circuit closes again, otherwise it stays open for another timeout.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._circuits: dict[str, _Circuit] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def check(self, endpoint: str) -> None:
+        """Raise CircuitOpenError if a request to the endpoint must not be sent."""
+        with self._lock:
+            c = self._circuits.get(endpoint)
+            if c is None or c.opened_at is None:
+                return
+            remaining = c.opened_at + self.reset_timeout - self._clock()
+            if remaining > 0 or c.probing:
+                raise CircuitOpenError(
+                    f"{endpoint} failed {c.failures} times in a row;"
+                    f" not trying again for {max(remaining, 0):.0f}s"
+                )
+            c.probing = True
+
+    def success(self, endpoint: str) -> None:
+        with self._lock:
+            self._circuits.pop(endpoint, None)
+
+    def failure(self, endpoint: str) -> None:
+        with self._lock:
+            c = self._circuits.setdefault(endpoint, _Circuit())
+            c.failures += 1
+            if c.probing or c.failures >= self.failure_threshold:
+                c.opened_at = self._clock()
+            c.probing = False
+
+    def is_open(self, endpoint: str) -> bool:
+        with self._lock:
+            c = self._circuits.get(endpoint)
+            return c is not None and c.opened_at is not None
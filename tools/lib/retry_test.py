@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import pickle
+import unittest
+
+import requests
+from lib import retry
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff_is_jittered_and_capped(self) -> None:
+        policy = retry.RetryPolicy(base_delay=1.0, max_delay=10.0)
+        for attempt in range(8):
+            delays = [policy.backoff(attempt) for _ in range(50)]
+            self.assertTrue(all(0 <= d <= min(10.0, 2**attempt) for d in delays))
+        self.assertGreater(len({policy.backoff(3) for _ in range(10)}), 1)
+
+    def test_backoff_honors_retry_after(self) -> None:
+        policy = retry.RetryPolicy(max_delay=60.0)
+        self.assertEqual(policy.backoff(0, {"Retry-After": "12"}), 12.0)
+        self.assertEqual(policy.backoff(0, {"Retry-After": "3600"}), 60.0)
+        self.assertLessEqual(policy.backoff(0, {"Retry-After": "soon"}), 1.0)
+
+    def test_retryable(self) -> None:
+        policy = retry.RetryPolicy()
+        self.assertTrue(policy.retryable("GET", write=False))
+        self.assertTrue(policy.retryable("DELETE", write=True))
+        self.assertTrue(policy.retryable("POST", write=False))
+        self.assertFalse(policy.retryable("POST", write=True))
+        self.assertFalse(
+            policy.retryable("POST", True, requests.exceptions.ReadTimeout())
+        )
+        self.assertTrue(
+            policy.retryable("POST", True, requests.exceptions.ConnectTimeout())
+        )
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.breaker = retry.CircuitBreaker(3, 30.0, clock=lambda: self.now)
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        for _ in range(2):
+            self.breaker.failure("GET /x")
+        self.breaker.check("GET /x")
+        self.breaker.failure("GET /x")
+        self.assertTrue(self.breaker.is_open("GET /x"))
+        with self.assertRaises(retry.CircuitOpenError):
+            self.breaker.check("GET /x")
+        # Other endpoints are not affected.
+        self.breaker.check("GET /y")
+
+    def test_success_resets_the_count(self) -> None:
+        self.breaker.failure("GET /x")
+        self.breaker.failure("GET /x")
+        self.breaker.success("GET /x")
+        self.breaker.failure("GET /x")
+        self.breaker.check("GET /x")
+
+    def test_one_probe_after_timeout(self) -> None:
+        for _ in range(3):
+            self.breaker.failure("GET /x")
+        self.now = 31.0
+        self.breaker.check("GET /x")
+        # Only one request may probe at a time.
+        with self.assertRaises(retry.CircuitOpenError):
+            self.breaker.check("GET /x")
+        # A failed probe opens the circuit for another timeout.
+        self.breaker.failure("GET /x")
+        with self.assertRaises(retry.CircuitOpenError):
+            self.breaker.check("GET /x")
+        self.now = 62.0
+        self.breaker.check("GET /x")
+        self.breaker.success("GET /x")
+        self.assertFalse(self.breaker.is_open("GET /x"))
+        self.breaker.check("GET /x")
+
+    def test_pickle(self) -> None:
+        self.breaker.failure("GET /x")
+        breaker = pickle.loads(pickle.dumps(retry.CircuitBreaker(3, 30.0)))
+        breaker.check("GET /x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@ import time
 from dataclasses import dataclass
 from typing import Any
 
+monotonic = time.monotonic
 sleep = time.sleep
 
 
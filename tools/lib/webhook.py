@@ -0,0 +1,213 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import collections
+import hashlib
+import hmac
+import ipaddress
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Collection
+
+import requests
+
+# The webhook events that can end a wait in one of the release stages.
+EVENTS = frozenset({"check_run", "check_suite", "pull_request", "workflow_run"})
+
+# How many undelivered events to keep. Nobody waiting for them means they are
+# not interesting; the next poll sees their effect anyway.
+MAX_PENDING = 100
+
+
+@dataclass
+class Event:
+    kind: str
+    payload: dict[str, Any]
+
+    def concerns(self, head_sha: str | None = None, pr: int | None = None) -> bool:
+        """Whether the event may be about the given commit or pull request.
+
+        Without a commit or PR, every event is of interest. So is an event
+        whose payload doesn't say what it is about.
+        """
+        if head_sha is None and pr is None:
+            return True
+        obj = self.payload.get(self.kind)
+        if not isinstance(obj, dict):
+            return True
+        shas = {obj.get("head_sha"), (obj.get("head") or {}).get("sha")}
+        numbers = {self.payload.get("number"), obj.get("number")}
+        numbers.update(p.get("number") for p in obj.get("pull_requests") or [])
+        return (head_sha is not None and head_sha in shas) or (
+            pr is not None and pr in numbers
+        )
+
+
+def is_loopback(host: str) -> bool:
+    """Whether binding to `host` only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # "" (all interfaces) or a host name that may resolve to anything.
+        return False
+
+
+def signature(secret: str, body: bytes) -> str:
+    """Compute the X-Hub-Signature-256 header value for a request body."""
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        secret = self.server.receiver.secret
+        if secret is not None and not hmac.compare_digest(
+            self.headers.get("X-Hub-Signature-256", ""), signature(secret, body)
+        ):
+            self.send_response(401)
+            self.end_headers()
+            return
+        kind = self.headers.get("X-GitHub-Event", "")
+        if kind in EVENTS:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            self.server.receiver.deliver(Event(kind, payload))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    receiver: "Receiver"
+
+
+class Receiver:
+    """An embedded HTTP server that receives GitHub webhook events.
+
+    Stages that poll GitHub can `wait` on it instead of sleeping: the wait
+    ends as soon as a relevant event arrives, or after the poll interval if
+    none does, so a missed or misconfigured webhook only costs latency.
+    """
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, secret: str | None = None
+    ) -> None:
+        """Initializes a receiver; `start` binds the port (0 picks a free one).
+
+        If `secret` is set, events without a valid X-Hub-Signature-256 are
+        rejected. An empty secret is refused, since anyone can sign with it.
+        Without a secret, only a loopback `host` is allowed, so nobody else
+        can send events that drive the release stages.
+        """
+        if secret is not None and not secret:
+            raise ValueError("The webhook secret must not be empty")
+        if secret is None and not is_loopback(host):
+            raise ValueError(
+                f"Refusing to receive unauthenticated webhook events on {host!r}; "
+                "set a secret or bind to a loopback address"
+            )
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self._cond = threading.Condition()
+        self._pending: collections.deque[Event] = collections.deque(maxlen=MAX_PENDING)
+        self._server: _Server | None = None
+        # When the last `wait` returned, to space out the polls it wakes.
+        self._last_wakeup = float("-inf")
+
+    def __enter__(self) -> "Receiver":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.receiver = self
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.1,), daemon=True
+        ).start()
+        print(f"Listening for GitHub webhook events on {self.url}")
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        host = self.host or "localhost"
+        if ":" in host:
+            host = f"[{host}]"
+        return f"http://{host}:{self.port}/"
+
+    def deliver(self, event: Event) -> None:
+        """Hand an event to the waiting stage."""
+        with self._cond:
+            self._pending.append(event)
+            self._cond.notify_all()
+
+    def wait(
+        self,
+        timeout: float,
+        kinds: Collection[str] = EVENTS,
+        head_sha: str | None = None,
+        pr: int | None = None,
+        min_interval: float = 0.0,
+    ) -> Event | None:
+        """Wait for an event of one of the given kinds about a commit or PR.
+
+        Events that arrived since the last wait count, so nothing is lost
+        while the caller was busy polling. All pending events are taken at
+        once, so a burst of them ends one wait rather than one per event,
+        and a wait never ends sooner than `min_interval` seconds after the
+        previous one. Returns the last relevant event, or None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        earliest = self._last_wakeup + min_interval
+        found: Event | None = None
+        with self._cond:
+            while True:
+                for event in self._pending:
+                    if event.kind in kinds and event.concerns(head_sha, pr):
+                        found = event
+                self._pending.clear()
+                now = time.monotonic()
+                if now >= deadline or (found is not None and now >= earliest):
+                    break
+                self._cond.wait(
+                    (deadline if found is None else min(deadline, earliest)) - now
+                )
+            self._last_wakeup = time.monotonic()
+        return found
+
+
+def send(
+    url: str, kind: str, payload: dict[str, Any], secret: str | None = None
+) -> int:
+    """Send a webhook event the way GitHub would, e.g. to a local Receiver.
+
+    Returns the HTTP status code of the response.
+    """
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json", "X-GitHub-Event": kind}
+    if secret is not None:
+        headers["X-Hub-Signature-256"] = signature(secret, body)
+    return requests.post(url, data=body, headers=headers, timeout=10).status_code
@@ -0,0 +1,102 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# Copyright © 2026 The TokTok team
+import threading
+import time
+import unittest
+
+from lib import webhook
+
+
+class TestReceiver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.receiver = webhook.Receiver(secret="s3cret")
+        self.receiver.start()
+        self.addCleanup(self.receiver.stop)
+
+    def test_wakes_up_on_event(self) -> None:
+        timer = threading.Timer(
+            0.05,
+            webhook.send,
+            (self.receiver.url, "check_run", {"action": "completed"}, "s3cret"),
+        )
+        timer.start()
+        self.addCleanup(timer.cancel)
+        start = time.monotonic()
+        event = self.receiver.wait(10, {"check_run"})
+        self.assertLess(time.monotonic() - start, 5)
+        assert event is not None
+        self.assertEqual(event.kind, "check_run")
+        self.assertEqual(event.payload, {"action": "completed"})
+
+    def test_keeps_events_that_arrived_earlier(self) -> None:
+        webhook.send(self.receiver.url, "workflow_run", {}, "s3cret")
+        webhook.send(self.receiver.url, "pull_request", {"number": 1}, "s3cret")
+        event = self.receiver.wait(0, {"pull_request"})
+        assert event is not None
+        self.assertEqual(event.payload, {"number": 1})
+        # The skipped workflow_run event was consumed along with it.
+        self.assertIsNone(self.receiver.wait(0))
+
+    def test_takes_whole_burst(self) -> None:
+        for i in range(50):
+            self.receiver.deliver(webhook.Event("check_run", {"n": i}))
+        event = self.receiver.wait(0)
+        assert event is not None
+        self.assertEqual(event.payload, {"n": 49})
+        self.assertIsNone(self.receiver.wait(0))
+
+    def test_filters_by_commit_and_pr(self) -> None:
+        def run(sha: str) -> webhook.Event:
+            return webhook.Event("check_run", {"check_run": {"head_sha": sha}})
+
+        self.receiver.deliver(run("other"))
+        self.assertIsNone(self.receiver.wait(0, head_sha="abc"))
+        self.receiver.deliver(run("abc"))
+        self.assertIsNotNone(self.receiver.wait(0, head_sha="abc"))
+        pull = webhook.Event("pull_request", {"number": 7, "pull_request": {}})
+        self.receiver.deliver(pull)
+        self.assertIsNone(self.receiver.wait(0, pr=8))
+        self.receiver.deliver(pull)
+        self.assertIs(self.receiver.wait(0, pr=7), pull)
+
+    def test_spaces_out_wakeups(self) -> None:
+        self.receiver.wait(0)
+        self.receiver.deliver(webhook.Event("check_run", {}))
+        start = time.monotonic()
+        self.assertIsNotNone(self.receiver.wait(5, min_interval=0.2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_times_out(self) -> None:
+        webhook.send(self.receiver.url, "workflow_run", {}, "s3cret")
+        self.assertIsNone(self.receiver.wait(0.01, {"check_run"}))
+
+    def test_rejects_bad_signature(self) -> None:
+        self.assertEqual(webhook.send(self.receiver.url, "check_run", {}, "wrong"), 401)
+        self.assertEqual(webhook.send(self.receiver.url, "check_run", {}), 401)
+        self.assertIsNone(self.receiver.wait(0))
+
+    def test_ignores_other_events(self) -> None:
+        self.assertEqual(webhook.send(self.receiver.url, "ping", {}, "s3cret"), 204)
+        self.assertIsNone(self.receiver.wait(0))
+
+
+class TestBind(unittest.TestCase):
+    def test_loopback_without_secret(self) -> None:
+        self.assertEqual(webhook.Receiver().host, "127.0.0.1")
+        webhook.Receiver(host="localhost")
+        webhook.Receiver(host="::1")
+
+    def test_public_bind_requires_secret(self) -> None:
+        for host in ("", "0.0.0.0", "192.0.2.1", "example.com"):
+            with self.assertRaises(ValueError):
+                webhook.Receiver(host=host)
+        webhook.Receiver(host="", secret="s3cret")
+
+    def test_rejects_empty_secret(self) -> None:
+        for host in ("0.0.0.0", "127.0.0.1"):
+            with self.assertRaises(ValueError):
+                webhook.Receiver(host=host, secret="")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2024-2026 The TokTok team
+import base64
 import contextlib
 import unittest
-from typing import Any
+from typing import Any, Iterator
 from unittest.mock import MagicMock, mock_open, patch
 
 from create_release import Config, Releaser
@@ -77,6 +78,8 @@ class FakeGitHub(github.GitHub):
                 pass
         if "/branches/" in url:
             return {"name": url.split("/")[-1]}
+        if "/git/trees/" in url:
+            return {"tree": [], "truncated": False}
         raise ValueError(f"URL not mocked in FakeGitHub: {url}")
 
     def api_uncached(
@@ -87,6 +90,25 @@ class FakeGitHub(github.GitHub):
     ) -> Any:
         return self.api(url, auth, params)
 
+    def api_paginated(
+        self,
+        url: str,
+        auth: github.AuthLevel = github.AuthLevel.OPTIONAL,
+        params: tuple[tuple[str, str | int], ...] = tuple(),
+        key: str | None = None,
+    ) -> Iterator[Any]:
+        page = self.api(url, auth, params)
+        yield from page[key] if key is not None else page
+
+    def api_list(
+        self,
+        url: str,
+        auth: github.AuthLevel = github.AuthLevel.OPTIONAL,
+        params: tuple[tuple[str, str | int], ...] = tuple(),
+        key: str | None = None,
+    ) -> list[Any]:
+        return list(self.api_paginated(url, auth, params, key))
+
     def api_post(
         self,
         url: str,
@@ -147,7 +169,10 @@ class FakeGitHub(github.GitHub):
         if "/git/refs" in url:
             return None
         if "/git/blobs" in url:
-            return {"sha": "sha_blob"}
+            content = json["content"].encode()
+            if json["encoding"] == "base64":
+                content = base64.b64decode(content)
+            return {"sha": github._blob_sha(content)}
         if "/git/trees" in url:
             return {"sha": "sha_tree"}
         if "/git/commits" in url:
@@ -244,9 +269,21 @@ class FakeGitHub(github.GitHub):
     def checks(self, commit: str) -> dict[str, github.CheckRun]:
         return self._checks.get(commit, {})
 
-    def graphql(self, query: str) -> Any:
+    def graphql(self, query: str, variables: dict[str, Any] | None = None) -> Any:
         return {"data": {}}
 
+    def release_snapshot(
+        self, tag: str, head: str, base: str, issue: int | None = None
+    ) -> github.ReleaseSnapshot:
+        return github.ReleaseSnapshot(
+            has_pr=self.find_pr_for_branch(head, base) is not None,
+            release_exists=self.get_release_id(tag) is not None,
+            release_published=self.release_is_published(tag),
+            asset_names=[a.name for a in self.release_assets(tag)],
+            assets_complete=True,
+            issue_body=self.get_issue(issue).body if issue else None,
+        )
+
     def clear_cache(self) -> None:
         pass
 
@@ -328,6 +365,12 @@ class FakeGit(git.Git):
     def last_commit_message(self, branch: str) -> str:
         return self._log[-1] if self._log else ""
 
+    def commit_message(self, commit_sha: str) -> str:
+        return self._log[-1]
+
+    def files_changed(self, commit: str) -> list[str]:
+        return []
+
     def reset(self, branch: str) -> None:
         pass
 
@@ -362,6 +405,19 @@ class FakeGit(git.Git):
         return self._rebase_success
 
 
+class FakeClock:
+    """A clock that only moves forward when somebody sleeps."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
 class TestReleaseE2E(unittest.TestCase):
     def make_config(self, **kwargs: Any) -> Config:
         defaults: dict[str, Any] = {
@@ -403,12 +459,15 @@ class TestReleaseE2E(unittest.TestCase):
         stack.enter_context(patch("subprocess.run"))
         stack.enter_context(patch("builtins.open", m_open))
         stack.enter_context(patch("validate_pr.main"))
-        stack.enter_context(patch("lib.stage.sleep"))
+        clock = FakeClock()
+        stack.enter_context(patch("lib.stage.monotonic", clock.monotonic))
+        stack.enter_context(patch("lib.stage.sleep", clock.sleep))
         stack.enter_context(patch("create_tarballs.main"))
         stack.enter_context(patch("sign_release_assets.main"))
         stack.enter_context(patch("verify_release_assets.main"))
         stack.enter_context(patch("lib.github.DEFAULT_GITHUB", gh))
         stack.enter_context(patch("lib.git.DEFAULT_GIT", gt))
+        stack.enter_context(patch.object(gh, "git", gt))
         return stack
 
     def test_full_release_lifecycle(self) -> None:
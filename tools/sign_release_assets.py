@@ -5,6 +5,7 @@ import argparse
 import os
 import subprocess  # nosec
 import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 
 from lib import git, github
@@ -29,10 +30,12 @@ def parse_args() -> tuple[Config, list[str]]:
     )
     parser.add_argument(
         "--tag",
-        help="Tag to create signatures for",
-        default=git.current_tag(),
+        help="Tag to create signatures for. Default: the current tag",
+        default="",
     )
     args, unknown = parser.parse_known_args()
+    if not args.tag:
+        args.tag = git.current_tag()
     return Config(**vars(args)), unknown
 
 
@@ -58,10 +61,16 @@ def sign_binary(binary: str, tmpdir: str, args: list[str]) -> None:
     )
 
 
-def upload_signature(tag: str, tmpdir: str, binary: str) -> None:
-    print(f"Uploading signature for {binary}")
+def upload_signature(tag: str, upload_url: str, tmpdir: str, binary: str) -> None:
+    print(f"Uploading {binary}.asc")
     with open(os.path.join(tmpdir, f"{binary}.asc"), "rb") as f:
-        github.upload_asset(tag, f"{binary}.asc", "application/pgp-signature", f)
+        github.upload_asset(
+            tag,
+            f"{binary}.asc",
+            "application/pgp-signature",
+            f,
+            upload_url=upload_url,
+        )
 
 
 def todo(tag: str) -> list[github.ReleaseAsset]:
@@ -71,13 +80,28 @@ def todo(tag: str) -> list[github.ReleaseAsset]:
 
 
 def download_and_sign_binaries(config: Config, tmpdir: str, args: list[str]) -> None:
-    for asset in todo(config.tag):
-        with open(os.path.join(tmpdir, asset.name), "wb") as f:
-            print(f"Downloading {asset.name}")
-            f.write(github.download_asset(asset.id))
-        sign_binary(asset.name, tmpdir, args)
-        if config.upload:
-            upload_signature(config.tag, tmpdir, asset.name)
+    assets = todo(config.tag)
+    if not assets:
+        return
+    upload_url = str(github.release(config.tag)["upload_url"]) if config.upload else ""
+    # Each signature is uploaded as soon as it is made, while the next binary
+    # is downloaded and signed. If signing fails partway, the signatures made
+    # so far are still uploaded, and a rerun only signs the rest.
+    uploads: list[Future[None]] = []
+    with ThreadPoolExecutor(max_workers=github.UPLOAD_WORKERS) as pool:
+        for asset in assets:
+            with open(os.path.join(tmpdir, asset.name), "wb") as f:
+                print(f"Downloading {asset.name}")
+                github.download_asset_to(asset.id, f)
+            sign_binary(asset.name, tmpdir, args)
+            if config.upload:
+                uploads.append(
+                    pool.submit(
+                        upload_signature, config.tag, upload_url, tmpdir, asset.name
+                    )
+                )
+    for upload in uploads:
+        upload.result()
 
 
 def main(config: Config, args: list[str]) -> None:
@@ -148,32 +148,22 @@ def git_log(prev_tag: str, cur_tag: str) -> list[str]:
 
 
 def git_tag_date(tag: str) -> str:
-    tag_sha = (
-        subprocess.check_output(  # nosec
-            [
-                "git",
-                "rev-parse",
-                tag,
-            ]
-        )
-        .decode("utf-8")
-        .strip()
-    )
-    tag_data = subprocess.check_output(  # nosec
-        [
-            "git",
-            "cat-file",
-            "-p",
-            tag_sha,
-        ]
-    ).decode("utf-8")
+    """Get the date (YYYY-MM-DD) a tag was made.
+
+    Raises ValueError if there is no such tag or it has no date. Errors
+    reading the object from git are passed on unchanged.
+    """
+    obj = git.read_object(tag)
+    if obj is None:
+        raise ValueError(f"Tag {tag} not found")
+    tag_data = obj[1].decode("utf-8")
     date_match = re.search(r"^Original tagger: .+ (\d{10})", tag_data, re.MULTILINE)
     if not date_match:
         date_match = re.search(r"^tagger .+ (\d{10})", tag_data, re.MULTILINE)
     if not date_match:
         date_match = re.search(r"^committer .+ (\d{10})", tag_data, re.MULTILINE)
     if not date_match:
-        raise Exception(f"Date not found for tag {tag}")
+        raise ValueError(f"Date not found for tag {tag}")
 
     return datetime.fromtimestamp(int(date_match.group(1))).strftime("%Y-%m-%d")
 
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2026 The TokTok team
+import subprocess  # nosec
 import unittest
+from unittest.mock import patch
 
-from update_changelog import Config, LogParser, group_by_category
+from lib import git
+from update_changelog import Config, LogParser, git_tag_date, group_by_category
 
 
 class TestChangelogParsing(unittest.TestCase):
@@ -61,5 +64,27 @@ class TestChangelogParsing(unittest.TestCase):
         self.assertEqual(len(grouped["feat"]), 1)
 
 
+class TestGitTagDate(unittest.TestCase):
+    @patch("lib.git.read_object")
+    def test_tag_date(self, read_object: unittest.mock.MagicMock) -> None:
+        info = git.ObjectInfo("a" * 40, "tag", 0)
+        data = b"object b\ntype commit\ntagger Alice <a@b.c> 1700000000 +0000\n"
+        read_object.return_value = (info, data)
+        self.assertRegex(git_tag_date("v1.0.0"), r"^2023-11-1[45]$")
+
+    @patch("lib.git.read_object", return_value=None)
+    def test_missing_tag(self, _: unittest.mock.MagicMock) -> None:
+        with self.assertRaises(ValueError):
+            git_tag_date("v9.9.9")
+
+    @patch(
+        "lib.git.read_object",
+        side_effect=subprocess.CalledProcessError(1, ["git", "cat-file"]),
+    )
+    def test_reader_errors_pass_through(self, _: unittest.mock.MagicMock) -> None:
+        with self.assertRaises(subprocess.CalledProcessError):
+            git_tag_date("v1.0.0")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -55,7 +55,7 @@ def parse_args() -> Config:
         "--download-files-path",
         help="Path to the dockerfiles/qtox/download directory",
         required=False,
-        default=download_file_paths(),
+        default="",
     )
     parser.add_argument(
         "--git-tag",
@@ -69,7 +69,10 @@ def parse_args() -> Config:
         action=argparse.BooleanOptionalAction,
         default=False,
     )
-    return Config(**vars(parser.parse_args()))
+    args = parser.parse_args()
+    if not args.download_files_path:
+        args.download_files_path = str(download_file_paths())
+    return Config(**vars(args))
 
 
 PRINT_VERSION_SCRIPT = """
@@ -115,8 +118,10 @@ def load_flathub_manifest(flathub_manifest_path: str) -> Any:
 
 def commit_from_tag(url: str, tag: str) -> str:
     if tag.startswith("release/"):
-        output = subprocess.check_output(["git", "rev-parse", tag])  # nosec
-        return output.decode().strip()
+        info = git.object_info(tag)
+        if info is None:
+            raise ValueError(f"Could not find {tag}")
+        return info.sha
 
     return (
         subprocess.check_output(  # nosec
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 import argparse
-import io
 import os
-import zipfile
 from dataclasses import dataclass
 
 from lib import git
@@ -21,9 +19,9 @@ def parse_args() -> Config:
     """)
     parser.add_argument(
         "--branch",
-        help="Git branch to use for the golden update.",
+        help="Git branch to use for the golden update. Default: current branch",
         required=False,
-        default=git.current_branch(),
+        default="",
     )
     parser.add_argument(
         "--force",
@@ -31,7 +29,10 @@ def parse_args() -> Config:
         action=argparse.BooleanOptionalAction,
         default=False,
     )
-    return Config(**vars(parser.parse_args()))
+    args = parser.parse_args()
+    if not args.branch:
+        args.branch = git.current_branch()
+    return Config(**vars(args))
 
 
 def _discover_goldens() -> dict[str, str]:
@@ -47,6 +48,17 @@ def _discover_goldens() -> dict[str, str]:
     return goldens
 
 
+def _golden_for(goldens: dict[str, str], filename: str) -> str | None:
+    """Get the golden image path for a test image in the artifact, if any."""
+    if not filename.endswith("_testImage.png"):
+        return None
+    base = os.path.basename(filename.removesuffix("_testImage.png"))
+    if base not in goldens:
+        print(f"Unknown golden image: {base}")
+        return None
+    return goldens[base]
+
+
 def main(config: Config) -> None:
     os.chdir(git.root_dir())
     goldens = _discover_goldens()
@@ -59,21 +71,11 @@ def main(config: Config) -> None:
                 print(f"Check for {config.branch}@{sha} did not fail; "
                       "no golden images to update.")
                 return
-            content = github.download_artifact("failed-test-goldens", check.id)
-            zip_buffer = io.BytesIO(content)
-            with zipfile.ZipFile(zip_buffer) as z:
-                for file in z.filelist:
-                    print(f"Checking {file.filename}")
-                    if file.filename.endswith("_testImage.png"):
-                        base = os.path.basename(
-                            file.filename.removesuffix("_testImage.png"))
-                        if base in goldens:
-                            print(f"Updating {base}.png")
-                            with z.open(file) as f:
-                                with open(goldens[base], "wb") as out:
-                                    out.write(f.read())
-                        else:
-                            print(f"Unknown golden image: {base}")
+            updated = github.extract_artifact(
+                "failed-test-goldens", check.id, lambda name: _golden_for(goldens, name))
+            for path in updated:
+                print(f"Updated {path}")
+            print(f"{len(updated)} golden images changed.")
 
 
 if __name__ == "__main__":
@@ -51,11 +51,14 @@ def parse_args() -> Config:
     )
     parser.add_argument(
         "--output",
-        help="Output JSON file",
+        help="Output JSON file. Default: res/nodes.json in the repository",
         required=False,
-        default=git.root_dir() / "res" / "nodes.json",
+        default="",
     )
-    return Config(**vars(parser.parse_args()))
+    args = parser.parse_args()
+    if not args.output:
+        args.output = str(git.root_dir() / "res" / "nodes.json")
+    return Config(**vars(args))
 
 
 @dataclass
@@ -72,7 +72,7 @@ def github_weblate_prs() -> list[tuple[str, str]]:
 
     Weblate PRs are those who are opened by the Weblate bot called "weblate".
     """
-    return parse_weblate_prs(github.api(f"/repos/{github.repository()}/pulls"))
+    return parse_weblate_prs(github.api_list(f"/repos/{github.repository()}/pulls"))
 
 
 def check_github_weblate_prs(failures: list[str]) -> None:
@@ -342,7 +342,16 @@ def main(config: Config) -> None:
     check_changelog(failures, config)
 
     if config.debug:
-        print(f"\nDebug: {len(github.api_requests)} GitHub API requests made")
+        stats = github.request_metrics()
+        print(f"\nDebug: {stats.total_requests()} GitHub API requests made")
+        for endpoint, s in sorted(stats.endpoints().items()):
+            print(
+                f"  {s.calls:4} {endpoint} ({s.cache_hits} cached, {s.retries} retried)"
+            )
+        git_stats = git.command_metrics()
+        print(f"\nDebug: {git_stats.total_calls()} git processes started")
+        for command, c in sorted(git_stats.commands().items()):
+            print(f"  {c.calls:4} git {command} ({c.seconds_sum:.3f}s)")
 
     if failures:
         print("\nSome checks failed:")
@@ -2,14 +2,13 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # Copyright © 2024-2026 The TokTok team
 import argparse
-import multiprocessing
 import os
 import subprocess  # nosec
 import sys
 import tempfile
 from dataclasses import dataclass
 
-from lib import git, github
+from lib import async_github, git, github
 
 
 @dataclass
@@ -24,10 +23,13 @@ def parse_args() -> Config:
     """)
     parser.add_argument(
         "--tag",
-        help="Tag to create signatures for",
-        default=git.current_tag(),
+        help="Tag to create signatures for. Default: the current tag",
+        default="",
     )
-    return Config(**vars(parser.parse_args()))
+    args = parser.parse_args()
+    if not args.tag:
+        args.tag = git.current_tag()
+    return Config(**vars(args))
 
 
 def needs_signature(name: str) -> bool:
@@ -52,9 +54,9 @@ def download_and_verify(
     tmpdir, asset, by_name = args
     print(f"Downloading {asset.name} and {asset.name}.asc", file=sys.stderr)
     with open(os.path.join(tmpdir, asset.name), "wb") as f:
-        f.write(github.download_asset(asset.id))
+        github.download_asset_to(asset.id, f)
     with open(os.path.join(tmpdir, f"{asset.name}.asc"), "wb") as f:
-        f.write(github.download_asset(by_name[asset.name + ".asc"].id))
+        github.download_asset_to(by_name[asset.name + ".asc"].id, f)
     verify_signature(tmpdir, asset.name)
 
 
@@ -62,8 +64,11 @@ def download_and_verify_binaries(config: Config, tmpdir: str) -> int:
     assets = github.release_assets(config.tag)
     by_name = {asset.name: asset for asset in assets}
     todo = tuple(asset for asset in assets if needs_signature(asset.name))
-    with multiprocessing.Pool() as pool:
-        pool.map(download_and_verify, [(tmpdir, asset, by_name) for asset in todo])
+    # The work is mostly waiting for downloads, so threads sharing one
+    # connection pool are enough.
+    async_github.map_sync(
+        download_and_verify, [(tmpdir, asset, by_name) for asset in todo]
+    )
     return len(todo)
 
 